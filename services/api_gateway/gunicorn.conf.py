@@ -0,0 +1,19 @@
+"""
+Gunicorn configuration for the API Gateway
+Run with: gunicorn -c gunicorn.conf.py main:app
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('API_GATEWAY_PORT', 8000)}"
+
+# ASGI app: each uvicorn worker runs its own event loop and httpx connection pool
+worker_class = "uvicorn.workers.UvicornWorker"
+# Resumable-upload state lives in files under the upload dir, so any worker can serve any chunk
+workers = int(os.environ.get('API_GATEWAY_WORKERS', multiprocessing.cpu_count()))
+
+# Large uploads can take a while on slow links
+timeout = int(os.environ.get('API_GATEWAY_TIMEOUT', 300))
+graceful_timeout = 30
+keepalive = 5
@@ -6,39 +6,57 @@ Handles video uploads and routes requests to appropriate microservices
 """
 
 import os
+import json
 import logging
-import requests
+import asyncio
+import httpx
+import orjson
+import ipaddress
+import re
+import socket
 import tempfile
+import time
+from cachetools import TTLCache
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, Any
-from flask import Flask, request, jsonify, send_file
-from flask_cors import CORS
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
 from werkzeug.utils import secure_filename
+import uvicorn
 import uuid
 
 # Configure logging
+# The format doesn't use thread/process fields, so skip collecting them per record
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
-CORS(app, resources={
-    r"/*": {
-        "origins": ["http://localhost:3000"],
-        "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"]
-    }
-})
-
 # Configuration
 PORT = int(os.environ.get('API_GATEWAY_PORT', 8000))
 # Save uploaded videos to the project's videos directory that frame reader expects
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))  # Go up to project root
 UPLOAD_FOLDER = os.path.join(PROJECT_ROOT, 'videos')
 MAX_FILE_SIZE = 500 * 1024 * 1024  # 500MB
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024  # 4MB write buffer
+MAX_FORM_FIELD_SIZE = 1024 * 1024  # non-file form fields (fps, roi_zones) are held in memory
+RESUMABLE_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB default chunk for /api/upload/chunk
+RESUMABLE_MAX_CHUNK_SIZE = 32 * 1024 * 1024  # each chunk is buffered in memory, so cap what clients may pick
+CONTENT_RANGE_RE = re.compile(r'bytes (\d+)-(\d+)/(\d+|\*)')
 ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'webm'}
+_ALLOWED = frozenset(ALLOWED_EXTENSIONS)
+HEALTH_CACHE_TTL = float(os.environ.get('HEALTH_CACHE_TTL', 2.0))  # seconds
+RESULTS_CACHE_TTL = int(os.environ.get('RESULTS_CACHE_TTL', 10))  # seconds
+DNS_REFRESH_INTERVAL = float(os.environ.get('DNS_REFRESH_INTERVAL', 30.0))  # seconds
 
 # Service endpoints
 SERVICES = {
@@ -50,308 +68,1048 @@ SERVICES = {
     'message_broker': 'http://localhost:8010'
 }
 
+# Max concurrent in-flight proxied requests per downstream service
+SERVICE_LIMITS = {
+    'frame_reader': 16,
+    'detection': 8,
+    'violation_detector': 16,
+    'roi_manager': 16,
+    'database': 32,
+    'message_broker': 32
+}
+DEFAULT_SERVICE_LIMIT = 16
+
+# Short connect timeouts so dead hosts fail fast; read/total stay generous
+PROXY_TIMEOUT = httpx.Timeout(30.0, connect=2.0)
+HEALTH_PROBE_TIMEOUT = httpx.Timeout(4.0, connect=1.0)
+AGGREGATED_HEALTH_TIMEOUT = httpx.Timeout(1.0)
+AGGREGATED_HEALTH_MAX_AGE = 10.0  # seconds; older broker snapshots fall back to fan-out
+
+# Shared async HTTP client so outbound calls reuse keep-alive connections
+# DOWNSTREAM_HTTP2=1 multiplexes proxied calls over one HTTP/2 connection per service.
+# Services are plain http://, so this uses h2 prior knowledge and needs h2-capable servers
+# (e.g. hypercorn); uvicorn and the Flask services only speak HTTP/1.1, hence off by default.
+DOWNSTREAM_HTTP2 = os.environ.get('DOWNSTREAM_HTTP2', '0') == '1'
+client = httpx.AsyncClient(
+    timeout=PROXY_TIMEOUT,
+    # With a custom transport the client ignores its own limits=, so the pool is sized here
+    transport=httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(max_keepalive_connections=64, max_connections=256),
+        retries=2,
+        http1=not DOWNSTREAM_HTTP2,
+        http2=DOWNSTREAM_HTTP2
+    )
+)
+
+# Per-service back-pressure; semaphores are created on the serving event loop at startup
+_sems: Dict[str, asyncio.Semaphore] = {}
+_in_flight: Dict[str, int] = {service_name: 0 for service_name in SERVICES}
+_connect_timeouts: Dict[str, int] = {service_name: 0 for service_name in SERVICES}
+
+# Short-lived snapshot of health responses, keyed by endpoint
+_health_cache: Dict[str, Dict[str, Any]] = {}
+
+# video_id -> (status_code, body, content_type) of recent /results lookups.
+# Per worker and never invalidated: new violations show up once the entry expires,
+# so results can lag by up to RESULTS_CACHE_TTL seconds.
+_results_cache: TTLCache = TTLCache(maxsize=1024, ttl=RESULTS_CACHE_TTL)
+RESULTS_CACHE_CONTROL = f'max-age={RESULTS_CACHE_TTL}, stale-if-error=60'
+
+# (epoch second, formatted ISO string) of the last timestamp handed out
+_timestamp_cache: Tuple[int, str] = (0, '')
+
+# Service base URLs with the hostname pinned to a resolved IP, plus the Host header to send
+_resolved: Dict[str, Tuple[str, Dict[str, str]]] = {
+    service_name: (service_url, {}) for service_name, service_url in SERVICES.items()
+}
+
 # Ensure upload directory exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-def allowed_file(filename):
-    """Check if file extension is allowed"""
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+def _needs_resolution(host: str) -> bool:
+    """Literal IPs and localhost gain nothing from pinning"""
+    if host == 'localhost':
+        return False
+    try:
+        ipaddress.ip_address(host)
+        return False
+    except ValueError:
+        return True
+
+async def resolve_services():
+    """Resolve service hostnames once so requests skip per-call getaddrinfo"""
+    loop = asyncio.get_running_loop()
+    for service_name, service_url in SERVICES.items():
+        parts = urlsplit(service_url)
+        if not _needs_resolution(parts.hostname):
+            continue
+        try:
+            infos = await loop.getaddrinfo(parts.hostname, parts.port, type=socket.SOCK_STREAM)
+            ip = infos[0][4][0]
+            if ':' in ip:
+                ip = f"[{ip}]"
+            netloc = f"{ip}:{parts.port}" if parts.port else ip
+            _resolved[service_name] = (parts._replace(netloc=netloc).geturl(), {'Host': parts.netloc})
+        except socket.gaierror as e:
+            # Keep the previous mapping; httpx will resolve the name itself
+            logger.warning("DNS resolution failed for %s (%s): %s", service_name, parts.hostname, e)
+
+async def _refresh_dns_loop():
+    """Periodically re-resolve service hostnames"""
+    while True:
+        await asyncio.sleep(DNS_REFRESH_INTERVAL)
+        await resolve_services()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup
+    for service_name in SERVICES:
+        _sems[service_name] = asyncio.Semaphore(SERVICE_LIMITS.get(service_name, DEFAULT_SERVICE_LIMIT))
+    await resolve_services()
+    dns_task = asyncio.create_task(_refresh_dns_loop())
+    logger.info("🚀 API Gateway Service started")
+    yield
+    # Shutdown
+    dns_task.cancel()
+    await client.aclose()
+    logger.info("🛑 API Gateway Service stopped")
+
+app = FastAPI(
+    title="Pizza Store API Gateway",
+    description="Central API gateway for pizza store detection system",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
+
+# Add CORS middleware
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:3000"],
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization"],
+)
+
+def allowed_extension(filename: str) -> Optional[str]:
+    """Return the lowercased file extension if it is allowed, else None"""
+    ext = os.path.splitext(filename)[1][1:].lower()
+    return ext if ext in _ALLOWED else None
+
+class UploadRejected(Exception):
+    """A streamed upload failed validation part-way; carries the HTTP status to answer with"""
+
+    def __init__(self, status_code: int, error: str):
+        super().__init__(error)
+        self.status_code = status_code
+        self.error = error
+
+def _write_durably(out, data: bytes, final: bool):
+    out.write(data)
+    if final:
+        # Durable before the frame reader is told about it
+        os.fsync(out.fileno())
+
+async def receive_upload(request: Request, part_path: str) -> Tuple[Dict[str, str], Optional[str], int]:
+    """Parse a multipart upload as it arrives, streaming the 'video' part straight to part_path.
+
+    Returns (other form fields, video filename, video bytes written). The video is capped at
+    MAX_FILE_SIZE as bytes arrive, so a missing or lying Content-Length can't bypass the limit.
+    """
+    content_type, params = parse_options_header(request.headers.get('content-type', ''))
+    if content_type != b'multipart/form-data' or b'boundary' not in params:
+        raise UploadRejected(400, 'Expected a multipart/form-data body')
+
+    # Parser callbacks only record events; they're applied below where file writes can be awaited
+    events: List[Tuple[str, bytes, bytes]] = []
+    header_field, header_value = bytearray(), bytearray()
+
+    def on_header_end():
+        events.append(('header', bytes(header_field).lower(), bytes(header_value)))
+        header_field.clear()
+        header_value.clear()
 
-def proxy_request(service_name: str, path: str, method: str = 'GET', **kwargs):
+    parser = MultipartParser(params[b'boundary'], {
+        'on_part_begin': lambda: events.append(('begin', b'', b'')),
+        'on_header_field': lambda data, start, end: header_field.extend(data[start:end]),
+        'on_header_value': lambda data, start, end: header_value.extend(data[start:end]),
+        'on_header_end': on_header_end,
+        'on_headers_finished': lambda: events.append(('headers', b'', b'')),
+        'on_part_data': lambda data, start, end: events.append(('data', data[start:end], b'')),
+        'on_part_end': lambda: events.append(('end', b'', b'')),
+    })
+
+    fields: Dict[str, str] = {}
+    filename: Optional[str] = None
+    file_size = 0
+    disposition: Dict[bytes, bytes] = {}
+    in_video = False
+    pending = bytearray()
+    out = None
+
+    async def apply_events():
+        nonlocal disposition, in_video, pending, filename, file_size, out
+        for kind, a, b in events:
+            if kind == 'begin':
+                disposition = {}
+            elif kind == 'header' and a == b'content-disposition':
+                disposition = parse_options_header(b)[1]
+            elif kind == 'headers':
+                pending = bytearray()
+                in_video = (filename is None and disposition.get(b'name') == b'video'
+                            and b'filename' in disposition)
+                if in_video:
+                    filename = disposition[b'filename'].decode('utf-8', 'replace')
+                    if filename and not allowed_extension(filename):
+                        raise UploadRejected(
+                            400, f'File type not allowed. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}'
+                        )
+                    out = open(part_path, 'wb', buffering=0)
+            elif kind == 'data':
+                pending += a
+                if in_video:
+                    file_size += len(a)
+                    if file_size > MAX_FILE_SIZE:
+                        raise UploadRejected(413, f'File too large. Maximum size: {MAX_FILE_SIZE} bytes')
+                    if len(pending) >= UPLOAD_CHUNK_SIZE:
+                        await run_in_threadpool(_write_durably, out, bytes(pending), False)
+                        pending = bytearray()
+                elif len(pending) > MAX_FORM_FIELD_SIZE:
+                    raise UploadRejected(413, f'Form field larger than {MAX_FORM_FIELD_SIZE} bytes')
+            elif kind == 'end':
+                if in_video:
+                    await run_in_threadpool(_write_durably, out, bytes(pending), True)
+                    in_video = False
+                elif b'name' in disposition:
+                    fields[disposition[b'name'].decode('utf-8', 'replace')] = pending.decode('utf-8', 'replace')
+        events.clear()
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            await apply_events()
+        parser.finalize()
+        await apply_events()
+    except BaseException:
+        if out is not None:
+            out.close()
+            remove_file(part_path)
+        raise
+    if out is not None:
+        out.close()
+    return fields, filename, file_size
+
+def remove_file(filepath: str):
+    """Delete a file, ignoring it if it is already gone"""
+    try:
+        os.unlink(filepath)
+    except FileNotFoundError:
+        pass
+
+# Resumable-upload state lives next to the staging file so any gateway worker can serve any chunk
+def _upload_paths(video_id: str) -> Dict[str, str]:
+    base = os.path.join(UPLOAD_FOLDER, video_id)
+    return {
+        'part_path': f"{base}.part",
+        'meta_path': f"{base}.upload.json",
+        'chunks_path': f"{base}.chunks"
+    }
+
+def create_upload(video_id: str, meta: Dict[str, Any]):
+    """Create the empty staging file and its metadata sidecar"""
+    paths = _upload_paths(video_id)
+    open(paths['part_path'], 'wb').close()
+    with open(paths['meta_path'], 'w') as f:
+        json.dump(meta, f)
+
+def load_upload(video_id: str) -> Optional[Dict[str, Any]]:
+    """Load an in-progress upload's metadata and received chunk indices"""
+    # Only ids we generated (uuid4 hex) may name files in the upload folder
+    try:
+        if uuid.UUID(hex=video_id).hex != video_id:
+            return None
+    except ValueError:
+        return None
+
+    paths = _upload_paths(video_id)
+    try:
+        with open(paths['meta_path']) as f:
+            upload = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    try:
+        with open(paths['chunks_path']) as f:
+            received = {int(line) for line in f if line.strip()}
+    except FileNotFoundError:
+        received = set()
+
+    upload.update(paths)
+    upload['received'] = received
+    return upload
+
+def discard_upload_state(upload: Dict[str, Any]):
+    """Drop the sidecar files once an upload is finalized"""
+    remove_file(upload['meta_path'])
+    remove_file(upload['chunks_path'])
+
+def write_chunk(upload: Dict[str, Any], chunk_index: int, offset: int, data: bytes):
+    """Write one resumable-upload chunk at its offset and record its index"""
+    with open(upload['part_path'], 'r+b') as out:
+        out.seek(offset)
+        out.write(data)
+    with open(upload['chunks_path'], 'a') as f:
+        f.write(f"{chunk_index}\n")
+
+def fsync_file(filepath: str):
+    """Flush a finished upload to stable storage"""
+    with open(filepath, 'r+b') as out:
+        os.fsync(out.fileno())
+
+async def proxy_request(service_name: str, path: str, method: str = 'GET',
+                        timeout: httpx.Timeout = PROXY_TIMEOUT, **kwargs) -> httpx.Response:
     """Proxy request to a microservice"""
     if service_name not in SERVICES:
         raise ValueError(f"Unknown service: {service_name}")
-    
-    url = f"{SERVICES[service_name]}{path}"
-    
+
+    base_url, host_header = _resolved[service_name]
+    url = f"{base_url}{path}"
+    if host_header:
+        kwargs['headers'] = {**host_header, **(kwargs.get('headers') or {})}
+
+    async with _sems[service_name]:
+        _in_flight[service_name] += 1
+        try:
+            response = await client.request(method, url, timeout=timeout, **kwargs)
+            return response
+        except httpx.ConnectTimeout as e:
+            # DNS/TCP problems, as opposed to a slow service
+            _connect_timeouts[service_name] += 1
+            logger.warning("Connect timeout proxying to %s: %s", service_name, e)
+            raise
+        except httpx.HTTPError as e:
+            logger.error("Error proxying to %s: %s", service_name, e)
+            raise
+        finally:
+            _in_flight[service_name] -= 1
+
+def passthrough_response(response: httpx.Response) -> Response:
+    """Relay a downstream body as-is instead of decoding and re-encoding the JSON"""
+    return Response(
+        content=response.content,
+        status_code=response.status_code,
+        media_type=response.headers.get('content-type', 'application/json')
+    )
+
+def concurrency_usage() -> Dict[str, Dict[str, int]]:
+    """Current in-flight proxied requests against each service's limit"""
+    return {
+        service_name: {
+            'limit': SERVICE_LIMITS.get(service_name, DEFAULT_SERVICE_LIMIT),
+            'in_flight': _in_flight[service_name],
+            'connect_timeouts': _connect_timeouts[service_name]
+        }
+        for service_name in SERVICES
+    }
+
+async def _probe_service(service_name: str) -> Dict[str, Any]:
+    """Probe a single service's /health endpoint"""
+    base_url, host_header = _resolved[service_name]
     try:
-        response = requests.request(method, url, timeout=30, **kwargs)
-        return response
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error proxying to {service_name}: {e}")
-        raise
+        response = await client.get(f"{base_url}/health", headers=host_header, timeout=HEALTH_PROBE_TIMEOUT)
+        return {
+            'status': 'healthy' if response.status_code == 200 else 'unhealthy',
+            'response_time': response.elapsed.total_seconds()
+        }
+    except httpx.ConnectTimeout as e:
+        _connect_timeouts[service_name] += 1
+        logger.warning("Connect timeout probing %s: %s", service_name, e)
+        return {
+            'status': 'unhealthy',
+            'error': str(e) or 'connect timeout'
+        }
+    except Exception as e:
+        return {
+            'status': 'unhealthy',
+            'error': str(e)
+        }
+
+async def aggregated_health() -> Optional[Dict[str, Dict[str, Any]]]:
+    """Service health from the message broker's /status/all snapshot, if fresh and complete"""
+    base_url, host_header = _resolved['message_broker']
+    try:
+        response = await client.get(f"{base_url}/status/all", headers=host_header,
+                                    timeout=AGGREGATED_HEALTH_TIMEOUT)
+        if response.status_code != 200:
+            return None
+        snapshot = orjson.loads(response.content)
+    except Exception:
+        return None
+
+    age = snapshot.get('age')
+    services = snapshot.get('services') or {}
+    if age is None or age > AGGREGATED_HEALTH_MAX_AGE:
+        return None
 
-@app.route('/health', methods=['GET'])
-def health_check():
-    """Health check endpoint"""
-    # Check health of all services
     service_health = {}
-    for service_name, service_url in SERVICES.items():
-        try:
-            response = requests.get(f"{service_url}/health", timeout=5)
+    for service_name in SERVICES:
+        if service_name == 'message_broker':
+            # The broker answered, so it is up
             service_health[service_name] = {
-                'status': 'healthy' if response.status_code == 200 else 'unhealthy',
+                'status': 'healthy',
                 'response_time': response.elapsed.total_seconds()
             }
-        except Exception as e:
-            service_health[service_name] = {
-                'status': 'unhealthy',
-                'error': str(e)
-            }
-    
-    return jsonify({
+        elif service_name in services:
+            service_health[service_name] = services[service_name]
+        else:
+            return None
+    return service_health
+
+async def probe_all_services() -> Dict[str, Dict[str, Any]]:
+    """Service health via one broker call, else probe all services concurrently"""
+    service_health = await aggregated_health()
+    if service_health is not None:
+        return service_health
+
+    results = await asyncio.gather(*[
+        _probe_service(service_name) for service_name in SERVICES
+    ])
+    return dict(zip(SERVICES.keys(), results))
+
+def current_timestamp() -> str:
+    """ISO timestamp at second resolution, formatted at most once per second"""
+    global _timestamp_cache
+    now = int(time.time())
+    if _timestamp_cache[0] != now:
+        _timestamp_cache = (now, datetime.fromtimestamp(now).isoformat())
+    return _timestamp_cache[1]
+
+def _get_cached_health(request: Request, key: str):
+    """Return the cached payload for an endpoint unless expired or ?fresh=1 was passed"""
+    if request.query_params.get('fresh') == '1':
+        return None
+    entry = _health_cache.get(key)
+    if entry and time.monotonic() < entry['expires']:
+        return entry['data']
+    return None
+
+def _set_cached_health(key: str, data: Dict[str, Any]):
+    """Store an endpoint payload for HEALTH_CACHE_TTL seconds"""
+    _health_cache[key] = {
+        'data': data,
+        'expires': time.monotonic() + HEALTH_CACHE_TTL
+    }
+
+def _health_response(data: Dict[str, Any]) -> ORJSONResponse:
+    """JSON response that lets clients reuse the snapshot for the cache window"""
+    return ORJSONResponse(
+        content=data,
+        headers={'Cache-Control': f'max-age={int(HEALTH_CACHE_TTL)}'}
+    )
+
+@app.get('/health')
+async def health_check(request: Request):
+    """Health check endpoint"""
+    cached = _get_cached_health(request, 'health')
+    if cached is not None:
+        return _health_response(cached)
+
+    # Check health of all services
+    service_health = await probe_all_services()
+
+    data = {
         'status': 'healthy',
         'service': 'api_gateway',
         'port': PORT,
-        'timestamp': datetime.now().isoformat(),
-        'services': service_health
-    })
+        'timestamp': current_timestamp(),
+        'services': service_health,
+        'concurrency': concurrency_usage()
+    }
+    _set_cached_health('health', data)
+    return _health_response(data)
+
+async def start_video_processing(file_id: str, filename: str, fps) -> httpx.Response:
+    """Ask the frame reader to start processing an uploaded video"""
+    # Create VideoSource object for frame reader
+    # Frame reader expects just the filename, it will look in the videos directory
+    video_source = {
+        'source_type': 'file',
+        'source_path': filename,  # Just the filename, not full path
+        'fps': int(fps),
+        'resolution': [1920, 1080],  # Default resolution
+        'session_id': file_id
+    }
+
+    # Send to frame reader service
+    return await proxy_request(
+        'frame_reader',
+        '/start',
+        method='POST',
+        json=video_source
+    )
 
-@app.route('/api/upload', methods=['POST'])
-def upload_video():
+async def _register_roi_zone(zone: Dict[str, Any]) -> Dict[str, Any]:
+    """Create one ROI zone on the ROI manager, reporting failures instead of raising"""
+    try:
+        response = await proxy_request('roi_manager', '/rois', method='POST', json=zone)
+        return orjson.loads(response.content)
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e)
+        }
+
+async def register_roi_zones(roi_zones: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Create all ROI zones sent with an upload concurrently"""
+    return list(await asyncio.gather(*[_register_roi_zone(zone) for zone in roi_zones]))
+
+def parse_roi_zones(roi_zones: str) -> List[Dict[str, Any]]:
+    """Parse the roi_zones form field, ignoring anything that isn't a list of objects"""
+    try:
+        zones = orjson.loads(roi_zones or '[]')
+    except orjson.JSONDecodeError:
+        return []
+    if not isinstance(zones, list):
+        return []
+    return [zone for zone in zones if isinstance(zone, dict)]
+
+@app.post('/api/upload')
+async def upload_video(request: Request):
     """Upload video file and start processing"""
     try:
+        # Reject oversized uploads up front when the client declares the size
+        if int(request.headers.get('content-length', 0)) > MAX_FILE_SIZE:
+            return ORJSONResponse({
+                'success': False,
+                'error': f'File too large. Maximum size: {MAX_FILE_SIZE} bytes'
+            }, status_code=413)
+
+        # Stage to .part so a crash mid-upload never leaves a half file under the final name;
+        # the body is parsed as it arrives, so the video is written to disk exactly once
+        file_id = uuid.uuid4().hex
+        part_path = os.path.join(UPLOAD_FOLDER, f"{file_id}.part")
+        try:
+            fields, video_filename, file_size = await receive_upload(request, part_path)
+        except UploadRejected as e:
+            return ORJSONResponse({
+                'success': False,
+                'error': e.error
+            }, status_code=e.status_code)
+
         # Check if file is present
-        if 'video' not in request.files:
-            return jsonify({
+        if video_filename is None:
+            return ORJSONResponse({
                 'success': False,
                 'error': 'No video file provided'
-            }), 400
-        
-        file = request.files['video']
-        
+            }, status_code=400)
+
         # Check if file is selected
-        if file.filename == '':
-            return jsonify({
+        if video_filename == '':
+            remove_file(part_path)
+            return ORJSONResponse({
                 'success': False,
                 'error': 'No file selected'
-            }), 400
-        
-        # Check file extension
-        if not allowed_file(file.filename):
-            return jsonify({
+            }, status_code=400)
+
+        try:
+            fps = int(fields.get('fps', 10))
+        except ValueError:
+            remove_file(part_path)
+            return ORJSONResponse({
                 'success': False,
-                'error': f'File type not allowed. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}'
-            }), 400
-        
-        # Generate unique filename
-        file_id = str(uuid.uuid4())
-        original_filename = secure_filename(file.filename)
-        file_extension = original_filename.rsplit('.', 1)[1].lower()
+                'error': 'fps must be an integer'
+            }, status_code=400)
+        roi_zones = fields.get('roi_zones', '[]')
+
+        # Storage name is just uuid + validated extension; the sanitized original is only echoed back
+        file_extension = allowed_extension(video_filename)
+        original_filename = secure_filename(video_filename)
         filename = f"{file_id}.{file_extension}"
         filepath = os.path.join(UPLOAD_FOLDER, filename)
-        
-        # Save file
-        file.save(filepath)
-        file_size = os.path.getsize(filepath)
-        
-        logger.info(f"Video uploaded: {original_filename} -> {filename} ({file_size} bytes)")
-        
-        # Get additional parameters
-        fps = request.form.get('fps', 10)
-        roi_zones = request.form.get('roi_zones', '[]')
-        
+        os.replace(part_path, filepath)
+
+        logger.info("Video uploaded: %s -> %s (%d bytes)", original_filename, filename, file_size)
+
         # Start processing by sending to frame reader
         try:
-            # Create VideoSource object for frame reader
-            # Frame reader expects just the filename, it will look in the videos directory
-            video_source = {
-                'source_type': 'file',
-                'source_path': filename,  # Just the filename, not full path
-                'fps': int(fps),
-                'resolution': [1920, 1080],  # Default resolution
-                'session_id': file_id
+            # Start the frame reader and register ROI zones in one concurrent round trip
+            zones = parse_roi_zones(roi_zones)
+            response, roi_results = await asyncio.gather(
+                start_video_processing(file_id, filename, fps),
+                register_roi_zones(zones)
+            )
+
+            if response.status_code == 200:
+                result = orjson.loads(response.content)
+                data = {
+                    'video_id': file_id,
+                    'original_filename': original_filename,
+                    'file_size': file_size,
+                    'processing_status': result.get('status', 'started')
+                }
+                if zones:
+                    data['frame_reader'] = result
+                    data['roi_manager'] = roi_results
+                return {
+                    'success': True,
+                    'message': 'Video uploaded and processing started',
+                    'data': data
+                }
+            else:
+                # Clean up uploaded file if processing failed
+                remove_file(filepath)
+
+                return ORJSONResponse({
+                    'success': False,
+                    'error': 'Failed to start video processing',
+                    'details': response.text
+                }, status_code=500)
+
+        except Exception as e:
+            # Clean up uploaded file if processing failed
+            remove_file(filepath)
+
+            logger.error("Error starting video processing: %s", e)
+            return ORJSONResponse({
+                'success': False,
+                'error': 'Failed to start video processing',
+                'details': str(e)
+            }, status_code=500)
+
+    except Exception as e:
+        logger.error("Error uploading video: %s", e)
+        return ORJSONResponse({
+            'success': False,
+            'error': 'Internal server error',
+            'details': str(e)
+        }, status_code=500)
+
+@app.post('/api/upload/init')
+async def upload_init(request: Request):
+    """Start a resumable chunked upload"""
+    try:
+        try:
+            data = orjson.loads(await request.body())
+        except ValueError:
+            data = {}
+        original_filename = data.get('filename', '')
+
+        file_extension = allowed_extension(original_filename)
+        if not file_extension:
+            return ORJSONResponse({
+                'success': False,
+                'error': f'File type not allowed. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}'
+            }, status_code=400)
+
+        try:
+            file_size = int(data.get('file_size', 0))
+            chunk_size = int(data.get('chunk_size', RESUMABLE_CHUNK_SIZE))
+        except (TypeError, ValueError):
+            return ORJSONResponse({
+                'success': False,
+                'error': 'file_size and chunk_size must be integers'
+            }, status_code=400)
+
+        if file_size <= 0:
+            return ORJSONResponse({
+                'success': False,
+                'error': 'file_size must be positive'
+            }, status_code=400)
+
+        if file_size > MAX_FILE_SIZE:
+            return ORJSONResponse({
+                'success': False,
+                'error': f'File too large. Maximum size: {MAX_FILE_SIZE} bytes'
+            }, status_code=413)
+
+        if not 0 < chunk_size <= RESUMABLE_MAX_CHUNK_SIZE:
+            return ORJSONResponse({
+                'success': False,
+                'error': f'chunk_size must be between 1 and {RESUMABLE_MAX_CHUNK_SIZE} bytes'
+            }, status_code=400)
+
+        file_id = uuid.uuid4().hex
+
+        # Create the empty staging file that chunks are written into
+        create_upload(file_id, {
+            'original_filename': original_filename,
+            'extension': file_extension,
+            'file_size': file_size,
+            'chunk_size': chunk_size
+        })
+
+        return {
+            'success': True,
+            'data': {
+                'video_id': file_id,
+                'chunk_size': chunk_size
             }
+        }
+
+    except Exception as e:
+        logger.error("Error initializing upload: %s", e)
+        return ORJSONResponse({
+            'success': False,
+            'error': 'Internal server error',
+            'details': str(e)
+        }, status_code=500)
+
+@app.api_route('/api/upload/chunk', methods=['PUT', 'POST'])
+async def upload_chunk(request: Request, video_id: str = '', chunk_index: int = -1):
+    """Write one chunk of a resumable upload at its offset"""
+    try:
+        upload = load_upload(video_id)
+
+        if upload is None:
+            return ORJSONResponse({
+                'success': False,
+                'error': 'Unknown upload'
+            }, status_code=404)
+
+        # Prefer an explicit Content-Range ("bytes start-end/total"), else derive from the index
+        content_range = request.headers.get('content-range')
+        if content_range:
+            match = CONTENT_RANGE_RE.fullmatch(content_range.strip())
+            if not match:
+                return ORJSONResponse({
+                    'success': False,
+                    'error': 'Content-Range must be "bytes start-end/total"'
+                }, status_code=400)
+            offset = int(match.group(1))
+        elif chunk_index >= 0:
+            offset = chunk_index * upload['chunk_size']
+        else:
+            return ORJSONResponse({
+                'success': False,
+                'error': 'chunk_index or Content-Range required'
+            }, status_code=400)
+
+        # Received chunks are tracked by index, so ranges must start on a chunk boundary
+        if offset % upload['chunk_size']:
+            return ORJSONResponse({
+                'success': False,
+                'error': f"Chunk offset must be a multiple of chunk_size ({upload['chunk_size']})"
+            }, status_code=400)
+
+        if chunk_index < 0:
+            chunk_index = offset // upload['chunk_size']
+
+        # Read at most one chunk's worth; a bigger body is rejected without buffering the rest
+        data = bytearray()
+        async for part in request.stream():
+            data += part
+            if len(data) > upload['chunk_size']:
+                return ORJSONResponse({
+                    'success': False,
+                    'error': f"Chunk larger than chunk_size ({upload['chunk_size']} bytes)"
+                }, status_code=413)
+
+        if offset + len(data) > MAX_FILE_SIZE:
+            return ORJSONResponse({
+                'success': False,
+                'error': f'File too large. Maximum size: {MAX_FILE_SIZE} bytes'
+            }, status_code=413)
+
+        if offset + len(data) > upload['file_size']:
+            return ORJSONResponse({
+                'success': False,
+                'error': f"Chunk extends past the declared file_size ({upload['file_size']} bytes)"
+            }, status_code=400)
+
+        await run_in_threadpool(write_chunk, upload, chunk_index, offset, data)
+
+        return {
+            'success': True,
+            'data': {
+                'video_id': video_id,
+                'chunk_index': chunk_index,
+                'bytes': len(data)
+            }
+        }
+
+    except Exception as e:
+        logger.error("Error writing upload chunk: %s", e)
+        return ORJSONResponse({
+            'success': False,
+            'error': 'Internal server error',
+            'details': str(e)
+        }, status_code=500)
+
+@app.get('/api/upload/{video_id}/chunks')
+async def upload_chunks(video_id: str):
+    """List the chunk indices received so far, so clients can resume"""
+    upload = load_upload(video_id)
+
+    if upload is None:
+        return ORJSONResponse({
+            'success': False,
+            'error': 'Unknown upload'
+        }, status_code=404)
+
+    return {
+        'success': True,
+        'data': {
+            'video_id': video_id,
+            'chunk_size': upload['chunk_size'],
+            'received_chunks': sorted(upload['received'])
+        }
+    }
+
+@app.post('/api/upload/complete')
+async def upload_complete(request: Request):
+    """Finalize a resumable upload and start processing"""
+    try:
+        try:
+            data = orjson.loads(await request.body())
+        except ValueError:
+            data = {}
+        video_id = data.get('video_id', '')
+
+        upload = load_upload(video_id)
+
+        if upload is None:
+            return ORJSONResponse({
+                'success': False,
+                'error': 'Unknown upload'
+            }, status_code=404)
+
+        expected_chunks = -(-upload['file_size'] // upload['chunk_size'])
+        missing = sorted(set(range(expected_chunks)) - upload['received'])
+        if missing:
+            return ORJSONResponse({
+                'success': False,
+                'error': 'Upload incomplete',
+                'missing_chunks': missing
+            }, status_code=409)
+
+        assembled_size = os.path.getsize(upload['part_path'])
+        if assembled_size != upload['file_size']:
+            return ORJSONResponse({
+                'success': False,
+                'error': f"Assembled size {assembled_size} does not match declared file_size {upload['file_size']}"
+            }, status_code=409)
+
+        await run_in_threadpool(fsync_file, upload['part_path'])
+
+        filename = f"{video_id}.{upload['extension']}"
+        filepath = os.path.join(UPLOAD_FOLDER, filename)
+        os.replace(upload['part_path'], filepath)
+        discard_upload_state(upload)
+        file_size = os.path.getsize(filepath)
+
+        logger.info("Video uploaded (chunked): %s -> %s (%d bytes)", upload['original_filename'], filename, file_size)
+
+        try:
+            response = await start_video_processing(video_id, filename, data.get('fps', 10))
 
-            # Send to frame reader service
-            response = proxy_request(
-                'frame_reader',
-                '/start',
-                method='POST',
-                json=video_source
-            )
-            
             if response.status_code == 200:
-                result = response.json()
-                return jsonify({
+                result = orjson.loads(response.content)
+                return {
                     'success': True,
                     'message': 'Video uploaded and processing started',
                     'data': {
-                        'video_id': file_id,
-                        'original_filename': original_filename,
+                        'video_id': video_id,
+                        'original_filename': upload['original_filename'],
                         'file_size': file_size,
                         'processing_status': result.get('status', 'started')
                     }
-                })
+                }
             else:
                 # Clean up uploaded file if processing failed
-                if os.path.exists(filepath):
-                    os.remove(filepath)
-                
-                return jsonify({
+                remove_file(filepath)
+
+                return ORJSONResponse({
                     'success': False,
                     'error': 'Failed to start video processing',
                     'details': response.text
-                }), 500
-        
+                }, status_code=500)
+
         except Exception as e:
             # Clean up uploaded file if processing failed
-            if os.path.exists(filepath):
-                os.remove(filepath)
-            
-            logger.error(f"Error starting video processing: {e}")
-            return jsonify({
+            remove_file(filepath)
+
+            logger.error("Error starting video processing: %s", e)
+            return ORJSONResponse({
                 'success': False,
                 'error': 'Failed to start video processing',
                 'details': str(e)
-            }), 500
-    
+            }, status_code=500)
+
     except Exception as e:
-        logger.error(f"Error uploading video: {e}")
-        return jsonify({
+        logger.error("Error completing upload: %s", e)
+        return ORJSONResponse({
             'success': False,
             'error': 'Internal server error',
             'details': str(e)
-        }), 500
+        }, status_code=500)
 
-@app.route('/api/videos/<video_id>/status', methods=['GET'])
-def get_video_status(video_id):
+@app.get('/api/videos/{video_id}/status')
+async def get_video_status(video_id: str):
     """Get processing status of a video"""
     try:
         # Query frame reader for general status (frame reader doesn't have per-video status)
-        response = proxy_request('frame_reader', '/status')
+        response = await proxy_request('frame_reader', '/status')
 
         if response.status_code == 200:
-            status_data = response.json()
+            status_data = orjson.loads(response.content)
             # Add video_id to the response
             status_data['video_id'] = video_id
-            return jsonify({
+            return {
                 'success': True,
                 'data': status_data
-            })
+            }
         else:
-            return jsonify({
+            return ORJSONResponse({
                 'success': False,
                 'error': 'Unable to get processing status'
-            }), 500
+            }, status_code=500)
 
     except Exception as e:
-        logger.error(f"Error getting video status: {e}")
-        return jsonify({
+        logger.error("Error getting video status: %s", e)
+        return ORJSONResponse({
             'success': False,
             'error': str(e)
-        }), 500
+        }, status_code=500)
 
-@app.route('/api/videos/<video_id>/results', methods=['GET'])
-def get_video_results(video_id):
+@app.get('/api/videos/{video_id}/results')
+async def get_video_results(video_id: str):
     """Get processing results for a video"""
     try:
+        cached = _results_cache.get(video_id)
+        if cached is not None:
+            status_code, body, content_type = cached
+            return Response(
+                content=body,
+                status_code=status_code,
+                media_type=content_type,
+                headers={'Cache-Control': RESULTS_CACHE_CONTROL}
+            )
+
         # Query database service for results
-        response = proxy_request('database', f'/violations/video/{video_id}')
-        
+        response = await proxy_request('database', f'/violations/video/{video_id}')
+
         if response.status_code == 200:
-            return jsonify(response.json())
+            content_type = response.headers.get('content-type', 'application/json')
+            _results_cache[video_id] = (response.status_code, response.content, content_type)
+            result = passthrough_response(response)
+            result.headers['Cache-Control'] = RESULTS_CACHE_CONTROL
+            return result
         else:
-            return jsonify({
+            return ORJSONResponse({
                 'success': False,
                 'error': 'No results found for this video'
-            }), 404
-    
+            }, status_code=404)
+
     except Exception as e:
-        logger.error(f"Error getting video results: {e}")
-        return jsonify({
+        logger.error("Error getting video results: %s", e)
+        return ORJSONResponse({
             'success': False,
             'error': str(e)
-        }), 500
+        }, status_code=500)
 
 # Proxy endpoints for other services
-@app.route('/api/rois', methods=['GET', 'POST'])
-@app.route('/api/rois/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE'])
-def proxy_roi_manager(path=''):
+@app.api_route('/api/rois', methods=['GET', 'POST'])
+@app.api_route('/api/rois/{path:path}', methods=['GET', 'POST', 'PUT', 'DELETE'])
+async def proxy_roi_manager(request: Request, path: str = ''):
     """Proxy requests to ROI Manager service"""
     try:
         endpoint = f"/rois/{path}" if path else "/rois"
-        response = proxy_request(
+        is_json = request.headers.get('content-type', '').startswith('application/json')
+        response = await proxy_request(
             'roi_manager',
             endpoint,
             method=request.method,
-            json=request.get_json() if request.is_json else None,
-            params=request.args
+            # Forward the JSON body verbatim rather than parsing and re-encoding it
+            content=await request.body() if is_json else None,
+            headers={'Content-Type': 'application/json'} if is_json else None,
+            params=request.query_params
         )
-        
-        return jsonify(response.json()), response.status_code
-    
+
+        return passthrough_response(response)
+
     except Exception as e:
-        logger.error(f"Error proxying to ROI manager: {e}")
-        return jsonify({
+        logger.error("Error proxying to ROI manager: %s", e)
+        return ORJSONResponse({
             'success': False,
             'error': str(e)
-        }), 500
+        }, status_code=500)
 
-@app.route('/api/violations', methods=['GET'])
-@app.route('/api/violations/<path:path>', methods=['GET'])
-def proxy_database_violations(path=''):
+@app.get('/api/violations')
+@app.get('/api/violations/{path:path}')
+async def proxy_database_violations(request: Request, path: str = ''):
     """Proxy violation requests to Database service"""
     try:
         endpoint = f"/violations/{path}" if path else "/violations"
-        response = proxy_request(
+        response = await proxy_request(
             'database',
             endpoint,
             method=request.method,
-            params=request.args
+            params=request.query_params
         )
-        
-        return jsonify(response.json()), response.status_code
-    
+
+        return passthrough_response(response)
+
     except Exception as e:
-        logger.error(f"Error proxying to database: {e}")
-        return jsonify({
+        logger.error("Error proxying to database: %s", e)
+        return ORJSONResponse({
             'success': False,
             'error': str(e)
-        }), 500
+        }, status_code=500)
 
-@app.route('/api/system/status', methods=['GET'])
-def system_status():
+@app.get('/api/system/status')
+async def system_status(request: Request):
     """Get overall system status"""
     try:
+        cached = _get_cached_health(request, 'system_status')
+        if cached is not None:
+            return _health_response(cached)
+
         status = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': current_timestamp(),
             'services': {}
         }
-        
-        for service_name, service_url in SERVICES.items():
-            try:
-                response = requests.get(f"{service_url}/health", timeout=5)
-                status['services'][service_name] = {
-                    'status': 'healthy' if response.status_code == 200 else 'unhealthy',
-                    'url': service_url,
-                    'response_time': response.elapsed.total_seconds()
-                }
-            except Exception as e:
-                status['services'][service_name] = {
-                    'status': 'unhealthy',
-                    'url': service_url,
-                    'error': str(e)
-                }
-        
+
+        for service_name, service_health in (await probe_all_services()).items():
+            status['services'][service_name] = {
+                'url': SERVICES[service_name],
+                **service_health
+            }
+
         # Calculate overall health
         healthy_services = sum(1 for s in status['services'].values() if s['status'] == 'healthy')
         total_services = len(status['services'])
-        
+
         status['overall'] = {
             'status': 'healthy' if healthy_services == total_services else 'degraded',
             'healthy_services': healthy_services,
             'total_services': total_services,
             'health_percentage': (healthy_services / total_services) * 100
         }
-        
-        return jsonify(status)
-    
+
+        _set_cached_health('system_status', status)
+        return _health_response(status)
+
     except Exception as e:
-        logger.error(f"Error getting system status: {e}")
-        return jsonify({
+        logger.error("Error getting system status: %s", e)
+        return ORJSONResponse({
             'success': False,
             'error': str(e)
-        }), 500
+        }, status_code=500)
 
 if __name__ == '__main__':
-    logger.info(f"🚀 Starting API Gateway Service on port {PORT}")
-    logger.info(f"📁 Upload folder: {UPLOAD_FOLDER}")
-    logger.info(f"🔗 Configured services: {list(SERVICES.keys())}")
-    
+    logger.info("🚀 Starting API Gateway Service on port %s", PORT)
+    logger.info("📁 Upload folder: %s", UPLOAD_FOLDER)
+    logger.info("🔗 Configured services: %s", list(SERVICES.keys()))
+
     try:
-        app.run(host='0.0.0.0', port=PORT, debug=False)
+        # Single-process fallback for local/Windows runs; production uses gunicorn (see gunicorn.conf.py)
+        # loop/http "auto" pick uvloop and httptools when installed (uvicorn[standard])
+        uvicorn.run(
+            "main:app",
+            host='0.0.0.0',
+            port=PORT,
+            loop='auto',
+            http='auto'
+        )
     except Exception as e:
-        logger.error(f"Failed to start API Gateway Service: {e}")
+        logger.error("Failed to start API Gateway Service: %s", e)
         raise
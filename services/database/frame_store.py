@@ -0,0 +1,86 @@
+"""
+Frame Object Storage for the Database Service
+Offloads violation frame images to S3/MinIO so rows only carry the object key
+"""
+
+import os
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from typing import Optional
+
+try:
+    import aioboto3
+    AIOBOTO3_AVAILABLE = True
+except ImportError:
+    AIOBOTO3_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+FRAME_STORE_BUCKET = os.getenv("FRAME_STORE_BUCKET", "")
+FRAME_STORE_ENDPOINT = os.getenv("FRAME_STORE_ENDPOINT") or None  # e.g. http://minio:9000
+FRAME_STORE_REGION = os.getenv("FRAME_STORE_REGION", "us-east-1")
+FRAME_STORE_URL_TTL = int(os.getenv("FRAME_STORE_URL_TTL", "3600"))  # presigned URL lifetime (s)
+
+class FrameStore:
+    """Thin async S3 client; disabled (frames stay inline) when no bucket is configured"""
+
+    def __init__(self, bucket: str = FRAME_STORE_BUCKET, endpoint_url: Optional[str] = FRAME_STORE_ENDPOINT):
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self._stack: Optional[AsyncExitStack] = None
+        self._s3 = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._s3 is not None
+
+    async def start(self):
+        if not self.bucket:
+            logger.info("📁 FRAME_STORE_BUCKET not set, violation frames stay in PostgreSQL")
+            return
+        if not AIOBOTO3_AVAILABLE:
+            logger.warning("⚠️ aioboto3 not installed, violation frames stay in PostgreSQL")
+            return
+        # One client for the process lifetime so uploads reuse its connection pool
+        self._stack = AsyncExitStack()
+        self._s3 = await self._stack.enter_async_context(
+            aioboto3.Session().client(
+                "s3",
+                endpoint_url=self.endpoint_url,
+                region_name=FRAME_STORE_REGION,
+                aws_access_key_id=os.getenv("FRAME_STORE_ACCESS_KEY"),
+                aws_secret_access_key=os.getenv("FRAME_STORE_SECRET_KEY"),
+            )
+        )
+        logger.info(f"✅ Frame store ready: s3://{self.bucket}")
+
+    async def close(self):
+        if self._stack:
+            await self._stack.aclose()
+        self._stack = None
+        self._s3 = None
+
+    @staticmethod
+    def frame_key(session_id: str, frame_number: int) -> str:
+        return f"{session_id}/{frame_number}.jpg"
+
+    async def put(self, key: str, data: bytes) -> bool:
+        """Upload one frame; False if it failed so the caller can keep it inline"""
+        try:
+            await self._s3.put_object(Bucket=self.bucket, Key=key, Body=data, ContentType="image/jpeg")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to upload frame {key}: {e}")
+            return False
+
+    async def put_many(self, items):
+        """Upload (key, data) pairs concurrently, returning a success flag per item"""
+        return await asyncio.gather(*(self.put(key, data) for key, data in items))
+
+    async def presigned_url(self, key: str) -> str:
+        return await self._s3.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=FRAME_STORE_URL_TTL,
+        )
@@ -4,71 +4,251 @@ Provides database operations and API endpoints for data persistence
 """
 
 import os
-import json
+import base64
 import logging
 from datetime import datetime
-from typing import List, Optional, Dict, Any
-from contextlib import asynccontextmanager
+from typing import List, Optional, Dict, Any, Tuple
+from urllib.parse import quote, urlsplit
+from contextlib import AsyncExitStack, asynccontextmanager
 
 import asyncpg
+import orjson
 import asyncio
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import ORJSONResponse, RedirectResponse, StreamingResponse
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field, TypeAdapter, ValidationError, field_validator
+from starlette.background import BackgroundTask
 import uvicorn
 
+from frame_store import FrameStore
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Database configuration with connection retry logic
-# Try multiple credential combinations for existing containers
-CREDENTIAL_OPTIONS = [
-    {
-        "host": os.getenv("DB_HOST", "localhost").strip(),
-        "port": int(os.getenv("DB_PORT", "5432")),
-        "database": os.getenv("DB_NAME", "pizza_violations").strip(),
-        "user": os.getenv("DB_USER", "pizza_admin").strip(),
-        "password": os.getenv("DB_PASSWORD", "secure_pizza_2024").strip(),
-    },
-    {
-        "host": os.getenv("DB_HOST", "localhost").strip(),
-        "port": int(os.getenv("DB_PORT", "5432")),
-        "database": "pizza_store_db",
-        "user": "pizza_user",
-        "password": "pizza_password",
-    },
-    {
-        "host": os.getenv("DB_HOST", "localhost").strip(),
-        "port": int(os.getenv("DB_PORT", "5432")),
-        "database": "postgres",
-        "user": "postgres",
-        "password": "postgres",
-    },
-    {
-        "host": os.getenv("DB_HOST", "localhost").strip(),
-        "port": int(os.getenv("DB_PORT", "5432")),
-        "database": "postgres",
-        "user": "postgres",
-        "password": "",
-    },
-]
+# Database configuration: one DSN, tried once
+# DATABASE_URL wins; otherwise it is assembled from the DB_* variables used by docker-compose
+def _build_database_url() -> str:
+    url = os.getenv("DATABASE_URL", "").strip()
+    if url:
+        return url
+    user = quote(os.getenv("DB_USER", "pizza_admin").strip(), safe="")
+    password = quote(os.getenv("DB_PASSWORD", "secure_pizza_2024").strip(), safe="")
+    host = os.getenv("DB_HOST", "localhost").strip()
+    port = int(os.getenv("DB_PORT", "5432"))
+    database = os.getenv("DB_NAME", "pizza_violations").strip()
+    return f"postgresql://{user}:{password}@{host}:{port}/{database}"
+
+DATABASE_URL = _build_database_url()
+DB_CONNECT_TIMEOUT = float(os.getenv("DB_CONNECT_TIMEOUT", "2.0"))
+
+# Pool sizing is per worker process: keep DB_POOL_MAX * workers <= max_connections - reserved
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10.0"))  # background writers' wait for a free connection
+DB_ACQUIRE_TIMEOUT = float(os.getenv("DB_ACQUIRE_TIMEOUT", "1.0"))  # request handlers' wait before answering 503
+# Bulkhead: cap requests holding or waiting for a connection so bursts fail fast instead of queueing
+DB_MAX_PENDING = int(os.getenv("DB_MAX_PENDING", str(DB_POOL_MAX * 2)))
+DB_POOL_RECYCLE = float(os.getenv("DB_POOL_RECYCLE", "300"))  # close connections idle this long
+# Cap and age out asyncpg's per-connection statement cache so stale generic plans get replanned
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "50"))
+DB_STATEMENT_LIFETIME = float(os.getenv("DB_STATEMENT_LIFETIME", "300"))
+
+# Short OLTP queries never recoup JIT compile time; skip it on every session
+DB_SERVER_SETTINGS = {"jit": "off", "application_name": "pizza_db_svc"}
+
+def _redacted_dsn(dsn: str) -> str:
+    """DSN without the password, for logging"""
+    parts = urlsplit(dsn)
+    netloc = parts.hostname or ""
+    if parts.port:
+        netloc = f"{netloc}:{parts.port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+    return parts._replace(netloc=netloc).geturl()
 
-# Default to first option for backward compatibility
-DATABASE_CONFIG = CREDENTIAL_OPTIONS[0]
+# Global connection pool
+db_pool = None
 
-# Alternative hosts to try if localhost fails
-ALTERNATIVE_HOSTS = [
-    "127.0.0.1",
-    "host.docker.internal",
-    "172.17.0.1",  # Common Docker bridge IP
+# Fixed SQL for the hot paths, prepared once per pooled connection
+UPDATE_SESSION_SQL = """
+    UPDATE sessions
+    SET end_time = COALESCE($1, end_time),
+        total_violations = COALESCE($2, total_violations),
+        total_frames = COALESCE($3, total_frames),
+        status = COALESCE($4, status),
+        metadata = COALESCE($5::jsonb, metadata),
+        updated_at = NOW()
+    WHERE id = $6
+    RETURNING *
+"""
+
+# Correlated counts keyed on s.id become index(-only) scans on each session_id index
+# (see migrations/001_session_id_indexes.sql) instead of three hash aggregates
+SESSION_STATS_SQL = """
+    SELECT 
+        s.*,
+        (SELECT COUNT(*) FROM violations v WHERE v.session_id = s.id) as violation_count,
+        (SELECT COUNT(*) FROM detections d WHERE d.session_id = s.id) as detection_count,
+        (SELECT COUNT(*) FROM roi_zones z WHERE z.session_id = s.id AND z.is_active) as zone_count
+    FROM sessions s
+    WHERE s.id = $1
+"""
+
+# Row-by-row fallback when a batch COPY fails: auto-creates the session and ROI zone
+# if missing and inserts the violation in one round trip
+CREATE_VIOLATION_FAST_SQL = """
+    WITH s AS (
+        INSERT INTO sessions (id, video_path, video_filename, status, metadata)
+        VALUES ($1, $2, $3, 'active', $4::jsonb)
+        ON CONFLICT (id) DO NOTHING
+    ), existing_zone AS (
+        SELECT id FROM roi_zones WHERE session_id = $1 AND name = $6::text LIMIT 1
+    ), z AS (
+        INSERT INTO roi_zones (id, session_id, name, zone_type, shape, points, requires_scooper)
+        SELECT $5, $1, $6::text, 'ingredient_area', 'rectangle', $7::jsonb, true
+        WHERE $6::text IS NOT NULL AND NOT EXISTS (SELECT 1 FROM existing_zone)
+        ON CONFLICT (id) DO NOTHING
+        RETURNING id
+    )
+    INSERT INTO violations (
+        session_id, worker_id, roi_zone_id, frame_number, frame_path,
+        frame_bytes, violation_type, confidence, severity, description,
+        bounding_boxes, hand_position, scooper_present, scooper_distance,
+        movement_pattern, frame_url
+    ) VALUES (
+        $1, $8,
+        CASE WHEN $6::text IS NULL THEN NULL
+             ELSE COALESCE((SELECT id FROM existing_zone), (SELECT id FROM z), $5) END,
+        $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19, $20, $21
+    )
+"""
+
+# Fire-and-forget inserts skip RETURNING so Postgres doesn't ship the row back
+CREATE_DETECTION_FAST_SQL = """
+    INSERT INTO detections (
+        session_id, frame_number, object_class, confidence,
+        bbox_x1, bbox_y1, bbox_x2, bbox_y2, metadata
+    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+"""
+
+AUTO_SESSION_METADATA = {"auto_created": True, "created_for": "violation_detection"}
+DEFAULT_ROI_POINTS = [{"x": 400, "y": 300}, {"x": 600, "y": 300}, {"x": 600, "y": 500}, {"x": 400, "y": 500}]
+
+# Constant JSONB payloads are encoded once rather than on every insert (bytes pass
+# straight through the JSONB codec below)
+AUTO_SESSION_METADATA_JSON = orjson.dumps(AUTO_SESSION_METADATA)
+DEFAULT_ROI_POINTS_JSON = orjson.dumps(DEFAULT_ROI_POINTS)
+
+HOT_STATEMENTS = {
+    "get_session": "SELECT * FROM sessions WHERE id = $1",
+    "update_session": UPDATE_SESSION_SQL,
+    "get_roi_zones": "SELECT * FROM roi_zones WHERE session_id = $1 AND is_active = true",
+}
+
+# Selectivity of these varies a lot per session, so they stay out of HOT_STATEMENTS and go
+# through asyncpg's capped, expiring statement cache instead of living for the whole
+# connection (where Postgres would settle on a generic plan after five executions)
+GET_VIOLATIONS_SQL = """
+    SELECT * FROM violations 
+    WHERE session_id = $1 
+    ORDER BY timestamp DESC 
+    LIMIT $2
+"""
+
+def json_default(value):
+    """orjson fallback for column types it can't encode natively"""
+    if isinstance(value, bytes):
+        # BYTEA frames go back out as base64, the only way to carry them in JSON
+        return base64.b64encode(value).decode()
+    return str(value)
+
+class PreparedConnection(asyncpg.Connection):
+    """Pool connection that carries prepared statements for HOT_STATEMENTS"""
+    __slots__ = ('_hot_stmts',)
+
+# JSONB binary wire format is a version byte followed by the JSON text, so Postgres
+# skips its text input parsing; values are plain Python objects on both sides
+JSONB_VERSION = b"\x01"
+
+def encode_jsonb(value) -> bytes:
+    if isinstance(value, bytes):
+        return JSONB_VERSION + value
+    return JSONB_VERSION + orjson.dumps(value)
+
+def decode_jsonb(data: bytes):
+    return orjson.loads(data[1:])
+
+async def init_connection(conn: PreparedConnection):
+    """Pool init hook: register the JSONB codec, then prepare hot statements so calls skip Parse/Describe"""
+    # Must precede prepare() so the statements pick up the binary codec
+    await conn.set_type_codec(
+        "jsonb", encoder=encode_jsonb, decoder=decode_jsonb,
+        schema="pg_catalog", format="binary"
+    )
+    conn._hot_stmts = {}
+    for name, sql in HOT_STATEMENTS.items():
+        try:
+            conn._hot_stmts[name] = await conn.prepare(sql)
+        except asyncpg.PostgresError as e:
+            # e.g. schema not created yet; fall back to plain queries for this one
+            logger.warning(f"⚠️ Could not prepare statement '{name}': {e}")
+
+async def fetch_hot(conn, name: str, *args):
+    stmt = conn._hot_stmts.get(name)
+    if stmt is not None:
+        return await stmt.fetch(*args)
+    return await conn.fetch(HOT_STATEMENTS[name], *args)
+
+async def fetchrow_hot(conn, name: str, *args):
+    stmt = conn._hot_stmts.get(name)
+    if stmt is not None:
+        return await stmt.fetchrow(*args)
+    return await conn.fetchrow(HOT_STATEMENTS[name], *args)
+
+# Write-behind batching for high-volume inserts
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "1000"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "10000"))
+
+DETECTION_COLUMNS = [
+    "session_id", "frame_number", "object_class", "confidence",
+    "bbox_x1", "bbox_y1", "bbox_x2", "bbox_y2", "metadata"
 ]
 
-# Global connection pool
-db_pool = None
+VIOLATION_COLUMNS = [
+    "session_id", "worker_id", "roi_zone_id", "frame_number", "frame_path",
+    "frame_bytes", "violation_type", "confidence", "severity", "description",
+    "bounding_boxes", "hand_position", "scooper_present", "scooper_distance",
+    "movement_pattern", "frame_url"
+]
+
+FRAME_ANALYSIS_COLUMNS = [
+    "session_id", "frame_number", "total_detections", "hands_count", "persons_count",
+    "scoopers_count", "pizzas_count", "violations_count", "processing_time_ms",
+    "frame_size_bytes", "analysis_metadata"
+]
+FRAME_ANALYSIS_FLUSH_INTERVAL = float(os.getenv("FRAME_ANALYSIS_FLUSH_INTERVAL", "1.0"))
+
+# Frame analysis is COPY'd into an UNLOGGED staging table (no WAL) and moved to the
+# durable table in one statement; DELETE ... RETURNING instead of TRUNCATE so concurrent
+# writers never wait on (or deadlock over) an ACCESS EXCLUSIVE lock
+MOVE_FRAME_ANALYSIS_SQL = f"""
+    WITH moved AS (
+        DELETE FROM frame_analysis_staging RETURNING {", ".join(FRAME_ANALYSIS_COLUMNS)}
+    )
+    INSERT INTO frame_analysis ({", ".join(FRAME_ANALYSIS_COLUMNS)})
+    SELECT {", ".join(FRAME_ANALYSIS_COLUMNS)} FROM moved
+"""
 
 # Pydantic Models
+# Write payloads are immutable once validated and tolerate extra fields from newer clients
+INGEST_MODEL_CONFIG = ConfigDict(extra="ignore", frozen=True)
+
 class SessionCreate(BaseModel):
+    model_config = INGEST_MODEL_CONFIG
+
     id: str
     video_path: str
     video_filename: str
@@ -98,12 +278,16 @@ class WorkerCreate(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
 
 class ViolationCreate(BaseModel):
+    model_config = INGEST_MODEL_CONFIG
+
     session_id: str
     worker_id: Optional[str] = None
     roi_zone_id: Optional[str] = None
     frame_number: int
     frame_path: Optional[str] = None
-    frame_base64: Optional[str] = None
+    # Stored as BYTEA; legacy clients still send base64 under "frame_base64"
+    frame_bytes: Optional[bytes] = Field(None, validation_alias=AliasChoices("frame_bytes", "frame_base64"))
+    frame_url: Optional[str] = None  # object-store key once the frame is offloaded
     violation_type: str
     confidence: float = Field(..., ge=0, le=1)
     severity: str = "medium"
@@ -114,7 +298,19 @@ class ViolationCreate(BaseModel):
     scooper_distance: Optional[float] = None
     movement_pattern: Optional[str] = None
 
+    @field_validator("frame_bytes", mode="before")
+    @classmethod
+    def decode_frame(cls, value):
+        """JSON can't carry raw bytes: decode the base64 frame once at the edge"""
+        if isinstance(value, str):
+            if value.startswith("data:"):
+                value = value.split(",", 1)[1]
+            return base64.b64decode(value)
+        return value
+
 class DetectionCreate(BaseModel):
+    model_config = INGEST_MODEL_CONFIG
+
     session_id: str
     frame_number: int
     object_class: str
@@ -126,6 +322,8 @@ class DetectionCreate(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
 
 class FrameAnalysisCreate(BaseModel):
+    model_config = INGEST_MODEL_CONFIG
+
     session_id: str
     frame_number: int
     total_detections: int = 0
@@ -138,44 +336,34 @@ class FrameAnalysisCreate(BaseModel):
     frame_size_bytes: Optional[int] = None
     analysis_metadata: Optional[Dict[str, Any]] = None
 
-# Database connection management with retry logic
+# Validates a whole JSON array in one pydantic-core pass
+DetectionBatch = TypeAdapter(List[DetectionCreate])
+
+# Database connection management
 async def get_db_pool():
     global db_pool
     if db_pool is None:
-        # Try different credential combinations
-        for cred_idx, config in enumerate(CREDENTIAL_OPTIONS):
-            logger.info(f"🔄 Trying credential set {cred_idx + 1}: {config['database']}@{config['user']}")
-
-            # Try different hosts for each credential set
-            for attempt, host in enumerate([config["host"]] + ALTERNATIVE_HOSTS):
-                test_config = config.copy()
-                test_config["host"] = host
-                logger.info(f"🔄 Attempting to connect to PostgreSQL at {host}:{test_config['port']} (attempt {attempt + 1})")
-
-                try:
-                    db_pool = await asyncpg.create_pool(
-                        **test_config,
-                        min_size=5,
-                        max_size=20,
-                        command_timeout=60
-                    )
-                    logger.info(f"✅ Database connection pool created successfully!")
-                    logger.info(f"✅ Connected to: {test_config['database']} as {test_config['user']} at {host}:{test_config['port']}")
-                    # Update global config with working credentials
-                    global DATABASE_CONFIG
-                    DATABASE_CONFIG = test_config
-                    return db_pool
-
-                except Exception as e:
-                    logger.warning(f"⚠️ Failed to connect to {host}:{test_config['port']}: {e}")
-                    continue
-
-        # If we get here, all combinations failed
-        logger.error("❌ Failed to connect to PostgreSQL after trying all credential combinations")
-        logger.error("💡 Make sure PostgreSQL container is running and accessible")
-        logger.error("💡 Try: docker ps | findstr postgres")
-        logger.error("💡 Try: docker-compose up -d postgres")
-        raise Exception("Could not connect to PostgreSQL with any credential combination")
+        logger.info(f"🔄 Connecting to PostgreSQL at {_redacted_dsn(DATABASE_URL)}")
+        try:
+            db_pool = await asyncpg.create_pool(
+                dsn=DATABASE_URL,
+                timeout=DB_CONNECT_TIMEOUT,
+                min_size=DB_POOL_MIN,
+                max_size=DB_POOL_MAX,
+                max_inactive_connection_lifetime=DB_POOL_RECYCLE,
+                command_timeout=60,
+                statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+                max_cached_statement_lifetime=DB_STATEMENT_LIFETIME,
+                server_settings=DB_SERVER_SETTINGS,
+                connection_class=PreparedConnection,
+                init=init_connection
+            )
+        except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as e:
+            logger.error(f"❌ Failed to connect to PostgreSQL: {e}")
+            logger.error("💡 Check DATABASE_URL / DB_* settings, or run probe_credentials.py")
+            logger.error("💡 Try: docker-compose up -d postgres")
+            raise
+        logger.info("✅ Database connection pool created successfully!")
 
     return db_pool
 
@@ -185,16 +373,46 @@ async def get_db_connection():
         yield connection
 
 # Database operations
+class DatabaseBusyError(Exception):
+    """No connection could be acquired in time; surfaced to clients as 503"""
+
 class DatabaseService:
     def __init__(self):
         self.pool = None
+        self.bulkhead: Optional[asyncio.Semaphore] = None
     
     async def init_pool(self):
         self.pool = await get_db_pool()
+        # Created here so the semaphore binds to the serving event loop
+        self.bulkhead = asyncio.Semaphore(DB_MAX_PENDING)
+
+    @asynccontextmanager
+    async def acquire(self, timeout: float = DB_ACQUIRE_TIMEOUT):
+        """Acquire a pooled connection behind the bulkhead, raising DatabaseBusyError on timeout"""
+        if self.pool.get_idle_size() == 0 and self.pool.get_size() >= DB_POOL_MAX:
+            logger.warning(
+                f"⚠️ Connection pool exhausted (size={self.pool.get_size()}, "
+                f"idle={self.pool.get_idle_size()}, max={DB_POOL_MAX}); request will wait"
+            )
+        try:
+            await asyncio.wait_for(self.bulkhead.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise DatabaseBusyError(f"More than {DB_MAX_PENDING} database requests pending")
+        try:
+            try:
+                conn = await self.pool.acquire(timeout=timeout)
+            except asyncio.TimeoutError:
+                raise DatabaseBusyError(f"No database connection available within {timeout}s")
+            try:
+                yield conn
+            finally:
+                await self.pool.release(conn)
+        finally:
+            self.bulkhead.release()
     
     # Session operations
     async def create_session(self, session: SessionCreate) -> Dict[str, Any]:
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             query = """
                 INSERT INTO sessions (id, video_path, video_filename, fps, metadata)
                 VALUES ($1, $2, $3, $4, $5)
@@ -202,65 +420,37 @@ class DatabaseService:
             """
             result = await conn.fetchrow(
                 query, session.id, session.video_path, session.video_filename,
-                session.fps, json.dumps(session.metadata) if session.metadata else None
+                session.fps, session.metadata or None
             )
             return dict(result)
     
     async def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
-        async with self.pool.acquire() as conn:
-            query = "SELECT * FROM sessions WHERE id = $1"
-            result = await conn.fetchrow(query, session_id)
+        async with self.acquire() as conn:
+            result = await fetchrow_hot(conn, "get_session", session_id)
             return dict(result) if result else None
     
     async def update_session(self, session_id: str, update: SessionUpdate) -> Dict[str, Any]:
-        async with self.pool.acquire() as conn:
-            # Build dynamic update query
-            set_clauses = []
-            values = []
-            param_count = 1
-            
-            if update.end_time is not None:
-                set_clauses.append(f"end_time = ${param_count}")
-                values.append(update.end_time)
-                param_count += 1
-            
-            if update.total_violations is not None:
-                set_clauses.append(f"total_violations = ${param_count}")
-                values.append(update.total_violations)
-                param_count += 1
-            
-            if update.total_frames is not None:
-                set_clauses.append(f"total_frames = ${param_count}")
-                values.append(update.total_frames)
-                param_count += 1
-            
-            if update.status is not None:
-                set_clauses.append(f"status = ${param_count}")
-                values.append(update.status)
-                param_count += 1
-            
-            if update.metadata is not None:
-                set_clauses.append(f"metadata = ${param_count}")
-                values.append(json.dumps(update.metadata))
-                param_count += 1
-            
-            if not set_clauses:
-                raise ValueError("No fields to update")
-            
-            query = f"""
-                UPDATE sessions 
-                SET {', '.join(set_clauses)}, updated_at = NOW()
-                WHERE id = ${param_count}
-                RETURNING *
-            """
-            values.append(session_id)
-            
-            result = await conn.fetchrow(query, *values)
+        if all(
+            value is None for value in (
+                update.end_time, update.total_violations, update.total_frames,
+                update.status, update.metadata
+            )
+        ):
+            raise ValueError("No fields to update")
+
+        async with self.acquire() as conn:
+            # Omitted fields are passed as NULL and kept by COALESCE, so the SQL text never varies
+            result = await fetchrow_hot(
+                conn, "update_session",
+                update.end_time, update.total_violations, update.total_frames, update.status,
+                update.metadata,
+                session_id
+            )
             return dict(result) if result else None
     
     # ROI Zone operations
     async def create_roi_zone(self, zone: ROIZoneCreate) -> Dict[str, Any]:
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             query = """
                 INSERT INTO roi_zones (id, session_id, name, zone_type, shape, points, requires_scooper)
                 VALUES ($1, $2, $3, $4, $5, $6, $7)
@@ -268,188 +458,310 @@ class DatabaseService:
             """
             result = await conn.fetchrow(
                 query, zone.id, zone.session_id, zone.name, zone.zone_type,
-                zone.shape, json.dumps(zone.points), zone.requires_scooper
+                zone.shape, zone.points, zone.requires_scooper
             )
             return dict(result)
     
     async def get_roi_zones(self, session_id: str) -> List[Dict[str, Any]]:
-        async with self.pool.acquire() as conn:
-            query = "SELECT * FROM roi_zones WHERE session_id = $1 AND is_active = true"
-            results = await conn.fetch(query, session_id)
+        async with self.acquire() as conn:
+            results = await fetch_hot(conn, "get_roi_zones", session_id)
             return [dict(row) for row in results]
     
     # Violation operations
-    async def create_violation(self, violation: ViolationCreate) -> Dict[str, Any]:
-        async with self.pool.acquire() as conn:
-            # First, ensure the session exists
-            await self._ensure_session_exists(conn, violation.session_id)
+    @staticmethod
+    def _violation_args(violation: ViolationCreate, roi_zone_name: Optional[str] = None) -> tuple:
+        """Positional parameters for CREATE_VIOLATION_FAST_SQL"""
+        session_id = violation.session_id
+        roi_zone_name = roi_zone_name or violation.roi_zone_id or None
+        return (
+            session_id, f"/auto-created/{session_id}", f"auto_{session_id}.mp4",
+            AUTO_SESSION_METADATA_JSON,
+            f"{session_id}_{roi_zone_name}", roi_zone_name, DEFAULT_ROI_POINTS_JSON,
+            violation.worker_id, violation.frame_number, violation.frame_path, violation.frame_bytes,
+            violation.violation_type, violation.confidence, violation.severity,
+            violation.description, violation.bounding_boxes or None, violation.hand_position or None,
+            violation.scooper_present, violation.scooper_distance, violation.movement_pattern,
+            violation.frame_url
+        )
+
+    async def _offload_frames(self, violations: List[ViolationCreate]) -> List[ViolationCreate]:
+        """Move frame bytes to the object store so rows only carry the key"""
+        pending = [v for v in violations if v.frame_bytes and not v.frame_url]
+        if not frame_store.enabled or not pending:
+            return violations
+        keys = {id(v): frame_store.frame_key(v.session_id, v.frame_number) for v in pending}
+        uploaded = await frame_store.put_many((keys[id(v)], v.frame_bytes) for v in pending)
+        # Frames whose upload failed stay inline rather than being lost
+        offloaded = {id(v) for v, ok in zip(pending, uploaded) if ok}
+        return [
+            v.model_copy(update={"frame_url": keys[id(v)], "frame_bytes": None}) if id(v) in offloaded else v
+            for v in violations
+        ]
+
+    async def create_violation_fast(self, conn, violation: ViolationCreate):
+        """Insert a violation without sending the row back"""
+        await conn.execute(CREATE_VIOLATION_FAST_SQL, *self._violation_args(violation))
 
-            # Ensure ROI zone exists or set to NULL
-            roi_zone_id = await self._ensure_roi_zone_exists(conn, violation.session_id, violation.roi_zone_id)
+    async def get_violations(self, session_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        async with self.acquire() as conn:
+            results = await conn.fetch(GET_VIOLATIONS_SQL, session_id, limit)
+            return [dict(row) for row in results]
 
-            query = """
-                INSERT INTO violations (
-                    session_id, worker_id, roi_zone_id, frame_number, frame_path,
-                    frame_base64, violation_type, confidence, severity, description,
-                    bounding_boxes, hand_position, scooper_present, scooper_distance,
-                    movement_pattern
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15)
-                RETURNING *
-            """
-            result = await conn.fetchrow(
-                query, violation.session_id, violation.worker_id, roi_zone_id,
-                violation.frame_number, violation.frame_path, violation.frame_base64,
-                violation.violation_type, violation.confidence, violation.severity,
-                violation.description, json.dumps(violation.bounding_boxes) if violation.bounding_boxes else None,
-                json.dumps(violation.hand_position) if violation.hand_position else None,
-                violation.scooper_present, violation.scooper_distance, violation.movement_pattern
-            )
-            return dict(result)
+    async def stream_violations(self, stack: AsyncExitStack, session_id: str, limit: int = 100):
+        """Open the violations cursor and fetch its first row, then return a generator streaming the JSON array.
 
-    async def _ensure_session_exists(self, conn, session_id: str):
-        """Ensure a session exists, create it if it doesn't"""
+        Setup runs before the response starts so busy/DB errors still map to 503/500;
+        the connection and transaction are held on `stack` until the stream closes it.
+        """
         try:
-            # Check if session exists
-            check_query = "SELECT id FROM sessions WHERE id = $1"
-            existing = await conn.fetchrow(check_query, session_id)
-
-            if not existing:
-                # Create the session with correct schema
-                create_query = """
-                    INSERT INTO sessions (id, video_path, video_filename, status, metadata)
-                    VALUES ($1, $2, $3, $4, $5)
-                    ON CONFLICT (id) DO NOTHING
-                """
-                video_path = f"/auto-created/{session_id}"
-                video_filename = f"auto_{session_id}.mp4"
-                metadata = {"auto_created": True, "created_for": "violation_detection"}
-
-                await conn.execute(create_query, session_id, video_path, video_filename, "active", json.dumps(metadata))
-                logger.info(f"✅ Auto-created session: {session_id}")
-        except Exception as e:
-            logger.warning(f"⚠️ Could not ensure session exists: {e}")
-
-    async def _ensure_roi_zone_exists(self, conn, session_id: str, roi_zone_name: str) -> str:
-        """Ensure an ROI zone exists, create it if it doesn't, or return None if invalid"""
-        if not roi_zone_name:
-            return None
-
+            conn = await stack.enter_async_context(self.acquire())
+            # Cursors only live inside a transaction
+            await stack.enter_async_context(conn.transaction(readonly=True))
+            rows = conn.cursor(GET_VIOLATIONS_SQL, session_id, limit).__aiter__()
+            try:
+                first = await rows.__anext__()
+            except StopAsyncIteration:
+                first = None
+            # Column names are fixed by the statement; look them up once, not per row
+            columns = list(first.keys()) if first is not None else []
+        except BaseException:
+            await stack.aclose()
+            raise
+        return self._violations_json(stack, columns, first, rows)
+
+    @staticmethod
+    async def _violations_json(stack: AsyncExitStack, columns: List[str], first, rows):
         try:
-            # Check if ROI zone exists
-            check_query = "SELECT id FROM roi_zones WHERE session_id = $1 AND name = $2"
-            existing = await conn.fetchrow(check_query, session_id, roi_zone_name)
-
-            if existing:
-                return existing['id']
-
-            # Create the ROI zone with default settings
-            roi_zone_id = f"{session_id}_{roi_zone_name}"
-            create_query = """
-                INSERT INTO roi_zones (id, session_id, name, zone_type, shape, points, requires_scooper)
-                VALUES ($1, $2, $3, $4, $5, $6, $7)
-                ON CONFLICT (id) DO NOTHING
-                RETURNING id
-            """
-
-            # Default ROI zone settings
-            zone_type = "ingredient_area"
-            shape = "rectangle"
-            default_points = [{"x": 400, "y": 300}, {"x": 600, "y": 300}, {"x": 600, "y": 500}, {"x": 400, "y": 500}]
-            requires_scooper = True
-
-            result = await conn.fetchrow(
-                create_query, roi_zone_id, session_id, roi_zone_name,
-                zone_type, shape, json.dumps(default_points), requires_scooper
-            )
-
-            if result:
-                logger.info(f"✅ Auto-created ROI zone: {roi_zone_name} for session {session_id}")
-                return result['id']
-            else:
-                # ROI zone already existed (conflict), fetch it
-                existing = await conn.fetchrow(check_query, session_id, roi_zone_name)
-                return existing['id'] if existing else None
-
-        except Exception as e:
-            logger.warning(f"⚠️ Could not ensure ROI zone exists: {e}")
-            return None
-
-    async def get_violations(self, session_id: str, limit: int = 100) -> List[Dict[str, Any]]:
-        async with self.pool.acquire() as conn:
-            query = """
-                SELECT * FROM violations 
-                WHERE session_id = $1 
-                ORDER BY timestamp DESC 
-                LIMIT $2
-            """
-            results = await conn.fetch(query, session_id, limit)
-            return [dict(row) for row in results]
+            if first is None:
+                yield b"[]"
+                return
+            yield b"[" + orjson.dumps(dict(zip(columns, first)), default=json_default)
+            async for row in rows:
+                yield b"," + orjson.dumps(dict(zip(columns, row)), default=json_default)
+            yield b"]"
+        finally:
+            await stack.aclose()
     
     # Detection operations
-    async def create_detection(self, detection: DetectionCreate) -> Dict[str, Any]:
-        async with self.pool.acquire() as conn:
-            # First, ensure the session exists
-            await self._ensure_session_exists(conn, detection.session_id)
-
-            query = """
-                INSERT INTO detections (
-                    session_id, frame_number, object_class, confidence,
-                    bbox_x1, bbox_y1, bbox_x2, bbox_y2, metadata
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-                RETURNING *
-            """
-            result = await conn.fetchrow(
-                query, detection.session_id, detection.frame_number, detection.object_class,
-                detection.confidence, detection.bbox_x1, detection.bbox_y1,
-                detection.bbox_x2, detection.bbox_y2,
-                json.dumps(detection.metadata) if detection.metadata else None
-            )
-            return dict(result)
+    @staticmethod
+    def _detection_args(detection: DetectionCreate) -> tuple:
+        """Positional parameters for CREATE_DETECTION_FAST_SQL / COPY"""
+        return (
+            detection.session_id, detection.frame_number, detection.object_class,
+            detection.confidence, detection.bbox_x1, detection.bbox_y1,
+            detection.bbox_x2, detection.bbox_y2,
+            detection.metadata or None
+        )
+
+    async def create_detection_fast(self, conn, detection: DetectionCreate):
+        """Insert a detection without sending the row back"""
+        await conn.execute(CREATE_DETECTION_FAST_SQL, *self._detection_args(detection))
     
+    # Bulk ingestion: one COPY per batch instead of one INSERT round-trip per row
+    async def create_detections_bulk(self, detections: List[DetectionCreate]) -> int:
+        async with self.acquire(timeout=DB_POOL_TIMEOUT) as conn:
+            await self._ensure_sessions_exist(conn, {d.session_id for d in detections})
+            records = [self._detection_args(d) for d in detections]
+            try:
+                await conn.copy_records_to_table("detections", records=records, columns=DETECTION_COLUMNS)
+                return len(records)
+            except asyncpg.PostgresError as e:
+                # One bad row fails the whole COPY; salvage the rest row by row
+                logger.warning(f"⚠️ COPY into detections failed, inserting individually: {e}")
+                return await self._insert_individually(conn, detections, self.create_detection_fast)
+
+    async def create_violations_bulk(self, violations: List[ViolationCreate]) -> int:
+        violations = await self._offload_frames(violations)
+        async with self.acquire(timeout=DB_POOL_TIMEOUT) as conn:
+            await self._ensure_sessions_exist(conn, {v.session_id for v in violations})
+
+            roi_zone_ids = await self._ensure_roi_zones_exist(conn, {(v.session_id, v.roi_zone_id) for v in violations})
+
+            records = [
+                (
+                    v.session_id, v.worker_id, roi_zone_ids.get((v.session_id, v.roi_zone_id)),
+                    v.frame_number, v.frame_path, v.frame_bytes,
+                    v.violation_type, v.confidence, v.severity, v.description,
+                    v.bounding_boxes or None, v.hand_position or None,
+                    v.scooper_present, v.scooper_distance, v.movement_pattern, v.frame_url
+                )
+                for v in violations
+            ]
+            try:
+                await conn.copy_records_to_table("violations", records=records, columns=VIOLATION_COLUMNS)
+                return len(records)
+            except asyncpg.PostgresError as e:
+                # One bad row fails the whole COPY; salvage the rest row by row
+                logger.warning(f"⚠️ COPY into violations failed, inserting individually: {e}")
+                return await self._insert_individually(conn, violations, self.create_violation_fast)
+
+    async def create_frame_analyses_bulk(self, analyses: List[FrameAnalysisCreate]) -> int:
+        async with self.acquire(timeout=DB_POOL_TIMEOUT) as conn:
+            await self._ensure_sessions_exist(conn, {a.session_id for a in analyses})
+            records = [
+                (
+                    a.session_id, a.frame_number, a.total_detections, a.hands_count,
+                    a.persons_count, a.scoopers_count, a.pizzas_count, a.violations_count,
+                    a.processing_time_ms, a.frame_size_bytes,
+                    a.analysis_metadata or None
+                )
+                for a in analyses
+            ]
+            async with conn.transaction():
+                await conn.copy_records_to_table(
+                    "frame_analysis_staging", records=records, columns=FRAME_ANALYSIS_COLUMNS
+                )
+                await conn.execute(MOVE_FRAME_ANALYSIS_SQL)
+            return len(records)
+
+    async def _insert_individually(self, conn, items: list, insert) -> int:
+        """Insert items one at a time with a fast (no RETURNING) insert, skipping failures"""
+        inserted = 0
+        for item in items:
+            try:
+                await insert(conn, item)
+                inserted += 1
+            except asyncpg.PostgresError as e:
+                logger.error(f"❌ Dropping record for session {item.session_id}: {e}")
+        return inserted
+
+    async def _ensure_sessions_exist(self, conn, session_ids):
+        """Auto-create any missing sessions for a batch in a single statement"""
+        if not session_ids:
+            return
+        query = """
+            INSERT INTO sessions (id, video_path, video_filename, status, metadata)
+            SELECT sid, '/auto-created/' || sid, 'auto_' || sid || '.mp4', 'active', $2::jsonb
+            FROM unnest($1::text[]) AS sid
+            ON CONFLICT (id) DO NOTHING
+        """
+        await conn.execute(query, list(session_ids), AUTO_SESSION_METADATA_JSON)
+
+    async def _ensure_roi_zones_exist(self, conn, keys) -> Dict[tuple, str]:
+        """Auto-create missing (session, ROI name) zones for a batch and map each key to its zone id"""
+        keys = [(session_id, name) for session_id, name in keys if name]
+        if not keys:
+            return {}
+        session_ids, names = (list(column) for column in zip(*keys))
+        try:
+            await conn.execute("""
+                INSERT INTO roi_zones (id, session_id, name, zone_type, shape, points, requires_scooper)
+                SELECT k.sid || '_' || k.name, k.sid, k.name, 'ingredient_area', 'rectangle', $3::jsonb, true
+                FROM unnest($1::text[], $2::text[]) AS k(sid, name)
+                WHERE NOT EXISTS (SELECT 1 FROM roi_zones z WHERE z.session_id = k.sid AND z.name = k.name)
+                ON CONFLICT (id) DO NOTHING
+            """, session_ids, names, DEFAULT_ROI_POINTS_JSON)
+            rows = await conn.fetch("""
+                SELECT DISTINCT ON (z.session_id, z.name) z.session_id, z.name, z.id
+                FROM roi_zones z
+                JOIN unnest($1::text[], $2::text[]) AS k(sid, name)
+                  ON z.session_id = k.sid AND z.name = k.name
+            """, session_ids, names)
+            return {(row['session_id'], row['name']): row['id'] for row in rows}
+        except asyncpg.PostgresError as e:
+            logger.warning(f"⚠️ Could not ensure ROI zones exist: {e}")
+            return {}
+
     # Statistics operations
     async def get_session_stats(self, session_id: str) -> Dict[str, Any]:
-        async with self.pool.acquire() as conn:
-            query = """
-                SELECT 
-                    s.*,
-                    COALESCE(v.violation_count, 0) as violation_count,
-                    COALESCE(d.detection_count, 0) as detection_count,
-                    COALESCE(z.zone_count, 0) as zone_count
-                FROM sessions s
-                LEFT JOIN (
-                    SELECT session_id, COUNT(*) as violation_count 
-                    FROM violations 
-                    WHERE session_id = $1 
-                    GROUP BY session_id
-                ) v ON s.id = v.session_id
-                LEFT JOIN (
-                    SELECT session_id, COUNT(*) as detection_count 
-                    FROM detections 
-                    WHERE session_id = $1 
-                    GROUP BY session_id
-                ) d ON s.id = d.session_id
-                LEFT JOIN (
-                    SELECT session_id, COUNT(*) as zone_count 
-                    FROM roi_zones 
-                    WHERE session_id = $1 AND is_active = true
-                    GROUP BY session_id
-                ) z ON s.id = z.session_id
-                WHERE s.id = $1
-            """
-            result = await conn.fetchrow(query, session_id)
+        async with self.acquire() as conn:
+            result = await conn.fetchrow(SESSION_STATS_SQL, session_id)
             return dict(result) if result else None
 
+_STOP = object()  # BatchWriter shutdown sentinel
+
+class BatchWriter:
+    """Queues records and flushes whatever has accumulated in one bulk write"""
+
+    def __init__(self, name: str, flush, batch_size: int = INGEST_BATCH_SIZE,
+                 queue_size: int = INGEST_QUEUE_SIZE, flush_interval: float = 0):
+        self.name = name
+        self.flush = flush
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.flush_interval = flush_interval
+        self.queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        # Created here so the queue binds to the serving event loop
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def put(self, item):
+        await self.queue.put(item)
+
+    def _drain(self, batch: list) -> Tuple[list, bool]:
+        """Top the batch up from the queue; True once the stop sentinel has been taken"""
+        while len(batch) < self.batch_size:
+            try:
+                item = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _flush(self, batch: list):
+        if not batch:
+            return
+        try:
+            count = await self.flush(batch)
+            logger.debug(f"💾 Flushed {count} {self.name}")
+        except Exception as e:
+            logger.error(f"❌ Failed to flush {len(batch)} {self.name}: {e}")
+
+    async def _run(self):
+        while True:
+            item = await self.queue.get()
+            if item is _STOP:
+                return
+            if self.flush_interval and self.queue.qsize() < self.batch_size - 1:
+                # Let a window's worth of records accumulate before the durable write
+                await asyncio.sleep(self.flush_interval)
+            batch, stopping = self._drain([item])
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def stop(self):
+        """Let the flusher finish its current batch, then write out anything still queued"""
+        if self._task:
+            # A sentinel rather than cancel(), so a batch mid-write (already answered 202) isn't dropped
+            await self.queue.put(_STOP)
+            await self._task
+            self._task = None
+        while self.queue is not None and not self.queue.empty():
+            batch, _ = self._drain([])
+            await self._flush(batch)
+
 # Initialize database service
 db_service = DatabaseService()
+frame_store = FrameStore()
+detection_writer = BatchWriter("detections", db_service.create_detections_bulk)
+violation_writer = BatchWriter("violations", db_service.create_violations_bulk)
+frame_analysis_writer = BatchWriter(
+    "frame analyses", db_service.create_frame_analyses_bulk,
+    flush_interval=FRAME_ANALYSIS_FLUSH_INTERVAL
+)
 
 # FastAPI app
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await db_service.init_pool()
+    await frame_store.start()
+    detection_writer.start()
+    violation_writer.start()
+    frame_analysis_writer.start()
     logger.info("🚀 Database service started")
     yield
     # Shutdown
+    await detection_writer.stop()
+    await violation_writer.stop()
+    await frame_analysis_writer.stop()
+    await frame_store.close()
     if db_service.pool:
         await db_service.pool.close()
     logger.info("🛑 Database service stopped")
@@ -458,6 +770,7 @@ app = FastAPI(
     title="Pizza Store Database Service",
     description="Database operations for violation detection system",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -470,11 +783,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(DatabaseBusyError)
+async def database_busy_handler(request: Request, exc: DatabaseBusyError):
+    logger.warning(f"⚠️ Shedding {request.method} {request.url.path}: {exc}")
+    return ORJSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
     try:
-        async with db_service.pool.acquire() as conn:
+        async with db_service.acquire() as conn:
             await conn.fetchval("SELECT 1")
         return {
             "status": "healthy",
@@ -493,6 +811,8 @@ async def create_session_endpoint(session: SessionCreate):
         result = await db_service.create_session(session)
         logger.info(f"✅ Created session: {session.id}")
         return result
+    except (HTTPException, DatabaseBusyError):
+        raise
     except Exception as e:
         logger.error(f"❌ Failed to create session: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -512,6 +832,8 @@ async def update_session_endpoint(session_id: str, update: SessionUpdate):
             raise HTTPException(status_code=404, detail="Session not found")
         logger.info(f"✅ Updated session: {session_id}")
         return result
+    except (HTTPException, DatabaseBusyError):
+        raise
     except Exception as e:
         logger.error(f"❌ Failed to update session: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -530,6 +852,8 @@ async def create_roi_zone_endpoint(zone: ROIZoneCreate):
         result = await db_service.create_roi_zone(zone)
         logger.info(f"✅ Created ROI zone: {zone.id}")
         return result
+    except (HTTPException, DatabaseBusyError):
+        raise
     except Exception as e:
         logger.error(f"❌ Failed to create ROI zone: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -539,37 +863,62 @@ async def get_roi_zones_endpoint(session_id: str):
     return await db_service.get_roi_zones(session_id)
 
 # Violation endpoints
-@app.post("/violations")
+@app.post("/violations", status_code=202)
 async def create_violation_endpoint(violation: ViolationCreate):
-    try:
-        result = await db_service.create_violation(violation)
-        logger.info(f"✅ Created violation: {result['id']}")
-        return result
-    except Exception as e:
-        logger.error(f"❌ Failed to create violation: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    """Queue a violation for the next bulk write"""
+    await violation_writer.put(violation)
+    return {"status": "queued"}
 
 @app.get("/sessions/{session_id}/violations")
 async def get_violations_endpoint(session_id: str, limit: int = 100):
-    return await db_service.get_violations(session_id, limit)
+    stack = AsyncExitStack()
+    body = await db_service.stream_violations(stack, session_id, limit)
+    # The background close covers a client that disconnects before the body is iterated
+    return StreamingResponse(body, media_type="application/json", background=BackgroundTask(stack.aclose))
+
+@app.get("/frames/{key:path}")
+async def get_frame_endpoint(key: str):
+    """Redirect to a short-lived presigned URL for an offloaded violation frame"""
+    if not frame_store.enabled:
+        raise HTTPException(status_code=404, detail="Frame storage not configured")
+    return RedirectResponse(await frame_store.presigned_url(key))
 
 # Detection endpoints
-@app.post("/detections")
+@app.post("/detections", status_code=202)
 async def create_detection_endpoint(detection: DetectionCreate):
+    """Queue a detection for the next bulk write"""
+    await detection_writer.put(detection)
+    return {"status": "queued"}
+
+@app.post("/detections/batch", status_code=201)
+async def create_detections_batch_endpoint(request: Request):
+    """Write a JSON array of detections (e.g. one frame's worth) with a single COPY"""
     try:
-        result = await db_service.create_detection(detection)
-        return result
-    except Exception as e:
-        logger.error(f"❌ Failed to create detection: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        detections = DetectionBatch.validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    if not detections:
+        return {"inserted": 0}
+    # The batch already is the unit of work, so it bypasses the write-behind queue
+    inserted = await db_service.create_detections_bulk(detections)
+    return {"inserted": inserted}
+
+# Frame analysis endpoints
+@app.post("/frame-analysis", status_code=202)
+async def create_frame_analysis_endpoint(analysis: FrameAnalysisCreate):
+    """Queue a per-frame analysis record for the next staged bulk write"""
+    await frame_analysis_writer.put(analysis)
+    return {"status": "queued"}
 
 if __name__ == "__main__":
-    import os
     port = int(os.getenv("DATABASE_PORT", "8005"))  # Use port 8005 by default
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=port,
-        reload=True,
+        # uvloop/httptools when installed (not available on Windows), asyncio otherwise
+        loop="auto",
+        http="auto",
+        reload=os.getenv("DATABASE_RELOAD", "false").lower() == "true",
         log_level="info"
     )
@@ -0,0 +1,6 @@
+-- Supporting indexes for per-session lookups (session stats, violation/ROI listings).
+-- CONCURRENTLY avoids locking writers; run outside a transaction block.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_violations_session_id ON violations (session_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_detections_session_id ON detections (session_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_roi_zones_session_id ON roi_zones (session_id) WHERE is_active;
@@ -0,0 +1,10 @@
+-- Store violation frames as raw BYTEA instead of base64 text (~25% smaller rows,
+-- no encode/decode on insert). Existing rows are decoded in place.
+
+ALTER TABLE violations ADD COLUMN IF NOT EXISTS frame_bytes BYTEA;
+
+UPDATE violations
+SET frame_bytes = decode(regexp_replace(frame_base64, '^data:[^,]*,', ''), 'base64')
+WHERE frame_base64 IS NOT NULL AND frame_bytes IS NULL;
+
+ALTER TABLE violations DROP COLUMN IF EXISTS frame_base64;
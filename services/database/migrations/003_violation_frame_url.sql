@@ -0,0 +1,4 @@
+-- Object-store key for violation frames offloaded to S3/MinIO (FRAME_STORE_BUCKET).
+-- frame_bytes stays as the fallback for frames that could not be uploaded.
+
+ALTER TABLE violations ADD COLUMN IF NOT EXISTS frame_url TEXT;
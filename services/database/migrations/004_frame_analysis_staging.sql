@@ -0,0 +1,17 @@
+-- UNLOGGED landing table for batched frame_analysis writes. COPY into it skips WAL;
+-- rows are moved to frame_analysis in one statement per flush. Contents are lost on
+-- crash by design (at most one flush window of analytics data).
+
+CREATE UNLOGGED TABLE IF NOT EXISTS frame_analysis_staging (
+    session_id VARCHAR(255) NOT NULL,
+    frame_number INTEGER NOT NULL,
+    total_detections INTEGER DEFAULT 0,
+    hands_count INTEGER DEFAULT 0,
+    persons_count INTEGER DEFAULT 0,
+    scoopers_count INTEGER DEFAULT 0,
+    pizzas_count INTEGER DEFAULT 0,
+    violations_count INTEGER DEFAULT 0,
+    processing_time_ms REAL,
+    frame_size_bytes INTEGER,
+    analysis_metadata JSONB
+);
@@ -0,0 +1,11 @@
+-- Composite indexes matching the per-session listing orders, so
+-- "WHERE session_id = $1 ORDER BY timestamp DESC LIMIT $2" is a bounded index scan
+-- instead of filter + sort. Supersedes the single-column indexes from 001 for
+-- violations/detections (equality on the leading column still uses these).
+-- CONCURRENTLY avoids locking writers; run outside a transaction block.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS violations_session_ts_idx ON violations (session_id, timestamp DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS detections_session_frame_idx ON detections (session_id, frame_number);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_violations_session_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_detections_session_id;
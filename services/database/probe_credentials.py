@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+PostgreSQL Credential Probe
+Admin helper that tries the known credential sets and hosts to find a working DATABASE_URL.
+Kept out of the database service so startup tries exactly one DSN.
+"""
+
+import os
+import asyncio
+
+import asyncpg
+
+DB_PORT = int(os.getenv("DB_PORT", "5432"))
+CONNECT_TIMEOUT = 2.0
+
+# Credential combinations seen on existing containers
+CREDENTIAL_OPTIONS = [
+    {
+        "database": os.getenv("DB_NAME", "pizza_violations").strip(),
+        "user": os.getenv("DB_USER", "pizza_admin").strip(),
+        "password": os.getenv("DB_PASSWORD", "secure_pizza_2024").strip(),
+    },
+    {"database": "pizza_store_db", "user": "pizza_user", "password": "pizza_password"},
+    {"database": "postgres", "user": "postgres", "password": "postgres"},
+    {"database": "postgres", "user": "postgres", "password": ""},
+]
+
+HOSTS = [
+    os.getenv("DB_HOST", "localhost").strip(),
+    "127.0.0.1",
+    "host.docker.internal",
+    "172.17.0.1",  # Common Docker bridge IP
+]
+
+async def probe():
+    """Return the first (host, credentials) pair that connects"""
+    for config in CREDENTIAL_OPTIONS:
+        print(f"🔄 Trying credential set: {config['database']}@{config['user']}")
+        for host in HOSTS:
+            try:
+                conn = await asyncpg.connect(host=host, port=DB_PORT, timeout=CONNECT_TIMEOUT, **config)
+            except Exception as e:
+                print(f"❌ {host}:{DB_PORT}: {e}")
+                continue
+            await conn.close()
+            return host, config
+    return None, None
+
+def main():
+    print("🍕 PostgreSQL Credential Probe")
+    print("=" * 50)
+
+    host, config = asyncio.run(probe())
+
+    if host:
+        print(f"\n✅ Connected to {config['database']} as {config['user']} at {host}:{DB_PORT}")
+        print("💡 Use this in your database service:")
+        print(f"   set DATABASE_URL=postgresql://{config['user']}:{config['password']}@{host}:{DB_PORT}/{config['database']}")
+    else:
+        print("\n❌ No working PostgreSQL connection found")
+        print("💡 Make sure PostgreSQL container is running and accessible")
+        print("💡 Try: docker ps | findstr postgres")
+        print("💡 Try: docker-compose up -d postgres")
+
+if __name__ == "__main__":
+    main()
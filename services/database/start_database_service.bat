@@ -26,7 +26,7 @@ echo ✅ Python is available
 
 REM Install dependencies if needed
 echo 📦 Installing dependencies...
-pip install fastapi uvicorn asyncpg pydantic python-multipart python-json-logger psycopg2-binary
+pip install -r requirements.txt
 
 if errorlevel 1 (
     echo ❌ Failed to install dependencies
@@ -36,7 +36,7 @@ if errorlevel 1 (
 
 echo ✅ Dependencies installed
 
-REM Start the database service
+REM Start the database service (set DATABASE_RELOAD=true for auto-reload while developing)
 echo 🚀 Starting database service on port %DATABASE_PORT%...
 python main.py
 
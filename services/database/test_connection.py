@@ -4,27 +4,41 @@ Simple PostgreSQL Connection Test
 Tests different connection methods to find the working one
 """
 
-import os
-import sys
+import socket
 
-def test_psycopg2_connection():
+DB_PORT = 5432
+HOSTS_TO_TRY = ["localhost", "127.0.0.1", "172.22.0.2"]
+PROBE_TIMEOUT = 1.0  # TCP reachability check
+CONNECT_TIMEOUT = 2  # full PostgreSQL handshake
+
+def port_open(host, port=DB_PORT):
+    """Cheap TCP probe so unreachable hosts fail in a second instead of a SYN timeout"""
+    try:
+        with socket.create_connection((host, port), timeout=PROBE_TIMEOUT):
+            return True
+    except OSError as e:
+        print(f"❌ {host}:{port} unreachable: {e}")
+        return False
+
+def reachable_hosts():
+    return [host for host in HOSTS_TO_TRY if port_open(host)]
+
+def test_psycopg2_connection(hosts):
     """Test connection using psycopg2"""
     try:
         import psycopg2
         print("🧪 Testing psycopg2 connection...")
         
-        # Test different hosts
-        hosts_to_try = ["localhost", "127.0.0.1", "172.22.0.2"]
-        
-        for host in hosts_to_try:
+        for host in hosts:
             try:
-                print(f"🔄 Trying {host}:5432...")
+                print(f"🔄 Trying {host}:{DB_PORT}...")
                 conn = psycopg2.connect(
                     host=host,
-                    port=5432,
+                    port=DB_PORT,
                     database="pizza_violations",
                     user="pizza_admin",
-                    password="secure_pizza_2024"
+                    password="secure_pizza_2024",
+                    connect_timeout=CONNECT_TIMEOUT
                 )
                 print(f"✅ psycopg2 connection successful to {host}!")
                 
@@ -46,11 +60,11 @@ def test_psycopg2_connection():
         return None
         
     except ImportError:
-        print("❌ psycopg2 not installed. Installing...")
-        os.system("pip install psycopg2-binary")
-        return test_psycopg2_connection()
+        print("❌ psycopg2 not installed")
+        print("💡 Install it with: pip install -r requirements.txt")
+        return None
 
-def test_asyncpg_connection():
+def test_asyncpg_connection(hosts):
     """Test connection using asyncpg"""
     try:
         import asyncio
@@ -59,17 +73,16 @@ def test_asyncpg_connection():
         async def test_async_connection():
             print("🧪 Testing asyncpg connection...")
             
-            hosts_to_try = ["localhost", "127.0.0.1", "172.22.0.2"]
-            
-            for host in hosts_to_try:
+            for host in hosts:
                 try:
-                    print(f"🔄 Trying asyncpg to {host}:5432...")
+                    print(f"🔄 Trying asyncpg to {host}:{DB_PORT}...")
                     conn = await asyncpg.connect(
                         host=host,
-                        port=5432,
+                        port=DB_PORT,
                         database="pizza_violations",
                         user="pizza_admin",
-                        password="secure_pizza_2024"
+                        password="secure_pizza_2024",
+                        timeout=CONNECT_TIMEOUT
                     )
                     print(f"✅ asyncpg connection successful to {host}!")
                     
@@ -91,6 +104,7 @@ def test_asyncpg_connection():
         
     except ImportError:
         print("❌ asyncpg not installed")
+        print("💡 Install it with: pip install -r requirements.txt")
         return None
 
 def main():
@@ -98,8 +112,10 @@ def main():
     print("🍕 PostgreSQL Connection Test")
     print("=" * 50)
     
+    hosts = reachable_hosts()
+    
     # Test psycopg2 first (simpler)
-    working_host = test_psycopg2_connection()
+    working_host = test_psycopg2_connection(hosts) if hosts else None
     
     if working_host:
         print(f"\n✅ Working host found: {working_host}")
@@ -108,7 +124,7 @@ def main():
         
         # Test asyncpg with the working host
         print(f"\n🧪 Testing asyncpg with working host...")
-        asyncpg_host = test_asyncpg_connection()
+        asyncpg_host = test_asyncpg_connection([working_host])
         
         if asyncpg_host:
             print(f"✅ Both psycopg2 and asyncpg work with {working_host}")
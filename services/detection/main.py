@@ -5,19 +5,30 @@ YOLO-based object detection for Hand, Person, Pizza, Scooper detection
 """
 
 import os
+import time
+import asyncio
 import cv2
 import json
 import base64
 import numpy as np
 import logging
+from collections import OrderedDict
+from multiprocessing import resource_tracker, shared_memory
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, TypedDict
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 import uvicorn
 
+try:
+    # SIMD (AVX2/SSE4.1) base64 codec, a drop-in for the stdlib module
+    import pybase64 as base64
+except ImportError:
+    pass
+
 try:
     from ultralytics import YOLO
     YOLO_AVAILABLE = True
@@ -25,12 +36,27 @@ except ImportError:
     YOLO_AVAILABLE = False
     logging.warning("Ultralytics YOLO not available. Using mock detection.")
 
+try:
+    import onnxruntime as ort
+    ORT_AVAILABLE = True
+except ImportError:
+    ORT_AVAILABLE = False
+
+try:
+    import torch
+    from torchvision.io import decode_jpeg
+    from torchvision.ops import batched_nms
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+# Per-frame logs are DEBUG; deployments set LOG_LEVEL=WARNING to keep only problems
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
 # FastAPI app
-app = FastAPI(title="Detection Service", version="1.0.0")
+app = FastAPI(title="Detection Service", version="1.0.0", default_response_class=ORJSONResponse)
 
 class DetectionRequest(BaseModel):
     frame_id: str
@@ -38,20 +64,91 @@ class DetectionRequest(BaseModel):
     timestamp: str
     source_info: Dict[str, Any]
 
-class Detection(BaseModel):
+class ShmDetectionRequest(BaseModel):
+    frame_id: str
+    shm_name: str  # POSIX shared memory segment written by a co-located producer
+    shape: List[int]  # (height, width, 3) BGR
+    dtype: str = "uint8"
+    offset: int = 0
+
+# Responses are built from our own model output, so they are plain dicts (typed for
+# readers) rather than pydantic models re-validating every float
+class Detection(TypedDict):
     class_name: str
     confidence: float
     bbox: Dict[str, float]  # x1, y1, x2, y2
     center: Dict[str, float]  # x, y
     area: float
 
-class DetectionResponse(BaseModel):
+class DetectionResponse(TypedDict):
     frame_id: str
     timestamp: str
     detections: List[Detection]
     processing_time_ms: float
     model_info: Dict[str, Any]
 
+# Mock detector parameters per class: max count per frame, width/height/confidence ranges
+MOCK_CLASSES = ["hand", "person", "pizza", "scooper"]
+MOCK_MAX_COUNTS = np.array([2, 1, 1, 1])
+MOCK_W_RANGE = np.array([[30, 60], [100, 200], [80, 150], [20, 40]])
+MOCK_H_RANGE = np.array([[30, 60], [200, 400], [80, 150], [60, 100]])
+MOCK_CONF_RANGE = np.array([[0.6, 0.95], [0.6, 0.95], [0.6, 0.95], [0.2, 0.7]])
+
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+}
+
+def nms(boxes: np.ndarray, scores: np.ndarray, classes: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Class-aware greedy NMS; returns kept indices in descending score order"""
+    if len(boxes) == 0:
+        return np.empty(0, dtype=int)
+    # Offset each class into its own coordinate range so boxes only suppress their own class
+    boxes = boxes + (classes * 7680.0)[:, None]
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=int)
+
+class FramePool:
+    """Free-list of frame buffers by shape, so steady-state frames reuse multi-MB arrays"""
+
+    def __init__(self, max_per_shape: int):
+        self.max_per_shape = max_per_shape
+        self._free: Dict[tuple, List[np.ndarray]] = {}
+
+    def acquire(self, shape: tuple, dtype) -> np.ndarray:
+        free = self._free.get((shape, np.dtype(dtype)))
+        if free:
+            return free.pop()
+        return np.empty(shape, dtype=dtype)
+
+    def release(self, frame: np.ndarray):
+        free = self._free.setdefault((frame.shape, frame.dtype), [])
+        if len(free) < self.max_per_shape:
+            free.append(frame)
+
+class GpuFrame:
+    """JPEG decoded by NVJPEG straight into GPU memory, letterboxed to the model input size"""
+    __slots__ = ("tensor", "scale", "pad", "shape")
+
+    def __init__(self, tensor, scale: float, pad: tuple, shape: tuple):
+        self.tensor = tensor  # (3, imgsz, imgsz) float RGB in [0, 1]
+        self.scale = scale
+        self.pad = pad  # (left, top)
+        self.shape = shape  # original (height, width, 3), like an ndarray frame
+
 class DetectionConfig:
     """Configuration for detection service"""
     def __init__(self):
@@ -61,6 +158,26 @@ class DetectionConfig:
         self.target_classes = ["hand", "person", "pizza", "scooper"]
         self.device = os.getenv("DEVICE", "cpu")  # cpu or cuda
         self.max_detections = int(os.getenv("MAX_DETECTIONS", "50"))
+        # Micro-batching: concurrent frames are coalesced into one model call
+        self.max_batch = int(os.getenv("MAX_BATCH", "16"))
+        self.max_wait_ms = float(os.getenv("MAX_WAIT_MS", "5"))
+        self.imgsz = 640
+        # ONNX Runtime instead of PyTorch eager when running on CPU
+        self.use_onnxruntime = os.getenv("USE_ONNXRUNTIME", "true").lower() == "true"
+        # Decode JPEGs with NVJPEG on CUDA instead of cv2.imdecode on the CPU
+        self.gpu_jpeg_decode = os.getenv("GPU_JPEG_DECODE", "true").lower() == "true"
+        # TensorRT engine on CUDA; ENGINE_PATH points at a prebuilt engine
+        self.use_tensorrt = os.getenv("USE_TENSORRT", "true").lower() == "true"
+        self.engine_path = os.getenv("ENGINE_PATH")
+        self.tensorrt_precision = os.getenv("TENSORRT_PRECISION", "fp16").lower()  # fp16 or int8
+        # INT8 calibration dataset (ultralytics data yaml over ~200 representative frames)
+        self.calibration_data = os.getenv("CALIBRATION_DATA", "./calib/calib.yaml")
+        # Shared-memory segments kept mapped between /detect_shm calls (least recently used evicted)
+        self.shm_cache_size = int(os.getenv("SHM_CACHE_SIZE", "16"))
+
+# POSIX shm segments are files here, so a cached mapping can be checked against the current name
+SHM_DIR = Path("/dev/shm")
+SHM_STAT_AVAILABLE = SHM_DIR.is_dir()
 
 class PizzaStoreDetector:
     """Advanced YOLO-based detector for pizza store objects"""
@@ -70,7 +187,22 @@ class PizzaStoreDetector:
         self.model = None
         self.model_loaded = False
         self.detection_count = 0
-        self.load_model()
+        self._ort = None
+        self._ort_input = None
+        self._backend = None  # ultralytics AutoBackend for raw CUDA forward passes
+        # Created lazily on the serving event loop
+        self._pending: List[tuple] = []
+        self._pending_event: Optional[asyncio.Event] = None
+        self._batch_full: Optional[asyncio.Event] = None
+        self._batch_task: Optional[asyncio.Task] = None
+        self._shm_segments: "OrderedDict[str, shared_memory.SharedMemory]" = OrderedDict()
+        self._frame_pool = FramePool(max_per_shape=2 * config.max_batch)
+        self._rng = np.random.default_rng()
+        # Target-class lookups resolved once per model load
+        self._target_ids: frozenset = frozenset()
+        self._target_id_array = np.empty(0, dtype=int)
+        self._id_to_name: Dict[int, str] = {}
+        self._model_info_template: Dict[str, Any] = {}
     
     def load_model(self):
         """Load YOLO model"""
@@ -96,11 +228,21 @@ class PizzaStoreDetector:
                     break
 
             if YOLO_AVAILABLE and model_path:
+                if self.config.use_tensorrt and self.config.device.startswith("cuda"):
+                    model_path = self._tensorrt_engine(model_path)
                 logger.info(f"🤖 Loading YOLO model from: {model_path}")
                 self.model = YOLO(str(model_path))
                 self.model_loaded = True
                 logger.info(f"✅ YOLO model loaded successfully!")
                 logger.info(f"📊 Model classes: {list(self.model.names.values())}")
+                self._index_target_classes()
+                if self.config.use_onnxruntime and self.config.device == "cpu":
+                    self._load_onnxruntime(model_path)
+                self._warmup()
+                if TORCH_AVAILABLE and self.config.device.startswith("cuda"):
+                    # The predictor built during warm-up wraps the loaded .pt/.engine; reuse it for
+                    # raw batched forwards with on-device NMS instead of ultralytics' per-image loop
+                    self._backend = getattr(self.model.predictor, "model", None)
             else:
                 if not YOLO_AVAILABLE:
                     logger.warning("⚠️ Ultralytics YOLO not available. Using mock detection.")
@@ -111,172 +253,551 @@ class PizzaStoreDetector:
         except Exception as e:
             logger.error(f"❌ Failed to load YOLO model: {e}")
             self.model_loaded = False
+
+        # Static part of every response's model_info, built once per load
+        self._model_info_template = {
+            "model_loaded": self.model_loaded,
+            "model_path": self.config.model_path,
+            "confidence_threshold": self.config.confidence_threshold,
+            "target_classes": tuple(self.config.target_classes),
+            "coordinate_system": "top_left_origin"
+        }
     
+    def _index_target_classes(self):
+        """Map the model's class IDs to target class names so per-box filtering is an int lookup"""
+        targets = set(self.config.target_classes)
+        self._id_to_name = {i: n.lower() for i, n in self.model.names.items() if n.lower() in targets}
+        self._target_ids = frozenset(self._id_to_name)
+        self._target_id_array = np.fromiter(self._target_ids, dtype=int)
+
+    def _load_onnxruntime(self, model_path: Path):
+        """Use an ONNX Runtime session for CPU inference, exporting a dynamic-batch .onnx once if missing"""
+        if not ORT_AVAILABLE:
+            logger.warning("⚠️ onnxruntime not installed, using PyTorch on CPU")
+            return
+        onnx_path = model_path.with_suffix(".onnx")
+        try:
+            if not onnx_path.exists():
+                logger.info(f"⚙️ Exporting ONNX model from {model_path} (one-time)")
+                onnx_path = Path(self.model.export(format="onnx", dynamic=True, simplify=True, imgsz=self.config.imgsz))
+            opts = ort.SessionOptions()
+            opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            opts.intra_op_num_threads = os.cpu_count() or 1
+            self._ort = ort.InferenceSession(str(onnx_path), sess_options=opts, providers=["CPUExecutionProvider"])
+            self._ort_input = self._ort.get_inputs()[0].name
+            logger.info(f"✅ ONNX Runtime session ready: {onnx_path}")
+        except Exception as e:
+            logger.warning(f"⚠️ ONNX Runtime unavailable, using PyTorch on CPU: {e}")
+            self._ort = None
+
+    def _warmup(self, runs: int = 3):
+        """Run dummy inferences so cuDNN autotuning and lazy allocation happen before the first request"""
+        dummy = np.zeros((640, 640, 3), dtype=np.uint8)
+        try:
+            for _ in range(runs):
+                if self._ort is not None:
+                    self._run_ort_batch([dummy])
+                    continue
+                self.model(
+                    dummy,
+                    conf=self.config.confidence_threshold,
+                    device=self.config.device,
+                    verbose=False
+                )
+            logger.info(f"🔥 Model warmed up with {runs} dummy inferences")
+        except Exception as e:
+            logger.warning(f"⚠️ Model warm-up failed: {e}")
+
+    def _tensorrt_engine(self, model_path: Path) -> Path:
+        """Return the TensorRT engine for model_path, exporting it once if missing"""
+        int8 = self.config.tensorrt_precision == "int8"
+        if self.config.engine_path:
+            engine_path = Path(self.config.engine_path)
+        elif int8:
+            engine_path = model_path.with_name(f"{model_path.stem}-int8.engine")
+        else:
+            engine_path = model_path.with_suffix(".engine")
+        if engine_path.exists():
+            logger.info(f"✅ Found TensorRT engine at: {engine_path.absolute()}")
+            return engine_path
+
+        if int8 and not Path(self.config.calibration_data).exists():
+            logger.warning(f"⚠️ INT8 calibration data not found at {self.config.calibration_data}, using FP16")
+            int8 = False
+            if not self.config.engine_path:
+                # Look up (and later store) the fallback where an FP16 start would find it
+                engine_path = model_path.with_suffix(".engine")
+                if engine_path.exists():
+                    logger.info(f"✅ Found TensorRT engine at: {engine_path.absolute()}")
+                    return engine_path
+        precision = "INT8" if int8 else "FP16"
+        try:
+            logger.info(f"⚙️ Exporting TensorRT {precision} engine from {model_path} (one-time, may take minutes)")
+            # Dynamic batch up to MAX_BATCH so micro-batched frames run as one engine call
+            export_args = dict(
+                format="engine", imgsz=640, dynamic=True,
+                batch=self.config.max_batch, device=self.config.device
+            )
+            if int8:
+                export_args.update(int8=True, data=self.config.calibration_data)
+            else:
+                export_args.update(half=True)
+            exported = Path(YOLO(str(model_path)).export(**export_args))
+            if exported != engine_path:
+                # Move it to the path checked above so the next start reuses it
+                exported = exported.rename(engine_path)
+            logger.info(f"✅ TensorRT {precision} engine exported to: {exported}")
+            return exported
+        except Exception as e:
+            logger.warning(f"⚠️ TensorRT export failed, using PyTorch weights: {e}")
+            return model_path
+
     async def detect_objects(self, request: DetectionRequest) -> DetectionResponse:
-        """Perform object detection on frame"""
-        start_time = datetime.now()
+        """Perform object detection on a base64-encoded frame"""
+        start_ns = time.perf_counter_ns()
+
+        try:
+            image_data = base64.b64decode(request.frame_data, validate=False)
+        except Exception as e:
+            logger.error(f"❌ Invalid base64 frame data for frame {request.frame_id}: {e}")
+            raise HTTPException(status_code=400, detail="Invalid base64 frame data")
+
+        reduce = self._decode_reduction(request.source_info)
+        return await self.detect_image(request.frame_id, image_data, start_ns, reduce)
+
+    def _decode_reduction(self, source_info: Dict[str, Any]) -> int:
+        """Largest libjpeg downscale (1, 2 or 4) that keeps the frame at least model-input sized"""
+        resolution = source_info.get("resolution") or (source_info.get("width"), source_info.get("height"))
+        try:
+            long_side = max(int(v) for v in resolution if v)
+        except (TypeError, ValueError):
+            return 1
+        for factor in (4, 2):
+            if long_side >= factor * self.config.imgsz:
+                return factor
+        return 1
+
+    async def detect_image(self, frame_id: str, image_data: bytes,
+                           start_ns: Optional[int] = None, reduce: int = 1) -> DetectionResponse:
+        """Perform object detection on encoded (JPEG/PNG) image bytes"""
+        start_ns = start_ns or time.perf_counter_ns()
 
         try:
-            logger.info(f"🔍 Processing detection request for frame: {request.frame_id}")
+            logger.debug("🔍 Processing detection request for frame: %s", frame_id)
 
-            # Decode base64 image
-            image_data = base64.b64decode(request.frame_data)
-            nparr = np.frombuffer(image_data, np.uint8)
-            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            # Decoding a full frame takes milliseconds; keep it off the event loop
+            frame, scale = await asyncio.to_thread(self._decode_image, image_data, reduce)
 
             if frame is None:
                 raise ValueError("Could not decode image")
 
-            logger.info(f"📸 Frame decoded successfully: {frame.shape}")
+            logger.debug("📸 Frame decoded successfully: %s", frame.shape)
+        except Exception as e:
+            logger.error(f"❌ Detection error for frame {frame_id}: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+        return await self.detect_frame(frame_id, frame, start_ns, scale)
+
+    def _decode_image(self, image_data: bytes, reduce: int = 1):
+        """Decode to a frame, returning it with the factor back to source coordinates"""
+        if self._use_gpu_decode() and image_data[:2] == b"\xff\xd8":
+            return self._decode_jpeg_gpu(image_data), 1
+        nparr = np.frombuffer(image_data, np.uint8)
+        # Reduced modes downscale inside libjpeg's IDCT; YOLO resizes to 640 anyway
+        return cv2.imdecode(nparr, REDUCED_DECODE_FLAGS[reduce]), reduce
+
+    def _use_gpu_decode(self) -> bool:
+        return (TORCH_AVAILABLE and self.model_loaded and self.config.gpu_jpeg_decode
+                and self.config.device.startswith("cuda"))
+
+    def _decode_jpeg_gpu(self, image_data: bytes) -> GpuFrame:
+        """Decode on the GPU and letterbox there, so the frame never round-trips through host memory"""
+        buf = torch.frombuffer(bytearray(image_data), dtype=torch.uint8)
+        img = decode_jpeg(buf, device=self.config.device)  # (3, H, W) uint8 RGB
+        height, width = img.shape[1:]
+        imgsz = self.config.imgsz
+        scale = imgsz / max(height, width)
+        new_h, new_w = round(height * scale), round(width * scale)
+        resized = torch.nn.functional.interpolate(
+            img[None].float(), size=(new_h, new_w), mode="bilinear", align_corners=False
+        )[0]
+        # Same grey centre padding as ultralytics' letterbox
+        top, left = (imgsz - new_h) // 2, (imgsz - new_w) // 2
+        padded = resized.new_full((3, imgsz, imgsz), 114.0)
+        padded[:, top:top + new_h, left:left + new_w] = resized
+        return GpuFrame(padded / 255.0, scale, (left, top), (height, width, 3))
+
+    async def detect_shm(self, request: ShmDetectionRequest) -> DetectionResponse:
+        """Perform object detection on a raw BGR frame a co-located producer left in shared memory"""
+        start_ns = time.perf_counter_ns()
+
+        try:
+            try:
+                view = self._shm_view(request)
+            except (FileNotFoundError, ValueError):
+                # The producer may have recreated the segment under the same name; attach afresh once
+                view = self._shm_view(request, refresh=True)
+            # One copy so the producer can reuse its slot while inference is queued
+            frame = self._frame_pool.acquire(view.shape, view.dtype)
+            np.copyto(frame, view)
+            del view
+        except (FileNotFoundError, ValueError, TypeError) as e:
+            logger.error(f"❌ Invalid shared-memory frame {request.frame_id}: {e}")
+            raise HTTPException(status_code=400, detail=str(e))
+
+        try:
+            return await self.detect_frame(request.frame_id, frame, start_ns)
+        finally:
+            # Inference for this frame is done; the buffer can take the next one
+            self._frame_pool.release(frame)
+
+    def _shm_view(self, request: ShmDetectionRequest, refresh: bool = False) -> np.ndarray:
+        """Array view of the requested frame inside its shared-memory segment"""
+        segment = self._shm_segment(request.shm_name, refresh)
+        dtype = np.dtype(request.dtype)
+        size = int(np.prod(request.shape)) * dtype.itemsize
+        if request.offset < 0 or request.offset + size > segment.size:
+            raise ValueError(f"Frame {request.shape} at offset {request.offset} exceeds segment size {segment.size}")
+        return np.ndarray(request.shape, dtype=dtype, buffer=segment.buf, offset=request.offset)
+
+    def _shm_segment(self, name: str, refresh: bool = False) -> shared_memory.SharedMemory:
+        """Attach to a producer's segment and keep it mapped, re-attaching if it was replaced"""
+        segment = self._shm_segments.get(name)
+        if segment is not None and (refresh or self._shm_replaced(segment)):
+            self._detach_shm(name)
+            segment = None
+        if segment is None:
+            segment = shared_memory.SharedMemory(name=name)
+            # The producer owns the segment; don't let our resource tracker unlink it on exit
+            resource_tracker.unregister(segment._name, "shared_memory")
+            self._shm_segments[name] = segment
+            while len(self._shm_segments) > self.config.shm_cache_size:
+                self._detach_shm(next(iter(self._shm_segments)))
+        else:
+            self._shm_segments.move_to_end(name)
+        return segment
+
+    @staticmethod
+    def _shm_replaced(segment: shared_memory.SharedMemory) -> bool:
+        """True if the name now refers to a different (or no) segment than the one we have mapped"""
+        if not SHM_STAT_AVAILABLE:
+            return False
+        try:
+            current = os.stat(SHM_DIR / segment._name.lstrip("/"))
+        except FileNotFoundError:
+            return True
+        mapped = os.fstat(segment._fd)
+        return (current.st_ino, current.st_size) != (mapped.st_ino, mapped.st_size)
+
+    def _detach_shm(self, name: str):
+        segment = self._shm_segments.pop(name)
+        try:
+            segment.close()
+        except BufferError:
+            # A view is still exported; the mapping goes away once it is garbage collected
+            logger.debug("Deferred unmapping shared-memory segment %s", name)
 
+    async def detect_frame(self, frame_id: str, frame: np.ndarray,
+                           start_ns: Optional[int] = None, scale: int = 1) -> DetectionResponse:
+        """Perform object detection on a decoded BGR frame, scaled down from the source by `scale`"""
+        start_ns = start_ns or time.perf_counter_ns()
+
+        try:
             # Perform detection
             if self.model_loaded:
-                logger.info("🤖 Using YOLO model for detection")
+                logger.debug("🤖 Using YOLO model for detection")
                 detections = await self._yolo_detection(frame)
             else:
-                logger.info("🎭 Using mock detection (YOLO not available)")
-                detections = await self._mock_detection(frame)
+                logger.debug("🎭 Using mock detection (YOLO not available)")
+                detections = self._mock_detection(frame)
+
+            if scale != 1:
+                self._rescale(detections, scale)
 
             # Calculate processing time
-            processing_time = (datetime.now() - start_time).total_seconds() * 1000
+            processing_time = (time.perf_counter_ns() - start_ns) / 1e6
             self.detection_count += 1
 
-            logger.info(f"✅ Detection completed: {len(detections)} objects found in {processing_time:.1f}ms")
+            logger.debug("✅ Detection completed: %d objects found in %.1fms", len(detections), processing_time)
 
             return DetectionResponse(
-                frame_id=request.frame_id,
+                frame_id=frame_id,
                 timestamp=datetime.now().isoformat(),
                 detections=detections,
                 processing_time_ms=processing_time,
                 model_info={
-                    "model_loaded": self.model_loaded,
-                    "model_path": self.config.model_path,
-                    "confidence_threshold": self.config.confidence_threshold,
-                    "target_classes": self.config.target_classes,
+                    **self._model_info_template,
                     "total_detections_processed": self.detection_count,
                     "frame_dimensions": {
-                        "width": frame.shape[1],
-                        "height": frame.shape[0]
-                    },
-                    "coordinate_system": "top_left_origin"
+                        "width": frame.shape[1] * scale,
+                        "height": frame.shape[0] * scale
+                    }
                 }
             )
 
         except Exception as e:
-            logger.error(f"❌ Detection error for frame {request.frame_id}: {e}")
+            logger.error(f"❌ Detection error for frame {frame_id}: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
+    @staticmethod
+    def _rescale(detections: List[Detection], scale: int):
+        """Map detections from a reduced decode back to source-frame coordinates"""
+        for detection in detections:
+            bbox = detection["bbox"]
+            for key in bbox:
+                bbox[key] *= scale
+            center = detection["center"]
+            center["x"] *= scale
+            center["y"] *= scale
+            detection["area"] *= scale * scale
+
     async def _yolo_detection(self, frame: np.ndarray) -> List[Detection]:
-        """Perform YOLO-based detection"""
+        """Queue a frame for the next batched YOLO call and wait for its detections"""
+        if self._batch_task is None:
+            self._pending_event = asyncio.Event()
+            self._batch_full = asyncio.Event()
+            self._batch_task = asyncio.create_task(self._batch_loop())
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((future, frame))
+        self._pending_event.set()
+        if len(self._pending) >= self.config.max_batch:
+            self._batch_full.set()
+        return await future
+
+    async def _batch_loop(self):
+        """Dispatch pending frames when the batch fills or MAX_WAIT_MS passes"""
+        max_batch = self.config.max_batch
+        while True:
+            await self._pending_event.wait()
+            if len(self._pending) < max_batch:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self.config.max_wait_ms / 1000)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch, self._pending = self._pending[:max_batch], self._pending[max_batch:]
+            if len(self._pending) < max_batch:
+                self._batch_full.clear()
+            if not self._pending:
+                self._pending_event.clear()
+
+            # Inference blocks for the whole batch; run it in a worker thread so the loop keeps
+            # accepting requests (and filling the next batch) meanwhile
+            results = await asyncio.to_thread(self._run_yolo_batch, [frame for _, frame in batch])
+            for (future, _), detections in zip(batch, results):
+                if not future.done():
+                    future.set_result(detections)
+
+    def _run_yolo_batch(self, frames: list) -> List[List[Detection]]:
+        """Run one YOLO call over a batch of frames (one per input kind: host arrays, GPU tensors)"""
+        if self._ort is not None:
+            return self._run_ort_batch(frames)
+        if self._backend is not None:
+            return self._run_gpu_batch(frames)
+        outputs: List[List[Detection]] = [[] for _ in frames]
+        host = [i for i, f in enumerate(frames) if not isinstance(f, GpuFrame)]
+        gpu = [i for i, f in enumerate(frames) if isinstance(f, GpuFrame)]
         try:
-            # Run YOLO inference
-            results = self.model(
-                frame,
-                conf=self.config.confidence_threshold,
-                iou=self.config.iou_threshold,
-                device=self.config.device,
-                verbose=False
-            )
-            
-            detections = []
-            
-            for result in results:
-                if result.boxes is not None:
-                    boxes = result.boxes.cpu().numpy()
-                    
-                    for box in boxes:
-                        # Extract box information
-                        x1, y1, x2, y2 = box.xyxy[0]
-                        confidence = float(box.conf[0])
-                        class_id = int(box.cls[0])
-                        
-                        # Get class name
-                        class_name = self.model.names[class_id].lower()
-                        
-                        # Filter for target classes
-                        if class_name in self.config.target_classes:
-                            # Calculate center and area
-                            center_x = (x1 + x2) / 2
-                            center_y = (y1 + y2) / 2
-                            area = (x2 - x1) * (y2 - y1)
-                            
-                            detection = Detection(
-                                class_name=class_name,
-                                confidence=confidence,
-                                bbox={
-                                    "x1": float(x1),
-                                    "y1": float(y1),
-                                    "x2": float(x2),
-                                    "y2": float(y2),
-                                    "width": float(x2 - x1),
-                                    "height": float(y2 - y1)
-                                },
-                                center={
-                                    "x": float(center_x),
-                                    "y": float(center_y)
-                                },
-                                area=float(area)
-                            )
-                            detections.append(detection)
-            
-            # Sort by confidence and limit detections
-            detections.sort(key=lambda x: x.confidence, reverse=True)
-            return detections[:self.config.max_detections]
-            
+            for indices, source in (
+                (host, lambda: [frames[i] for i in host]),
+                (gpu, lambda: torch.stack([frames[i].tensor for i in gpu])),
+            ):
+                if not indices:
+                    continue
+                # Run YOLO inference
+                results = self.model(
+                    source(),
+                    conf=self.config.confidence_threshold,
+                    iou=self.config.iou_threshold,
+                    device=self.config.device,
+                    verbose=False
+                )
+                for i, result in zip(indices, results):
+                    outputs[i] = self._parse_result(result, frames[i])
         except Exception as e:
             logger.error(f"YOLO detection error: {e}")
+        return outputs
+
+    def _run_gpu_batch(self, frames: list) -> List[List[Detection]]:
+        """CUDA inference: one forward over the stacked batch, then a single batched_nms kernel"""
+        try:
+            device = self.config.device
+            tensors, letterboxes = [], []
+            for frame in frames:
+                if isinstance(frame, GpuFrame):
+                    tensors.append(frame.tensor)
+                    letterboxes.append((frame.scale, frame.pad, frame.shape[:2]))
+                else:
+                    chw, letterbox = self._letterbox(frame, self.config.imgsz)
+                    tensors.append(torch.from_numpy(chw).to(device, non_blocking=True))
+                    letterboxes.append(letterbox)
+            batch = torch.stack(tensors)
+            batch = batch.half() if self._backend.fp16 else batch.float()
+
+            with torch.inference_mode():
+                preds = self._backend(batch)
+                if isinstance(preds, (list, tuple)):
+                    preds = preds[0]
+                # (B, 4 + num_classes, N) -> (B, N, 4 + num_classes)
+                preds = preds.transpose(1, 2).float()
+                scores, cls_ids = preds[..., 4:].max(dim=-1)
+                frame_idx, box_idx = (scores >= self.config.confidence_threshold).nonzero(as_tuple=True)
+                boxes = preds[frame_idx, box_idx, :4]
+                xyxy = torch.cat([boxes[:, :2] - boxes[:, 2:] / 2, boxes[:, :2] + boxes[:, 2:] / 2], dim=1)
+                scores, cls_ids = scores[frame_idx, box_idx], cls_ids[frame_idx, box_idx]
+                # Offsetting the group id by frame keeps NMS per frame and per class in one kernel
+                keep = batched_nms(xyxy, scores, frame_idx * 1000 + cls_ids, self.config.iou_threshold)
+                # Single device-to-host copy for the whole batch
+                xyxy, scores, cls_ids, frame_idx = (
+                    t[keep].cpu().numpy() for t in (xyxy, scores, cls_ids, frame_idx)
+                )
+
+            outputs = []
+            for i, letterbox in enumerate(letterboxes):
+                sel = frame_idx == i
+                outputs.append(self._build_detections(xyxy[sel], scores[sel], cls_ids[sel].astype(int), letterbox))
+            return outputs
+        except Exception as e:
+            logger.error(f"YOLO detection error: {e}")
+            return [[] for _ in frames]
+
+    def _run_ort_batch(self, frames: List[np.ndarray]) -> List[List[Detection]]:
+        """CPU inference through ONNX Runtime: NumPy letterbox, one session run, NumPy NMS"""
+        try:
+            imgsz = self.config.imgsz
+            batch = np.empty((len(frames), 3, imgsz, imgsz), dtype=np.float32)
+            letterboxes = []
+            for i, frame in enumerate(frames):
+                batch[i], letterbox = self._letterbox(frame, imgsz)
+                letterboxes.append(letterbox)
+
+            # (B, 4 + num_classes, N): cx, cy, w, h then per-class scores
+            preds = self._ort.run(None, {self._ort_input: batch})[0].transpose(0, 2, 1)
+
+            outputs = []
+            for pred, letterbox in zip(preds, letterboxes):
+                scores = pred[:, 4:]
+                cls_ids = scores.argmax(axis=1)
+                confs = scores[np.arange(len(cls_ids)), cls_ids]
+                keep = confs >= self.config.confidence_threshold
+                boxes, confs, cls_ids = pred[keep, :4], confs[keep], cls_ids[keep]
+                xyxy = np.concatenate([boxes[:, :2] - boxes[:, 2:] / 2, boxes[:, :2] + boxes[:, 2:] / 2], axis=1)
+                kept = nms(xyxy, confs, cls_ids, self.config.iou_threshold)
+                outputs.append(self._build_detections(xyxy[kept], confs[kept], cls_ids[kept], letterbox))
+            return outputs
+        except Exception as e:
+            logger.error(f"ONNX Runtime detection error: {e}")
+            return [[] for _ in frames]
+
+    @staticmethod
+    def _letterbox(frame: np.ndarray, imgsz: int):
+        """Resize keeping aspect ratio, pad to imgsz square, and return (CHW float RGB, letterbox info)"""
+        height, width = frame.shape[:2]
+        scale = imgsz / max(height, width)
+        new_h, new_w = round(height * scale), round(width * scale)
+        resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        top, left = (imgsz - new_h) // 2, (imgsz - new_w) // 2
+        padded = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+        padded[top:top + new_h, left:left + new_w] = resized
+        chw = padded[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+        return chw, (scale, (left, top), (height, width))
+
+    def _parse_result(self, result, frame=None) -> List[Detection]:
+        """Convert one frame's YOLO result into target-class detections"""
+        if result.boxes is None or len(result.boxes) == 0:
             return []
+
+        boxes = result.boxes.cpu().numpy()
+        letterbox = None
+        if isinstance(frame, GpuFrame):
+            # GPU frames were letterboxed by us, so boxes come back in model-input coordinates
+            letterbox = (frame.scale, frame.pad, frame.shape[:2])
+        return self._build_detections(boxes.xyxy, boxes.conf, boxes.cls.astype(int), letterbox)
+
+    def _build_detections(self, xyxy: np.ndarray, confs: np.ndarray, cls_ids: np.ndarray,
+                          letterbox: Optional[tuple] = None) -> List[Detection]:
+        """Filter, rank and convert raw box arrays; `letterbox` = (scale, (left, top), (h, w)) to undo"""
+        # Filter for target classes before any per-box work
+        keep = np.isin(cls_ids, self._target_id_array)
+        if not keep.any():
+            return []
+        xyxy = xyxy[keep]
+        confs = confs[keep]
+        cls_ids = cls_ids[keep]
+
+        # Top max_detections by confidence: O(N) partition, then sort only the survivors
+        max_det = self.config.max_detections
+        if len(confs) > max_det:
+            top = np.argpartition(-confs, max_det - 1)[:max_det]
+        else:
+            top = np.arange(len(confs))
+        top = top[np.argsort(-confs[top], kind="stable")]
+        xyxy, confs, cls_ids = xyxy[top], confs[top], cls_ids[top]
+
+        if letterbox is not None:
+            scale, (left, top_pad), (height, width) = letterbox
+            xyxy = (xyxy - np.array([left, top_pad, left, top_pad], dtype=xyxy.dtype)) / scale
+            xyxy = np.clip(xyxy, 0, [width, height, width, height])
+
+        # Derived geometry for every box at once
+        wh = xyxy[:, 2:] - xyxy[:, :2]
+        centers = (xyxy[:, :2] + xyxy[:, 2:]) * 0.5
+        areas = wh[:, 0] * wh[:, 1]
+
+        # One conversion to Python floats per array instead of per element
+        xyxy, wh, centers = xyxy.tolist(), wh.tolist(), centers.tolist()
+        confs, areas, cls_ids = confs.tolist(), areas.tolist(), cls_ids.tolist()
+
+        detections = []
+        for i, class_id in enumerate(cls_ids):
+            x1, y1, x2, y2 = xyxy[i]
+            detections.append(Detection(
+                class_name=self._id_to_name[class_id],
+                confidence=confs[i],
+                bbox={
+                    "x1": x1, "y1": y1, "x2": x2, "y2": y2,
+                    "width": wh[i][0], "height": wh[i][1]
+                },
+                center={"x": centers[i][0], "y": centers[i][1]},
+                area=areas[i]
+            ))
+        return detections
     
-    async def _mock_detection(self, frame: np.ndarray) -> List[Detection]:
+    def _mock_detection(self, frame: np.ndarray) -> List[Detection]:
         """Mock detection for testing when YOLO is not available"""
-        import random
-        
         height, width = frame.shape[:2]
-        detections = []
-        
-        # Generate mock detections
-        mock_objects = [
-            {"class": "hand", "count": random.randint(0, 2)},
-            {"class": "person", "count": random.randint(0, 1)},
-            {"class": "pizza", "count": random.randint(0, 1)},
-            {"class": "scooper", "count": random.randint(0, 1)}
+        rng = self._rng
+
+        # How many of each class to fake this frame, in one draw
+        counts = rng.integers(0, MOCK_MAX_COUNTS + 1)
+        class_idx = np.repeat(np.arange(len(MOCK_CLASSES)), counts)
+        n = len(class_idx)
+        if n == 0:
+            return []
+
+        # Random but realistic box sizes per class
+        w = rng.integers(MOCK_W_RANGE[class_idx, 0], MOCK_W_RANGE[class_idx, 1] + 1)
+        h = rng.integers(MOCK_H_RANGE[class_idx, 0], MOCK_H_RANGE[class_idx, 1] + 1)
+        x1 = rng.integers(0, np.maximum(1, width - w) + 1)
+        y1 = rng.integers(0, np.maximum(1, height - h) + 1)
+        x2, y2 = x1 + w, y1 + h
+        # Scoopers are often harder to detect, so they get a lower confidence range
+        confidence = rng.uniform(MOCK_CONF_RANGE[class_idx, 0], MOCK_CONF_RANGE[class_idx, 1])
+
+        cx, cy, area = ((x1 + x2) / 2).tolist(), ((y1 + y2) / 2).tolist(), (w * h).tolist()
+        x1, y1, x2, y2 = x1.tolist(), y1.tolist(), x2.tolist(), y2.tolist()
+        confidence = confidence.tolist()
+        return [
+            Detection(
+                class_name=MOCK_CLASSES[c],
+                confidence=confidence[i],
+                bbox={"x1": x1[i], "y1": y1[i], "x2": x2[i], "y2": y2[i]},
+                center={"x": cx[i], "y": cy[i]},
+                area=area[i]
+            )
+            for i, c in enumerate(class_idx.tolist())
         ]
-        
-        for obj in mock_objects:
-            for _ in range(obj["count"]):
-                # Generate random but realistic bounding box
-                if obj["class"] == "person":
-                    w, h = random.randint(100, 200), random.randint(200, 400)
-                elif obj["class"] == "pizza":
-                    w, h = random.randint(80, 150), random.randint(80, 150)
-                elif obj["class"] == "hand":
-                    w, h = random.randint(30, 60), random.randint(30, 60)
-                else:  # scooper
-                    w, h = random.randint(20, 40), random.randint(60, 100)
-                
-                x1 = random.randint(0, max(1, width - w))
-                y1 = random.randint(0, max(1, height - h))
-                x2 = x1 + w
-                y2 = y1 + h
-                
-                # Generate realistic confidence values based on object type
-                if obj["class"] == "scooper":
-                    # Scoopers are often harder to detect, use lower confidence range
-                    confidence = random.uniform(0.2, 0.7)
-                else:
-                    # Other objects maintain higher confidence
-                    confidence = random.uniform(0.6, 0.95)
-
-                detection = Detection(
-                    class_name=obj["class"],
-                    confidence=confidence,
-                    bbox={"x1": x1, "y1": y1, "x2": x2, "y2": y2},
-                    center={"x": (x1 + x2) / 2, "y": (y1 + y2) / 2},
-                    area=w * h
-                )
-                detections.append(detection)
-        
-        return detections
     
     def get_model_info(self) -> Dict[str, Any]:
         """Get model information"""
@@ -296,6 +817,12 @@ class PizzaStoreDetector:
 config = DetectionConfig()
 detector = PizzaStoreDetector(config)
 
+@app.on_event("startup")
+async def load_detector_model():
+    # Loaded per worker process at startup, not at import, so the uvicorn supervisor
+    # that only spawns workers never holds a copy of the model
+    detector.load_model()
+
 # API Endpoints
 @app.get("/health")
 async def health_check():
@@ -308,10 +835,30 @@ async def health_check():
         "yolo_available": YOLO_AVAILABLE
     }
 
-@app.post("/detect", response_model=DetectionResponse)
+@app.post("/detect")
 async def detect_objects(request: DetectionRequest):
     """Perform object detection on frame"""
-    return await detector.detect_objects(request)
+    # Returned as a Response so FastAPI skips its jsonable_encoder pass over the detections
+    return ORJSONResponse(await detector.detect_objects(request))
+
+@app.post("/detect_raw")
+async def detect_objects_raw(file: UploadFile = File(...), frame_id: str = Form(...)):
+    """Perform object detection on an uploaded image, skipping base64 and JSON encoding"""
+    return ORJSONResponse(await detector.detect_image(frame_id, await file.read()))
+
+@app.post("/detect_raw_batch")
+async def detect_objects_raw_batch(files: List[UploadFile] = File(...), frame_ids: List[str] = Form(...)):
+    """Perform object detection on several uploaded images; they share batched forward passes"""
+    if len(files) != len(frame_ids):
+        raise HTTPException(status_code=400, detail="files and frame_ids must have the same length")
+    images = [await file.read() for file in files]
+    results = await asyncio.gather(*(detector.detect_image(frame_id, image) for frame_id, image in zip(frame_ids, images)))
+    return ORJSONResponse({"results": results})
+
+@app.post("/detect_shm")
+async def detect_objects_shm(request: ShmDetectionRequest):
+    """Perform object detection on a decoded frame handed over through shared memory"""
+    return ORJSONResponse(await detector.detect_shm(request))
 
 @app.get("/model_info")
 async def get_model_info():
@@ -324,4 +871,13 @@ async def get_model_info():
 
 if __name__ == "__main__":
     logger.info("Starting Detection Service")
-    uvicorn.run(app, host="0.0.0.0", port=8002)
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8002,
+        # uvloop/httptools when installed (uvicorn[standard]), asyncio otherwise
+        loop="auto",
+        http="auto",
+        # Each worker loads its own model; on a GPU, run CUDA MPS so workers share the device
+        workers=int(os.getenv("WORKERS", "2"))
+    )
@@ -0,0 +1,63 @@
+"""
+Geometry Kernels for the Frame Reader Service
+Point-in-polygon tests over detection arrays, JIT-compiled with Numba when installed
+"""
+
+import logging
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def point_in_poly_batch(poly_xs, poly_ys, cx, cy, out):
+        """Crossing-number test of every (cx[i], cy[i]) against one polygon, written into out"""
+        m = poly_xs.shape[0]
+        for i in prange(cx.shape[0]):
+            x = cx[i]
+            y = cy[i]
+            inside = False
+            j = m - 1
+            for k in range(m):
+                yk = poly_ys[k]
+                yj = poly_ys[j]
+                if (yk > y) != (yj > y):
+                    x_cross = poly_xs[k] + (y - yk) * (poly_xs[j] - poly_xs[k]) / (yj - yk)
+                    if x <= x_cross:
+                        inside = not inside
+                j = k
+            out[i] = inside
+else:
+    def point_in_poly_batch(poly_xs, poly_ys, cx, cy, out):
+        """NumPy fallback: same test broadcast over an (N, M) point/edge grid"""
+        qx, qy = np.roll(poly_xs, 1), np.roll(poly_ys, 1)
+        y = cy[:, None]
+        straddles = (poly_ys > y) != (qy > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_cross = poly_xs + (y - poly_ys) * (qx - poly_xs) / (qy - poly_ys)
+        out[:] = np.count_nonzero(straddles & (cx[:, None] <= x_cross), axis=1) % 2 == 1
+
+def points_in_polygon(xs: np.ndarray, ys: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """Boolean mask of which of the N points lie inside an (M, 2) polygon"""
+    out = np.empty(len(xs), dtype=np.bool_)
+    point_in_poly_batch(
+        np.ascontiguousarray(polygon[:, 0], dtype=np.float32),
+        np.ascontiguousarray(polygon[:, 1], dtype=np.float32),
+        np.ascontiguousarray(xs, dtype=np.float32),
+        np.ascontiguousarray(ys, dtype=np.float32),
+        out,
+    )
+    return out
+
+def warmup():
+    """Compile (or load from cache) the kernels so the first frame isn't JIT-delayed"""
+    triangle = np.array([[0, 0], [10, 0], [0, 10]], dtype=np.float32)
+    points_in_polygon(np.array([1.0, 20.0], dtype=np.float32), np.array([1.0, 20.0], dtype=np.float32), triangle)
+    logger.info(f"📐 Geometry kernels ready ({'Numba JIT' if NUMBA_AVAILABLE else 'NumPy'})")
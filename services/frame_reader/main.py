@@ -6,26 +6,137 @@ Handles video ingestion from cameras/files and publishes frames to message broke
 
 import os
 import cv2
-import json
+import time
+import queue
 import base64
+import random
+import struct
 import asyncio
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List, Set, Tuple
 from pathlib import Path
 
+import httpx
+import orjson
+import numpy as np
 import aiofiles
 from fastapi import FastAPI, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
 import uvicorn
 
+import geom
+
+try:
+    from aiokafka import AIOKafkaProducer
+    AIOKAFKA_AVAILABLE = True
+except ImportError:
+    AIOKAFKA_AVAILABLE = False
+
+try:
+    import lz4  # noqa: F401 -- aiokafka needs it for compression_type="lz4"
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+try:
+    from nvjpeg import NvJpeg
+    NVJPEG_AVAILABLE = True
+except ImportError:
+    NVJPEG_AVAILABLE = False
+
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
+# Frame encoding on the wire: WebP is ~30% smaller than JPEG at similar visual quality;
+# FRAME_ENCODING=jpeg trades that for nvJPEG GPU encoding and JPEG-only GPU decode downstream
+FRAME_ENCODING = os.getenv("FRAME_ENCODING", "webp").lower()
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+if FRAME_ENCODING == "webp":
+    FRAME_EXT, FRAME_MIME, FRAME_QUALITY = ".webp", "image/webp", WEBP_QUALITY
+    FRAME_ENCODE_PARAMS = [cv2.IMWRITE_WEBP_QUALITY, WEBP_QUALITY]
+else:
+    FRAME_EXT, FRAME_MIME, FRAME_QUALITY = ".jpg", "image/jpeg", JPEG_QUALITY
+    FRAME_ENCODE_PARAMS = [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY]
+
+# Binary WebSocket frame: frame_number (u64), timestamp_ns (u64), image length (u32), then the encoded image
+FRAME_HEADER = struct.Struct("<QQI")
+JSON_HEADERS = {"Content-Type": "application/json"}
+FRAME_METADATA = {"encoding": FRAME_ENCODING, "quality": FRAME_QUALITY}
+
+# Detection micro-batching: frames in flight are sent together, up to this many per request
+DETECTION_BATCH_SIZE = int(os.getenv("DETECTION_BATCH_SIZE", "8"))
+DETECTION_BATCH_WAIT_MS = float(os.getenv("DETECTION_BATCH_WAIT_MS", "40"))
+
+# Frames queued per WebSocket client before newer frames are dropped for that client
+WS_SEND_BUFFER = int(os.getenv("WS_SEND_BUFFER", "2"))
+
+# ROIs change on human timescales; refetch at most this often (conditional GET)
+ROI_CACHE_TTL = float(os.getenv("ROI_CACHE_TTL", "2.0"))
+
+# Shared async HTTP client so per-frame service calls reuse keep-alive connections
+# DOWNSTREAM_HTTP2=1 uses h2 prior knowledge; uvicorn/Flask services only speak HTTP/1.1, hence off by default
+DOWNSTREAM_HTTP2 = os.getenv("DOWNSTREAM_HTTP2", "0") == "1"
+http_client = httpx.AsyncClient(
+    timeout=10.0,
+    limits=httpx.Limits(max_keepalive_connections=32),
+    http1=not DOWNSTREAM_HTTP2,
+    http2=DOWNSTREAM_HTTP2
+)
+
 # FastAPI app
 app = FastAPI(title="Frame Reader Service", version="1.0.0")
 
+# Class ids for the struct-of-arrays detection layout (aliases as in the violation detector)
+CLASS_IDS = {
+    "hand": 0, "hands": 0,
+    "person": 1, "people": 1,
+    "scooper": 2, "scoopers": 2, "spoon": 2, "utensil": 2,
+}
+HAND_CLASS_ID = 0
+
+def detections_to_soa(detections: List[Dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Detections as arrays: bboxes (N, 4) float32, class ids (N,) int8, confidences (N,) float32"""
+    n = len(detections)
+    bboxes = np.array(
+        [(b["x1"], b["y1"], b["x2"], b["y2"]) for b in (d["bbox"] for d in detections)],
+        dtype=np.float32,
+    ).reshape(n, 4)
+    classes = np.fromiter((CLASS_IDS.get(d["class_name"].lower(), -1) for d in detections), dtype=np.int8, count=n)
+    confs = np.fromiter((d.get("confidence") or 0.0 for d in detections), dtype=np.float32, count=n)
+    return bboxes, classes, confs
+
+def roi_region(roi: Dict) -> Optional[Tuple[str, np.ndarray]]:
+    """ROI geometry as ("rect", [x1, y1, x2, y2]) or ("poly", (M, 2)), parsed like the violation detector does"""
+    coordinates = roi.get("coordinates") or []
+    if len(coordinates) >= 4:
+        points = np.asarray(coordinates, dtype=np.float32)[:, :2]
+        x, y = points.min(axis=0)
+        width, height = points.max(axis=0) - (x, y)
+    else:
+        points = np.asarray([(p["x"], p["y"]) for p in roi.get("points") or []], dtype=np.float32)
+        x = y = width = height = None
+
+    x, y = roi.get("x", x), roi.get("y", y)
+    shape = roi.get("shape", "rectangle")
+    if shape == "rectangle" and x is not None and y is not None:
+        width, height = roi.get("width", width) or 0, roi.get("height", height) or 0
+        return "rect", np.array([x, y, x + width, y + height], dtype=np.float32)
+    if shape == "polygon" and len(points):
+        return "poly", points
+    return None
+
+def points_in_region(xs: np.ndarray, ys: np.ndarray, region: Tuple[str, np.ndarray]) -> np.ndarray:
+    kind, geometry = region
+    if kind == "rect":
+        x1, y1, x2, y2 = geometry
+        return (xs >= x1) & (xs <= x2) & (ys >= y1) & (ys <= y2)
+    return geom.points_in_polygon(xs, ys, geometry)
+
 class VideoSource(BaseModel):
     source_type: str  # "file", "rtsp", "webcam"
     source_path: str
@@ -33,6 +144,42 @@ class VideoSource(BaseModel):
     resolution: tuple = (1920, 1080)
     session_id: str = None
 
+def gpu_decode_available() -> bool:
+    """True when OpenCV was built with cudacodec and sees a CUDA device"""
+    try:
+        return hasattr(cv2, "cudacodec") and cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except cv2.error:
+        return False
+
+class GpuVideoCapture:
+    """NVDEC reader exposing the subset of the cv2.VideoCapture API used here; frames are GpuMat"""
+    def __init__(self, path: str, target_size: Optional[Tuple[int, int]] = None):
+        # targetSz makes NVDEC scale during decode, so frames come out at the requested resolution
+        params = cv2.cudacodec.VideoReaderInitParams()
+        if target_size:
+            params.targetSz = tuple(target_size)
+        self.reader = cv2.cudacodec.createVideoReader(path, params=params)
+        self.reader.set(cv2.cudacodec.ColorFormat_BGR)
+        self.format = self.reader.format()
+        self.size = tuple(target_size) if target_size else (self.format.width, self.format.height)
+
+    def isOpened(self) -> bool:
+        return self.reader is not None
+
+    def get(self, prop_id: int) -> float:
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.size[0]
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.size[1]
+        ok, value = self.reader.get(prop_id)
+        return value if ok else 0.0
+
+    def read(self):
+        return self.reader.nextFrame()
+
+    def release(self):
+        self.reader = None
+
 class FrameReaderConfig:
     """Configuration for frame reader service"""
     def __init__(self):
@@ -40,6 +187,15 @@ class FrameReaderConfig:
         self.frame_topic = os.getenv("FRAME_TOPIC", "video_frames")
         self.max_frame_size = int(os.getenv("MAX_FRAME_SIZE", "1048576"))  # 1MB
         self.buffer_size = int(os.getenv("BUFFER_SIZE", "100"))
+        self.publish_frames = os.getenv("PUBLISH_FRAMES", "true").lower() == "true"
+        self.kafka_compression = os.getenv("KAFKA_COMPRESSION", "lz4") or None
+
+        # Decode file/RTSP sources on NVDEC when available, CPU VideoCapture otherwise
+        self.use_gpu_decode = os.getenv("GPU_DECODE", "true").lower() == "true" and gpu_decode_available()
+        # Without cudacodec, RTSP can still use FFmpeg's cuvid decoder on NVIDIA hosts
+        self.rtsp_cuvid = os.getenv("RTSP_CUVID", "false").lower() == "true"
+        # JPEG encode via nvJPEG (only with FRAME_ENCODING=jpeg), cv2.imencode otherwise
+        self.gpu_jpeg_encode = os.getenv("GPU_JPEG_ENCODE", "true").lower() == "true"
 
         # Set video storage path relative to project root
         current_dir = Path(__file__).parent  # services/frame_reader/
@@ -48,44 +204,80 @@ class FrameReaderConfig:
         self.video_storage_path.mkdir(exist_ok=True)
 
         logger.info(f"📁 Video storage path: {self.video_storage_path.absolute()}")
+        logger.info(f"🎞️ Video decode: {'NVDEC (cudacodec)' if self.use_gpu_decode else 'CPU'}")
 
 class ConnectionManager:
     """Manages WebSocket connections"""
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
-        self.session_connections: Dict[str, List[WebSocket]] = {}
+        self.active_connections: Set[WebSocket] = set()
+        self.session_connections: Dict[str, Set[WebSocket]] = {}
+        # Per-socket outbox + sender task so one slow client never holds up the others
+        self._outboxes: Dict[WebSocket, asyncio.Queue] = {}
+        self._senders: Dict[WebSocket, asyncio.Task] = {}
 
     async def connect(self, websocket: WebSocket, session_id: str = None):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections.add(websocket)
         if session_id:
-            if session_id not in self.session_connections:
-                self.session_connections[session_id] = []
-            self.session_connections[session_id].append(websocket)
+            self.session_connections.setdefault(session_id, set()).add(websocket)
+        outbox = asyncio.Queue(maxsize=WS_SEND_BUFFER)
+        self._outboxes[websocket] = outbox
+        self._senders[websocket] = asyncio.create_task(self._sender(websocket, session_id, outbox))
         logger.info(f"WebSocket connected. Session: {session_id}, Total connections: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket, session_id: str = None):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        self.active_connections.discard(websocket)
         if session_id and session_id in self.session_connections:
-            if websocket in self.session_connections[session_id]:
-                self.session_connections[session_id].remove(websocket)
+            self.session_connections[session_id].discard(websocket)
             if not self.session_connections[session_id]:
                 del self.session_connections[session_id]
+        self._outboxes.pop(websocket, None)
+        sender = self._senders.pop(websocket, None)
+        if sender and sender is not asyncio.current_task():
+            sender.cancel()
         logger.info(f"WebSocket disconnected. Session: {session_id}, Total connections: {len(self.active_connections)}")
 
+    async def _sender(self, websocket: WebSocket, session_id: str, outbox: asyncio.Queue):
+        """Drain one socket's outbox in order; a failed send drops the connection"""
+        while True:
+            payloads = await outbox.get()
+            try:
+                for payload in payloads:
+                    if isinstance(payload, bytes):
+                        await websocket.send_bytes(payload)
+                    else:
+                        await websocket.send_text(payload)
+            except Exception:
+                self.disconnect(websocket, session_id)
+                return
+
     async def send_to_session(self, session_id: str, message: dict):
-        if session_id in self.session_connections:
-            disconnected = []
-            for connection in self.session_connections[session_id]:
+        """Queue a control message for every client of the session, evicting a queued frame if needed"""
+        sockets = self.session_connections.get(session_id)
+        if sockets:
+            # Serialize once for all clients; numpy values from detections pass through as-is
+            payload = orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+            for ws in sockets:
+                outbox = self._outboxes.get(ws)
+                if outbox is None:
+                    continue
+                if outbox.full():
+                    outbox.get_nowait()
+                outbox.put_nowait((payload,))
+
+    def send_frame_to_session(self, session_id: str, packet: bytes, message: dict):
+        """Queue a binary frame plus its JSON message; clients still sending older frames skip this one"""
+        sockets = self.session_connections.get(session_id)
+        if sockets:
+            payloads = (packet, orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY).decode())
+            for ws in sockets:
+                outbox = self._outboxes.get(ws)
+                if outbox is None:
+                    continue
                 try:
-                    await connection.send_text(json.dumps(message))
-                except:
-                    disconnected.append(connection)
-
-            # Remove disconnected connections
-            for conn in disconnected:
-                self.disconnect(conn, session_id)
+                    outbox.put_nowait(payloads)
+                except asyncio.QueueFull:
+                    logger.debug("Dropping frame for slow WebSocket client in session %s", session_id)
 
 class FrameReader:
     """Advanced frame reader with multiple source support"""
@@ -95,15 +287,65 @@ class FrameReader:
         self.is_reading = False
         self.current_source = None
         self.frame_count = 0
-        self.start_time = None
+        self.start_time: Optional[float] = None  # time.monotonic() at start
         self.current_session_id = None
-        
+        # The run's pipeline task; a new /start waits until the previous run has fully drained
+        self._reader_task: Optional[asyncio.Task] = None
+        # Per-session message parts shared by every frame (see _build_message_templates)
+        self._frame_id_prefix = ""
+        self._source_info: Dict[str, Any] = {}
+        self._frame_info: Dict[str, Any] = {}
+        self._roi_cache: List[Dict] = []
+        self._roi_etag: Optional[str] = None
+        self._roi_fetched = 0.0
+        self._roi_regions: List[Tuple[str, np.ndarray]] = []
+        self._roi_regions_src: Optional[List[Dict]] = None
+        self._roi_mask = np.zeros((0, 0), dtype=np.uint8)
+        self._roi_exit_pending = False
+        self._producer = None
+        self._jpeg_encoder = self._create_jpeg_encoder()
+        self._jpeg_lock = threading.Lock()  # nvJPEG handles aren't thread-safe; encode workers share one
+        # Encoding releases the GIL inside OpenCV/nvJPEG, so it runs off the event loop
+        self._encode_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="frame-encode")
+
+    def _create_jpeg_encoder(self):
+        """Create the persistent nvJPEG encoder, or None to encode on the CPU"""
+        if not (NVJPEG_AVAILABLE and self.config.gpu_jpeg_encode):
+            return None
+        if FRAME_ENCODING != "jpeg":
+            logger.info(f"ℹ️ nvJPEG encoding needs FRAME_ENCODING=jpeg (currently {FRAME_ENCODING}), encoding frames on CPU")
+            return None
+        try:
+            encoder = NvJpeg()
+            logger.info("🚀 Using nvJPEG for frame encoding")
+            return encoder
+        except Exception as e:
+            logger.warning(f"⚠️ nvJPEG unavailable, encoding frames on CPU: {e}")
+            return None
+
+    def _encode_frame(self, frame) -> bytes:
+        """Encode a BGR frame as FRAME_ENCODING (JPEG on the GPU when possible)"""
+        # pynvjpeg only takes host arrays, so NVDEC frames are downloaded here (after the
+        # on-device resize); nvJPEG then uploads again for the encode itself
+        if isinstance(frame, cv2.cuda.GpuMat):
+            frame = frame.download()
+        encoder = self._jpeg_encoder
+        if encoder is not None:
+            try:
+                with self._jpeg_lock:
+                    return encoder.encode(frame, JPEG_QUALITY)
+            except Exception as e:
+                logger.warning(f"⚠️ nvJPEG encode failed, switching to CPU encoding: {e}")
+                self._jpeg_encoder = None
+        _, buffer = cv2.imencode(FRAME_EXT, frame, FRAME_ENCODE_PARAMS)
+        return buffer.tobytes()
+
     async def start_reading(self, source: VideoSource, session_id: str = None) -> Dict[str, Any]:
         """Start reading frames from video source"""
         try:
             logger.info(f"🎬 Starting video reading - Source: {source.source_path}, FPS: {source.fps}, Session: {session_id}")
 
-            if self.is_reading:
+            if self.is_reading or (self._reader_task is not None and not self._reader_task.done()):
                 logger.warning("⚠️ Already reading from a source")
                 raise HTTPException(status_code=400, detail="Already reading from a source")
 
@@ -115,9 +357,10 @@ class FrameReader:
                 raise HTTPException(status_code=400, detail=error_msg)
 
             self.current_source = source
+            self._build_message_templates(source)
             self.is_reading = True
             self.frame_count = 0
-            self.start_time = datetime.now()
+            self.start_time = time.monotonic()
             self.current_session_id = session_id
 
             # Get video properties
@@ -129,7 +372,7 @@ class FrameReader:
             logger.info(f"📹 Video properties - Total frames: {total_frames}, Original FPS: {video_fps}, Resolution: {width}x{height}")
 
             # Start frame reading task
-            asyncio.create_task(self._read_frames_loop(cap, source))
+            self._reader_task = asyncio.create_task(self._read_frames_loop(cap, source, session_id))
 
             result = {
                 "status": "started",
@@ -152,84 +395,111 @@ class FrameReader:
             logger.error(f"❌ Failed to start reading: {e}")
             raise HTTPException(status_code=500, detail=str(e))
     
+    def _open_capture(self, path: str, resolution: Tuple[int, int]):
+        """Open a file/RTSP source on NVDEC, falling back to CPU decode"""
+        if self.config.use_gpu_decode:
+            try:
+                cap = GpuVideoCapture(path, resolution)
+                logger.info(f"🚀 Using NVDEC hardware decode for {path}")
+                return cap
+            except cv2.error as e:
+                logger.warning(f"⚠️ NVDEC decode failed for {path}, falling back to CPU: {e}")
+        return self._request_output_size(cv2.VideoCapture(path), resolution)
+
+    @staticmethod
+    def _request_output_size(cap: cv2.VideoCapture, resolution: Tuple[int, int]) -> cv2.VideoCapture:
+        """Ask the CPU backend to output the target size; sources that ignore it are resized per frame"""
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, resolution[0])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, resolution[1])
+        return cap
+
+    def _build_message_templates(self, source: VideoSource):
+        """Build the per-session parts of frame messages once instead of per frame"""
+        self._frame_id_prefix = f"{source.source_path}_"
+        self._source_info = {
+            "type": source.source_type,
+            "path": source.source_path,
+            "fps": source.fps,
+            "resolution": source.resolution
+        }
+        self._frame_info = {
+            "dimensions": source.resolution,
+            "fps": source.fps
+        }
+
     async def _initialize_capture(self, source: VideoSource) -> cv2.VideoCapture:
         """Initialize video capture based on source type"""
         logger.info(f"🔧 Initializing capture for {source.source_type}: {source.source_path}")
 
         if source.source_type == "file":
-            # Get the project root directory (go up from services/frame_reader to project root)
-            current_dir = Path(__file__).parent  # services/frame_reader/
-            project_root = current_dir.parent.parent  # Go up two levels to project root
-
-            # Try multiple possible paths, prioritizing project root
-            possible_paths = [
-                project_root / "videos" / source.source_path,  # Project root videos directory
-                Path(source.source_path),  # Absolute path
-                self.config.video_storage_path / source.source_path,  # Config path
-                current_dir / "videos" / source.source_path,  # Local videos dir
-                current_dir / source.source_path,  # Current directory
-                Path("videos") / source.source_path,  # Relative to current working dir
-                Path("../videos") / source.source_path,  # One level up
-                Path("../../videos") / source.source_path,  # Two levels up
-            ]
-
-            logger.info(f"🗂️ Project root detected: {project_root.absolute()}")
-            logger.info(f"📁 Looking for video: {source.source_path}")
-
-            video_path = None
-            for i, path in enumerate(possible_paths):
-                logger.info(f"🔍 [{i+1}/{len(possible_paths)}] Checking: {path.absolute()}")
-                if path.exists() and path.is_file():
-                    video_path = path
-                    logger.info(f"✅ Found video file at: {video_path.absolute()}")
-                    logger.info(f"📊 File size: {video_path.stat().st_size} bytes")
-                    break
-                else:
-                    logger.info(f"❌ Not found: {path.absolute()}")
+            # Absolute paths are used as-is; bare names resolve against the videos directory
+            # (project root first, then the working directory)
+            path = Path(source.source_path).expanduser()
+            if path.is_absolute():
+                candidates = [path]
+            else:
+                candidates = [self.config.video_storage_path / path, Path.cwd() / "videos" / path]
+            video_path = next((candidate for candidate in candidates if candidate.is_file()), None)
 
             if not video_path:
-                # List what's actually in the directories for debugging
-                logger.error(f"🔍 Debug: Listing directory contents...")
-                videos_dir = project_root / "videos"
-                if videos_dir.exists():
-                    files = list(videos_dir.iterdir())
-                    logger.error(f"📁 Files in {videos_dir}: {[f.name for f in files]}")
-                else:
-                    logger.error(f"📁 Videos directory doesn't exist: {videos_dir}")
-
-                error_msg = f"Video file not found: {source.source_path}. Tried {len(possible_paths)} paths."
+                videos_dir = self.config.video_storage_path
+                available = [f.name for f in videos_dir.iterdir()] if videos_dir.is_dir() else []
+                error_msg = (f"Video file not found: {source.source_path}. "
+                             f"Tried {[str(c) for c in candidates]}; available in {videos_dir}: {available}")
                 logger.error(f"❌ {error_msg}")
                 raise FileNotFoundError(error_msg)
 
-            return cv2.VideoCapture(str(video_path))
+            logger.info(f"✅ Found video file at: {video_path.absolute()}")
+            return self._open_capture(str(video_path), source.resolution)
 
         elif source.source_type == "rtsp":
             logger.info(f"📡 Connecting to RTSP stream: {source.source_path}")
-            return cv2.VideoCapture(source.source_path)
+            if not self.config.rtsp_cuvid or self.config.use_gpu_decode:
+                return self._open_capture(source.source_path, source.resolution)
+            # OpenCV reads this when the capture opens; restore it so later file sources aren't forced onto CUVID
+            previous = os.environ.get("OPENCV_FFMPEG_CAPTURE_OPTIONS")
+            os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = "video_codec;h264_cuvid"
+            try:
+                return self._open_capture(source.source_path, source.resolution)
+            finally:
+                if previous is None:
+                    del os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"]
+                else:
+                    os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = previous
 
         elif source.source_type == "webcam":
             camera_id = int(source.source_path) if source.source_path.isdigit() else 0
             logger.info(f"📷 Opening webcam: {camera_id}")
-            return cv2.VideoCapture(camera_id)
+            return self._request_output_size(cv2.VideoCapture(camera_id), source.resolution)
 
         else:
             error_msg = f"Unsupported source type: {source.source_type}"
             logger.error(f"❌ {error_msg}")
             raise ValueError(error_msg)
     
-    async def _read_frames_loop(self, cap: cv2.VideoCapture, source: VideoSource):
-        """Main frame reading loop"""
+    async def _read_frames_loop(self, cap: cv2.VideoCapture, source: VideoSource, session_id: Optional[str]):
+        """Main frame reading loop: decode thread -> encode/detect -> WebSocket writer"""
+        read_q: queue.Queue = queue.Queue(maxsize=self.config.buffer_size)
+        # Pipeline queues are per run, so nothing a draining run does can touch the next one
+        write_q: asyncio.Queue = asyncio.Queue(maxsize=self.config.buffer_size)
+        writer = asyncio.create_task(self._websocket_writer(write_q, session_id))
+        # Frames awaiting detection (bounded, so at most one batch is in flight), finished in order
+        in_flight: asyncio.Queue = asyncio.Queue(maxsize=DETECTION_BATCH_SIZE)
+        det_in: asyncio.Queue = asyncio.Queue()
+        batcher = asyncio.create_task(self._detection_batcher(det_in))
+        analyzer = asyncio.create_task(self._analysis_stage(in_flight, write_q))
+        decoder = None
         try:
             logger.info(f"🎬 Starting frame reading loop - FPS: {source.fps}")
 
             # Get video properties for frame skipping
             video_fps = cap.get(cv2.CAP_PROP_FPS)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
 
             # Calculate frame skip for FPS control (for file processing)
             if source.source_type == "file":
                 # Skip frames to achieve desired FPS instead of sleeping
                 frame_skip = max(1, int(video_fps / source.fps))
+                frame_interval = 0.0
                 logger.info(f"⚡ Fast file processing mode - Original FPS: {video_fps}, Target FPS: {source.fps}, Frame skip: {frame_skip}")
             else:
                 # For live streams, use time-based control
@@ -237,9 +507,67 @@ class FrameReader:
                 frame_interval = 1.0 / source.fps
                 logger.info(f"⏱️ Live stream mode - Frame interval: {frame_interval:.3f}s")
 
-            frame_count = 0
+            decoder = threading.Thread(
+                target=self._decode_frames,
+                args=(cap, source, read_q, frame_skip, frame_interval),
+                name="frame-decoder",
+                daemon=True,
+            )
+            decoder.start()
+
             processed_count = 0
+            while self.is_reading:
+                try:
+                    frame = await asyncio.to_thread(read_q.get, timeout=1.0)
+                except queue.Empty:
+                    if decoder.is_alive():
+                        continue
+                    break
+                if frame is None:
+                    break
+
+                # Process and publish frame
+                processed_count += 1
+                self.frame_count = processed_count  # Update global frame count
+                await self._process_frame(frame, source, session_id, in_flight, det_in)
 
+        except Exception as e:
+            logger.error(f"❌ Error in frame reading loop: {e}")
+        finally:
+            self.is_reading = False
+            if decoder:
+                await asyncio.to_thread(decoder.join)
+            else:
+                cap.release()
+
+            # Finish frames still awaiting detection, then let the writer flush
+            # queued frames before the completion message
+            await in_flight.put(None)
+            await analyzer
+            batcher.cancel()
+            await write_q.put(None)
+            await writer
+            if self._producer is not None:
+                await self._producer.flush()
+
+            # Send completion message
+            if session_id:
+                completion_message = {
+                    "type": "processing_complete",
+                    "session_id": session_id,
+                    "total_frames": self.frame_count,
+                    "message": "Video processing completed"
+                }
+                await manager.send_to_session(session_id, completion_message)
+
+            logger.info(f"🏁 Frame reading stopped - Total frames processed: {self.frame_count}")
+
+    def _decode_frames(self, cap, source: VideoSource, read_q: queue.Queue, frame_skip: int, frame_interval: float):
+        """Decode stage (runs in its own thread): read, skip and resize frames into read_q"""
+        frame_count = 0
+        processed_count = 0
+        on_gpu = isinstance(cap, GpuVideoCapture)
+        try:
             while self.is_reading:
                 ret, frame = cap.read()
                 if not ret:
@@ -253,110 +581,121 @@ class FrameReader:
                     continue
 
                 processed_count += 1
-                logger.info(f"📸 Processing frame {processed_count} (video frame {frame_count})")
+                logger.debug("📸 Processing frame %d (video frame %d)", processed_count, frame_count)
 
-                # Resize frame if needed
-                original_size = (frame.shape[1], frame.shape[0])
+                # Resize frame if the decoder didn't already output the target size
+                original_size = frame.size() if on_gpu else (frame.shape[1], frame.shape[0])
                 if source.resolution != original_size:
-                    logger.info(f"🔄 Resizing frame from {original_size} to {source.resolution}")
-                    frame = cv2.resize(frame, source.resolution)
+                    logger.debug("🔄 Resizing frame from %s to %s", original_size, source.resolution)
+                    frame = cv2.cuda.resize(frame, source.resolution) if on_gpu else cv2.resize(frame, source.resolution)
 
-                # Process and publish frame
-                self.frame_count = processed_count  # Update global frame count
-                await self._process_frame(frame, source)
+                if not self._enqueue_frame(read_q, frame):
+                    break
 
                 # Only sleep for live streams, not file processing
-                if source.source_type != "file":
-                    await asyncio.sleep(frame_interval)
+                if frame_interval:
+                    time.sleep(frame_interval)
 
                 # Log progress every 10 processed frames
                 if processed_count % 10 == 0:
-                    logger.info(f"📊 Processed {processed_count} frames ({frame_count} total frames read)")
+                    logger.debug("📊 Decoded %d frames (%d total frames read)", processed_count, frame_count)
 
         except Exception as e:
-            logger.error(f"❌ Error in frame reading loop: {e}")
+            logger.error(f"❌ Error decoding frames: {e}")
         finally:
             cap.release()
-            self.is_reading = False
+            self._enqueue_frame(read_q, None)
 
-            # Send completion message
-            if self.current_session_id:
-                completion_message = {
-                    "type": "processing_complete",
-                    "session_id": self.current_session_id,
-                    "total_frames": self.frame_count,
-                    "message": "Video processing completed"
-                }
-                await manager.send_to_session(self.current_session_id, completion_message)
+    def _enqueue_frame(self, read_q: queue.Queue, item) -> bool:
+        """Blocking put (back-pressure) that gives up once reading stops"""
+        while True:
+            try:
+                read_q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                if not self.is_reading:
+                    return False
+
+    async def _analysis_stage(self, in_flight: asyncio.Queue, write_q: asyncio.Queue):
+        """Finish frames in arrival order once their detections are back"""
+        while True:
+            item = await in_flight.get()
+            if item is None:
+                break
+            frame_message, detection = item
+            await self._send_frame_to_websocket(frame_message, detection, write_q)
 
-            logger.info(f"🏁 Frame reading stopped - Total frames processed: {self.frame_count}")
-    
-    async def _process_frame(self, frame, source: VideoSource):
+    async def _websocket_writer(self, write_q: asyncio.Queue, session_id: Optional[str]):
+        """Send stage: drain processed frames to the session's WebSocket clients"""
+        while True:
+            item = await write_q.get()
+            if item is None:
+                break
+            # Binary image frame first, then its detections/violations as a JSON control message
+            packet, message = item
+            manager.send_frame_to_session(session_id, packet, message)
+
+    async def _process_frame(self, frame, source: VideoSource, session_id: Optional[str],
+                             in_flight: asyncio.Queue, det_in: asyncio.Queue):
         """Process and publish frame to message broker"""
         try:
             self.frame_count += 1
 
-            # Encode frame to base64
-            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            frame_b64 = base64.b64encode(buffer).decode('utf-8')
+            # Encode frame (sent as raw bytes, no base64) in the encode pool
+            image = await asyncio.get_running_loop().run_in_executor(self._encode_pool, self._encode_frame, frame)
 
-            # Create frame message
+            # Create frame message (one clock read per frame)
+            now_ns = time.time_ns()
             frame_message = {
-                "frame_id": f"{source.source_path}_{self.frame_count}_{int(datetime.now().timestamp())}",
-                "timestamp": datetime.now().isoformat(),
-                "source_info": {
-                    "type": source.source_type,
-                    "path": source.source_path,
-                    "fps": source.fps,
-                    "resolution": source.resolution
-                },
-                "frame_data": frame_b64,
+                "frame_id": f"{self._frame_id_prefix}{self.frame_count}_{now_ns // 1_000_000_000}",
+                "timestamp": datetime.fromtimestamp(now_ns / 1e9).isoformat(),
+                "timestamp_ns": now_ns,
+                "source_info": self._source_info,
+                "frame_bytes": image,
                 "frame_number": self.frame_count,
-                "metadata": {
-                    "size": len(frame_b64),
-                    "encoding": "base64_jpeg",
-                    "quality": 85
-                }
+                "metadata": {**FRAME_METADATA, "size": len(image)}
             }
 
             # Publish to message broker (Kafka implementation would go here)
             await self._publish_frame(frame_message)
 
-            # Send to WebSocket clients
-            if self.current_session_id:
-                await self._send_frame_to_websocket(frame_message)
+            # Start detection now and hand the frame to the in-order analysis stage, so
+            # several frames can be awaiting (batched) detection at once
+            if session_id:
+                detection = asyncio.create_task(self._call_detection_service(frame_message, det_in))
+                await in_flight.put((frame_message, detection))
 
             # Log progress every 50 frames
             if self.frame_count % 50 == 0:
-                elapsed = (datetime.now() - self.start_time).total_seconds()
+                elapsed = time.monotonic() - self.start_time
                 fps_actual = self.frame_count / elapsed if elapsed > 0 else 0
                 logger.info(f"📊 Processed {self.frame_count} frames, actual FPS: {fps_actual:.2f}")
 
         except Exception as e:
             logger.error(f"❌ Error processing frame {self.frame_count}: {e}")
 
-    async def _send_frame_to_websocket(self, frame_message: Dict[str, Any]):
+    async def _send_frame_to_websocket(self, frame_message: Dict[str, Any], detection: "asyncio.Task[List[Dict]]",
+                                       write_q: asyncio.Queue):
         """Send frame data to WebSocket clients with real detection and violation analysis"""
+        frame_number = frame_message["frame_number"]
         try:
-            logger.info(f"🔍 Processing frame {self.frame_count} for detection...")
+            logger.debug("🔍 Processing frame %d for detection...", frame_number)
 
-            # Call detection service for real YOLO detection
-            detections = await self._call_detection_service(frame_message)
+            # Wait for the frame's YOLO detections, fetching ROI zones concurrently
+            detections, roi_zones = await asyncio.gather(detection, self._fetch_roi_zones())
 
             # If detection service fails, fall back to mock detections
-            if not detections:
+            used_mock = not detections
+            if used_mock:
                 logger.warning("⚠️ Detection service failed, using mock detections")
                 detections = await self._get_mock_detections(frame_message)
 
-            # Fetch ROI zones from ROI Manager
-            roi_zones = await self._fetch_roi_zones()
-
             # Skip tracking service - use ONLY original detections
-            logger.info(f"✅ Using original detections with {len(detections)} objects")
+            logger.debug("✅ Using original detections with %d objects", len(detections))
 
             # Analyze violations using original violation detection service
             violations = []
-            if roi_zones:
+            if roi_zones and self._needs_violation_analysis(detections, roi_zones):
                 violations = await self._analyze_violations(frame_message, detections, roi_zones)
 
             # Check if we have tracking data
@@ -366,93 +705,167 @@ class FrameReader:
                 "type": "frame_processed",
                 "frame_id": frame_message["frame_id"],
                 "timestamp": frame_message["timestamp"],
-                "frame_data": frame_message["frame_data"],
                 "detections": detections,
                 "violations": violations,
                 "roi_zones": roi_zones,
-                "progress": min(100, (self.frame_count / 1000) * 100),  # Mock progress
-                "frame_number": self.frame_count,
-                "detection_source": "tracking" if has_tracking else ("yolo" if detections != await self._get_mock_detections(frame_message) else "mock"),
+                "progress": min(100, (frame_number / 1000) * 100),  # Mock progress
+                "frame_number": frame_number,
+                "detection_source": "tracking" if has_tracking else ("mock" if used_mock else "yolo"),
                 "tracking_enabled": has_tracking,
-                "frame_info": {
-                    "dimensions": frame_message["source_info"]["resolution"],
-                    "fps": frame_message["source_info"]["fps"]
-                }
+                "frame_info": self._frame_info
             }
 
-            logger.info(f"📡 Sending frame {self.frame_count} with {len(detections)} detections, {len(violations)} violations, {len(roi_zones)} ROI zones to WebSocket")
-            await manager.send_to_session(self.current_session_id, ws_message)
+            logger.debug("📡 Sending frame %d with %d detections, %d violations, %d ROI zones to WebSocket",
+                         frame_number, len(detections), len(violations), len(roi_zones))
+            image = frame_message["frame_bytes"]
+            packet = FRAME_HEADER.pack(frame_message["frame_number"], frame_message["timestamp_ns"], len(image)) + image
+            await write_q.put((packet, ws_message))
 
         except Exception as e:
             logger.error(f"❌ Error sending frame to WebSocket: {e}")
 
-    async def _call_detection_service(self, frame_message: Dict[str, Any]) -> List[Dict]:
-        """Call the detection service for real YOLO detection"""
-        try:
-            import httpx
+    async def _call_detection_service(self, frame_message: Dict[str, Any], det_in: asyncio.Queue) -> List[Dict]:
+        """Queue a frame for the next batched detection request and wait for its detections"""
+        future = asyncio.get_running_loop().create_future()
+        await det_in.put((frame_message, future))
+        return await future
 
-            detection_request = {
-                "frame_id": frame_message["frame_id"],
-                "frame_data": frame_message["frame_data"],
-                "timestamp": frame_message["timestamp"],
-                "source_info": frame_message["source_info"]
-            }
+    async def _detection_batcher(self, det_in: asyncio.Queue):
+        """Send queued frames to the detection service once DETECTION_BATCH_SIZE arrive or the wait expires"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await det_in.get()]
+            deadline = loop.time() + DETECTION_BATCH_WAIT_MS / 1000
+            while len(batch) < DETECTION_BATCH_SIZE:
+                try:
+                    batch.append(await asyncio.wait_for(det_in.get(), deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
 
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    "http://localhost:8002/detect",
-                    json=detection_request
-                )
-
-                if response.status_code == 200:
-                    result = response.json()
-                    detections = result.get("detections", [])
-                    logger.info(f"✅ Detection service returned {len(detections)} detections")
-                    return detections
-                else:
-                    logger.error(f"❌ Detection service error: {response.status_code} - {response.text}")
-                    return []
+            results = await self._detect_batch([frame_message for frame_message, _ in batch])
+            for (_, future), detections in zip(batch, results):
+                if not future.done():
+                    future.set_result(detections)
+
+    async def _detect_batch(self, frame_messages: List[Dict[str, Any]]) -> List[List[Dict]]:
+        """Call the detection service for real YOLO detection on a batch of frames"""
+        try:
+            # Upload the raw images so neither side pays for base64 + JSON
+            response = await http_client.post(
+                "http://localhost:8002/detect_raw_batch",
+                data={"frame_ids": [fm["frame_id"] for fm in frame_messages]},
+                files=[("files", (f"frame{FRAME_EXT}", fm["frame_bytes"], FRAME_MIME)) for fm in frame_messages]
+            )
+
+            if response.status_code == 200:
+                results = orjson.loads(response.content)["results"]
+                logger.debug("✅ Detection service returned %d frames in one batch", len(results))
+                return [result.get("detections", []) for result in results]
+            else:
+                logger.error(f"❌ Detection service error: {response.status_code} - {response.text}")
 
         except Exception as e:
             logger.error(f"❌ Error calling detection service: {e}")
-            return []
+        return [[] for _ in frame_messages]
 
     async def _fetch_roi_zones(self) -> List[Dict]:
-        """Fetch ROI zones from ROI Manager service (fresh data each time)"""
-        try:
-            import httpx
-
-            # Always fetch fresh ROI data to reflect any changes (additions/deletions)
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get("http://localhost:8004/rois")
-
-                if response.status_code == 200:
-                    result = response.json()
-                    # ROI Manager returns {"success": true, "data": [...], "count": N}
-                    # Extract the actual ROI data
-                    if isinstance(result, dict) and 'data' in result:
-                        rois = result['data']
-                    elif isinstance(result, list):
-                        rois = result
-                    else:
-                        logger.warning(f"⚠️ Unexpected ROI Manager response format: {result}")
-                        rois = []
+        """Fetch ROI zones from ROI Manager service, cached for ROI_CACHE_TTL seconds"""
+        now = time.monotonic()
+        if self._roi_fetched and now - self._roi_fetched < ROI_CACHE_TTL:
+            return self._roi_cache
 
-                    logger.info(f"✅ Fetched {len(rois)} ROI zones from ROI Manager")
-                    return rois
+        try:
+            # Revalidate with the last ETag so unchanged ROIs come back as an empty 304
+            headers = {"If-None-Match": self._roi_etag} if self._roi_etag else None
+            response = await http_client.get("http://localhost:8004/rois", headers=headers, timeout=5.0)
+
+            if response.status_code == 304:
+                self._roi_fetched = now
+                return self._roi_cache
+            elif response.status_code == 200:
+                result = orjson.loads(response.content)
+                # ROI Manager returns {"success": true, "data": [...], "count": N}
+                # Extract the actual ROI data
+                if isinstance(result, dict) and 'data' in result:
+                    rois = result['data']
+                elif isinstance(result, list):
+                    rois = result
                 else:
-                    logger.error(f"❌ ROI Manager error: {response.status_code}")
-                    return []
+                    logger.warning(f"⚠️ Unexpected ROI Manager response format: {result}")
+                    rois = []
+
+                logger.debug("✅ Fetched %d ROI zones from ROI Manager", len(rois))
+                self._roi_cache = rois
+                self._roi_etag = response.headers.get("ETag")
+                self._roi_fetched = now
+                return rois
+            else:
+                logger.error(f"❌ ROI Manager error: {response.status_code}")
+                return []
 
         except Exception as e:
             logger.error(f"❌ Error fetching ROI zones: {e}")
             return []
 
+    def _hands_in_rois(self, detections: List[Dict], roi_zones: List[Dict]) -> Tuple[bool, bool]:
+        """(any hand detected, any hand center inside a scooper-required ROI), vectorized over detections"""
+        width, height = self.current_source.resolution
+        if roi_zones is not self._roi_regions_src or self._roi_mask.shape != (height, width):
+            regions = (roi_region(roi) for roi in roi_zones if roi.get("requires_scooper", True))
+            self._roi_regions = [region for region in regions if region is not None]
+            self._roi_regions_src = roi_zones
+            self._roi_mask = self._rasterize_rois(self._roi_regions, width, height)
+
+        bboxes, classes, _ = detections_to_soa(detections)
+        hands = bboxes[classes == HAND_CLASS_ID]
+        if not len(hands):
+            return False, False
+        cx = (hands[:, 0] + hands[:, 2]) * 0.5
+        cy = (hands[:, 1] + hands[:, 3]) * 0.5
+
+        # In-frame centers are one mask load each; anything outside falls back to the geometry test
+        in_frame = (cx >= 0) & (cx < width) & (cy >= 0) & (cy < height)
+        if self._roi_mask[cy[in_frame].astype(np.intp), cx[in_frame].astype(np.intp)].any():
+            return True, True
+        if in_frame.all():
+            return True, False
+        cx, cy = cx[~in_frame], cy[~in_frame]
+        return True, any(points_in_region(cx, cy, region).any() for region in self._roi_regions)
+
+    @staticmethod
+    def _rasterize_rois(regions: List[Tuple[str, np.ndarray]], width: int, height: int) -> np.ndarray:
+        """(height, width) uint8 mask holding the 1-based ROI index at each covered pixel, 0 elsewhere"""
+        mask = np.zeros((height, width), dtype=np.uint8)
+        for roi_id, (kind, geometry) in enumerate(regions, 1):
+            value = min(roi_id, 255)
+            if kind == "rect":
+                x1, y1, x2, y2 = (int(round(v)) for v in geometry)
+                cv2.rectangle(mask, (x1, y1), (x2, y2), value, thickness=-1)
+            else:
+                cv2.fillPoly(mask, [np.round(geometry).astype(np.int32)], value)
+        return mask
+
+    def _needs_violation_analysis(self, detections: List[Dict], roi_zones: List[Dict]) -> bool:
+        """Skip the violation service while no hand is inside a scooper-required ROI"""
+        try:
+            hands_seen, in_roi = self._hands_in_rois(detections, roi_zones)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"⚠️ Local ROI check failed, deferring to violation service: {e}")
+            return True
+        if in_roi:
+            self._roi_exit_pending = True
+            return True
+        # The service tracks entry/exit sequences: once a hand was inside, keep sending
+        # frames until one shows hands outside so it can close the sequence
+        if self._roi_exit_pending:
+            if hands_seen:
+                self._roi_exit_pending = False
+            return True
+        return False
+
     async def _analyze_violations(self, frame_message: Dict[str, Any], detections: List[Dict], roi_zones: List[Dict]) -> List[Dict]:
         """Analyze frame for violations using violation detection service"""
         try:
-            import httpx
-
             # Prepare violation analysis request
             violation_request = {
                 "frame_id": frame_message["frame_id"],
@@ -461,20 +874,20 @@ class FrameReader:
                 "rois": roi_zones
             }
 
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    "http://localhost:8003/analyze",
-                    json=violation_request
-                )
-
-                if response.status_code == 200:
-                    result = response.json()
-                    violations = result.get("violations", [])
-                    logger.info(f"✅ Violation analysis returned {len(violations)} violations")
-                    return violations
-                else:
-                    logger.error(f"❌ Violation detection service error: {response.status_code}")
-                    return []
+            response = await http_client.post(
+                "http://localhost:8003/analyze",
+                content=orjson.dumps(violation_request, option=orjson.OPT_SERIALIZE_NUMPY),
+                headers=JSON_HEADERS
+            )
+
+            if response.status_code == 200:
+                result = orjson.loads(response.content)
+                violations = result.get("violations", [])
+                logger.debug("✅ Violation analysis returned %d violations", len(violations))
+                return violations
+            else:
+                logger.error(f"❌ Violation detection service error: {response.status_code}")
+                return []
 
         except Exception as e:
             logger.error(f"❌ Error analyzing violations: {e}")
@@ -483,8 +896,6 @@ class FrameReader:
     async def _call_tracking_service(self, frame_message: Dict[str, Any], detections: List[Dict], roi_zones: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
         """Call the tracking service for enhanced object tracking and violation detection"""
         try:
-            import httpx
-
             # Prepare tracking request
             tracking_request = {
                 "frame_id": frame_message["frame_id"],
@@ -494,41 +905,41 @@ class FrameReader:
                 "frame_info": frame_message.get("source_info", {})
             }
 
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    "http://localhost:8006/track",
-                    json=tracking_request
-                )
-
-                if response.status_code == 200:
-                    result = response.json()
-                    tracked_detections = result.get("tracked_detections", [])
-                    violations = result.get("violations", [])
-
-                    # Convert tracked detections to standard detection format
-                    standard_detections = []
-                    for tracked_det in tracked_detections:
-                        standard_detection = {
-                            "class_name": tracked_det["class_name"],
-                            "confidence": tracked_det["confidence"],
-                            "bbox": tracked_det["bbox"],
-                            "center": tracked_det["center"],
-                            "area": tracked_det["area"],
-                            # Add tracking metadata
-                            "track_id": tracked_det["track_id"],
-                            "stability_score": tracked_det["stability_score"],
-                            "frames_tracked": tracked_det["frames_tracked"],
-                            "avg_confidence": tracked_det["avg_confidence"],
-                            "velocity": tracked_det["velocity"],
-                            "associated_objects": tracked_det["associated_objects"]
-                        }
-                        standard_detections.append(standard_detection)
-
-                    logger.info(f"✅ Tracking service returned {len(tracked_detections)} tracked objects, {len(violations)} violations")
-                    return standard_detections, violations
-                else:
-                    logger.error(f"❌ Tracking service error: {response.status_code}")
-                    return [], []
+            response = await http_client.post(
+                "http://localhost:8006/track",
+                content=orjson.dumps(tracking_request, option=orjson.OPT_SERIALIZE_NUMPY),
+                headers=JSON_HEADERS
+            )
+
+            if response.status_code == 200:
+                result = orjson.loads(response.content)
+                tracked_detections = result.get("tracked_detections", [])
+                violations = result.get("violations", [])
+
+                # Convert tracked detections to standard detection format
+                standard_detections = []
+                for tracked_det in tracked_detections:
+                    standard_detection = {
+                        "class_name": tracked_det["class_name"],
+                        "confidence": tracked_det["confidence"],
+                        "bbox": tracked_det["bbox"],
+                        "center": tracked_det["center"],
+                        "area": tracked_det["area"],
+                        # Add tracking metadata
+                        "track_id": tracked_det["track_id"],
+                        "stability_score": tracked_det["stability_score"],
+                        "frames_tracked": tracked_det["frames_tracked"],
+                        "avg_confidence": tracked_det["avg_confidence"],
+                        "velocity": tracked_det["velocity"],
+                        "associated_objects": tracked_det["associated_objects"]
+                    }
+                    standard_detections.append(standard_detection)
+
+                logger.debug("✅ Tracking service returned %d tracked objects, %d violations", len(tracked_detections), len(violations))
+                return standard_detections, violations
+            else:
+                logger.error(f"❌ Tracking service error: {response.status_code}")
+                return [], []
 
         except Exception as e:
             logger.error(f"❌ Error calling tracking service: {e}")
@@ -536,8 +947,6 @@ class FrameReader:
 
     async def _get_mock_detections(self, frame_message: Dict[str, Any]) -> List[Dict]:
         """Generate mock detections for testing"""
-        import random
-
         # Generate realistic mock detections
         detections = []
 
@@ -580,22 +989,67 @@ class FrameReader:
 
         return detections
     
+    async def start_producer(self):
+        """Start the long-lived Kafka producer once at startup; frames aren't published if it fails"""
+        if self._producer is not None or not (AIOKAFKA_AVAILABLE and self.config.publish_frames):
+            return
+        compression = self.config.kafka_compression
+        if compression == "lz4" and not LZ4_AVAILABLE:
+            logger.warning("⚠️ lz4 not installed, publishing frames uncompressed")
+            compression = None
+        producer = None
+        try:
+            # linger_ms + compression let one broker request carry many frames
+            producer = AIOKafkaProducer(
+                bootstrap_servers=self.config.kafka_broker,
+                compression_type=compression,
+                linger_ms=5,
+                acks=1
+            )
+            await producer.start()
+        except Exception as e:
+            logger.warning(f"⚠️ Kafka unavailable at {self.config.kafka_broker}, frames won't be published: {e}")
+            if producer is not None:
+                await producer.stop()
+            return
+        self._producer = producer
+        logger.info(f"✅ Kafka producer connected to {self.config.kafka_broker}, topic: {self.config.frame_topic}")
+
+    async def close_producer(self):
+        if self._producer is not None:
+            await self._producer.stop()
+            self._producer = None
+
     async def _publish_frame(self, frame_message: Dict[str, Any]):
         """Publish frame to message broker"""
-        # TODO: Implement Kafka producer
-        # For now, we'll simulate publishing
-        logger.debug(f"Publishing frame {frame_message['frame_id']}")
-        
-        # In a real implementation, this would be:
-        # await self.kafka_producer.send(self.config.frame_topic, frame_message)
-    
+        if self._producer is None:
+            return
+        try:
+            # Same JSON shape the broker's frame consumers decode (image as base64 frame_data)
+            record = {key: value for key, value in frame_message.items() if key != "frame_bytes"}
+            record["frame_data"] = base64.b64encode(frame_message["frame_bytes"]).decode()
+            # send() returns once the record is buffered; batching and delivery happen in the background
+            delivery = await self._producer.send(
+                self.config.frame_topic,
+                value=orjson.dumps(record),
+                key=frame_message["frame_id"].encode()
+            )
+            delivery.add_done_callback(self._on_frame_delivered)
+        except Exception as e:
+            logger.error(f"❌ Failed to publish frame {frame_message['frame_id']}: {e}")
+
+    @staticmethod
+    def _on_frame_delivered(delivery: asyncio.Future):
+        if not delivery.cancelled() and delivery.exception():
+            logger.error(f"❌ Kafka delivery failed: {delivery.exception()}")
+
     async def stop_reading(self) -> Dict[str, Any]:
         """Stop frame reading"""
         if not self.is_reading:
             return {"status": "not_reading", "message": "No active reading session"}
         
         self.is_reading = False
-        elapsed = (datetime.now() - self.start_time).total_seconds()
+        elapsed = time.monotonic() - self.start_time
         
         return {
             "status": "stopped",
@@ -609,7 +1063,7 @@ class FrameReader:
         if not self.is_reading:
             return {"status": "idle", "is_reading": False}
         
-        elapsed = (datetime.now() - self.start_time).total_seconds()
+        elapsed = time.monotonic() - self.start_time
         return {
             "status": "reading",
             "is_reading": True,
@@ -624,6 +1078,18 @@ config = FrameReaderConfig()
 frame_reader = FrameReader(config)
 manager = ConnectionManager()
 
+@app.on_event("startup")
+async def startup_event():
+    """Warm the geometry kernels and connect the Kafka producer before frames arrive"""
+    await asyncio.to_thread(geom.warmup)
+    await frame_reader.start_producer()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close pooled downstream connections and the Kafka producer"""
+    await frame_reader.close_producer()
+    await http_client.aclose()
+
 # API Endpoints
 @app.get("/health")
 async def health_check():
@@ -653,24 +1119,24 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
         logger.info(f"✅ WebSocket connected for session: {session_id}")
 
         # Send initial connection message
-        await websocket.send_text(json.dumps({
+        await websocket.send_text(orjson.dumps({
             "type": "connection_established",
             "session_id": session_id,
             "message": "WebSocket connection established"
-        }))
+        }).decode())
 
         # Keep connection alive
         while True:
             try:
                 # Wait for messages from client (ping/pong)
                 data = await websocket.receive_text()
-                message = json.loads(data)
+                message = orjson.loads(data)
 
                 if message.get("type") == "ping":
-                    await websocket.send_text(json.dumps({
+                    await websocket.send_text(orjson.dumps({
                         "type": "pong",
                         "timestamp": datetime.now().isoformat()
-                    }))
+                    }).decode())
 
             except WebSocketDisconnect:
                 logger.info(f"🔌 WebSocket disconnected for session: {session_id}")
@@ -738,4 +1204,11 @@ async def list_videos():
 
 if __name__ == "__main__":
     logger.info("Starting Frame Reader Service")
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8001,
+        # uvloop/httptools when installed (uvicorn[standard]), asyncio otherwise; uvloop has no Windows build
+        loop="auto",
+        http="auto"
+    )
@@ -5,19 +5,92 @@ Provides easy-to-use client for services to communicate via RabbitMQ
 """
 
 import os
-import json
 import logging
 import asyncio
-from datetime import datetime
-from typing import Dict, Any, Optional, Callable
+import time
+from typing import Dict, Any, Optional, Callable, Tuple
 from dataclasses import dataclass
 
 import aio_pika
+import orjson
 from aio_pika import Message, DeliveryMode
+from aio_pika.pool import Pool
 import httpx
 
 logger = logging.getLogger(__name__)
 
+EXCHANGE_NAME = "pizza_store_exchange"
+RABBITMQ_CONNECTION_POOL_SIZE = int(os.getenv("RABBITMQ_CONNECTION_POOL_SIZE", "2"))
+RABBITMQ_CHANNEL_POOL_SIZE = int(os.getenv("RABBITMQ_CHANNEL_POOL_SIZE", "32"))
+
+# Realtime per-frame traffic: stale as soon as the next frame arrives, so never fsync'd or confirmed
+TRANSIENT_ROUTING_PREFIXES = ("frame.", "worker.tracking")
+
+# Short connect timeout so a dead broker fails fast; keep-alive pool reused across publishes
+BROKER_HTTP_TIMEOUT = httpx.Timeout(10.0, connect=2.0)
+BROKER_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60)
+# BROKER_HTTP2=1 multiplexes concurrent publishes over one h2 connection (prior knowledge, plain http://);
+# the broker's uvicorn only speaks HTTP/1.1, so this needs an h2-capable server or proxy in front of it
+BROKER_HTTP2 = os.getenv("BROKER_HTTP2", "0") == "1"
+
+# HTTP publishes are coalesced into /publish/batch: a lone message goes out immediately,
+# under load the batch keeps filling for up to the linger time or the max size
+BROKER_BATCH_MAX_SIZE = int(os.getenv("BROKER_BATCH_MAX_SIZE", "64"))
+BROKER_BATCH_LINGER = float(os.getenv("BROKER_BATCH_LINGER_MS", "5")) / 1000.0
+BROKER_OUTBOX_SIZE = int(os.getenv("BROKER_OUTBOX_SIZE", "1024"))
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Process-wide pools shared by every client: connections are heavy, channels are cheap
+_http_client: Optional[httpx.AsyncClient] = None
+_connection_pool: Optional[Pool] = None
+_channel_pool: Optional[Pool] = None
+_transient_channel_pool: Optional[Pool] = None
+
+def is_transient(routing_key: str) -> bool:
+    return routing_key.startswith(TRANSIENT_ROUTING_PREFIXES)
+
+def _get_channel_pools(rabbitmq_url: str) -> Tuple[Pool, Pool]:
+    """Create the shared connection pool and (confirmed, unconfirmed) channel pools on first use"""
+    global _connection_pool, _channel_pool, _transient_channel_pool
+    if _channel_pool is None:
+        async def get_connection() -> aio_pika.RobustConnection:
+            return await aio_pika.connect_robust(rabbitmq_url)
+
+        async def get_channel(publisher_confirms: bool) -> aio_pika.abc.AbstractChannel:
+            async with _connection_pool.acquire() as connection:
+                return await connection.channel(publisher_confirms=publisher_confirms)
+
+        _connection_pool = Pool(get_connection, max_size=RABBITMQ_CONNECTION_POOL_SIZE)
+        _channel_pool = Pool(get_channel, True, max_size=RABBITMQ_CHANNEL_POOL_SIZE)
+        _transient_channel_pool = Pool(get_channel, False, max_size=RABBITMQ_CHANNEL_POOL_SIZE)
+    return _channel_pool, _transient_channel_pool
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Create the shared broker HTTP client on first use"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=BROKER_HTTP_TIMEOUT,
+            limits=BROKER_HTTP_LIMITS,
+            http1=not BROKER_HTTP2,
+            http2=BROKER_HTTP2
+        )
+    return _http_client
+
+async def close_shared_connections():
+    """Close the shared HTTP client, channels and connections"""
+    global _http_client, _connection_pool, _channel_pool, _transient_channel_pool
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+    if _channel_pool is not None:
+        await _channel_pool.close()
+        await _transient_channel_pool.close()
+        await _connection_pool.close()
+    _connection_pool = None
+    _channel_pool = None
+    _transient_channel_pool = None
+
 @dataclass
 class BrokerClientConfig:
     """Configuration for broker client"""
@@ -31,10 +104,13 @@ class MessageBrokerClient:
     
     def __init__(self, config: BrokerClientConfig):
         self.config = config
-        self.connection = None
-        self.channel = None
-        self.exchange = None
+        self._envelope_base = {"source_service": config.service_name}  # constant envelope keys
+        self.channel_pool: Optional[Pool] = None
+        self.transient_channel_pool: Optional[Pool] = None
+        self.channel = None  # dedicated to subscriptions; publishes use the pool
         self.http_client = None
+        self._outbox: Optional[asyncio.Queue] = None
+        self._flusher_task: Optional[asyncio.Task] = None
         
     async def initialize(self):
         """Initialize client connection"""
@@ -52,54 +128,59 @@ class MessageBrokerClient:
     
     async def _init_direct_rabbitmq(self):
         """Initialize direct RabbitMQ connection"""
-        self.connection = await aio_pika.connect_robust(self.config.rabbitmq_url)
-        self.channel = await self.connection.channel()
-        self.exchange = await self.channel.declare_exchange(
-            "pizza_store_exchange",
-            aio_pika.ExchangeType.TOPIC,
-            durable=True
-        )
+        self.channel_pool, self.transient_channel_pool = _get_channel_pools(self.config.rabbitmq_url)
+        # Declare once here so publishes can bind the exchange without a round-trip
+        async with self.channel_pool.acquire() as channel:
+            await channel.declare_exchange(EXCHANGE_NAME, aio_pika.ExchangeType.TOPIC, durable=True)
     
     async def _init_http_client(self):
         """Initialize HTTP client for broker service"""
-        self.http_client = httpx.AsyncClient(timeout=10.0)
+        self.http_client = _get_http_client()
+        if self._flusher_task is None:
+            self._outbox = asyncio.Queue(maxsize=BROKER_OUTBOX_SIZE)
+            self._flusher_task = asyncio.create_task(self._flusher())
     
     async def publish_message(self, routing_key: str, message_data: Dict[str, Any], 
-                            priority: int = 0, correlation_id: str = None) -> bool:
-        """Publish message via broker"""
+                            priority: int = 0, correlation_id: str = None,
+                            durable: Optional[bool] = None) -> bool:
+        """Publish message via broker (durable=None picks by routing key)"""
         try:
-            # Add service metadata
-            message_data.update({
-                "source_service": self.config.service_name,
-                "published_at": datetime.now().isoformat()
-            })
+            # Wrap in the service envelope without mutating the caller's dict
+            payload = {**message_data, **self._envelope_base, "published_at_ns": time.time_ns()}
+            
+            if durable is None:
+                durable = not is_transient(routing_key)
             
-            if self.config.use_direct_rabbitmq and self.exchange:
-                return await self._publish_direct(routing_key, message_data, priority, correlation_id)
+            if self.config.use_direct_rabbitmq and self.channel_pool:
+                return await self._publish_direct(routing_key, payload, priority, correlation_id, durable)
             else:
-                return await self._publish_http(routing_key, message_data, priority, correlation_id)
+                return await self._publish_http(routing_key, payload, priority, correlation_id, durable)
                 
         except Exception as e:
             logger.error(f"❌ Failed to publish message {routing_key}: {e}")
             return False
     
     async def _publish_direct(self, routing_key: str, message_data: Dict[str, Any], 
-                            priority: int, correlation_id: str) -> bool:
+                            priority: int, correlation_id: str, durable: bool = True) -> bool:
         """Publish message directly to RabbitMQ"""
         message = Message(
-            json.dumps(message_data).encode(),
-            delivery_mode=DeliveryMode.PERSISTENT,
+            orjson.dumps(message_data),
+            delivery_mode=DeliveryMode.PERSISTENT if durable else DeliveryMode.NOT_PERSISTENT,
             priority=priority,
             correlation_id=correlation_id,
-            timestamp=datetime.now()
+            timestamp=message_data["published_at_ns"] // 1_000_000_000
         )
         
-        await self.exchange.publish(message, routing_key=routing_key)
+        # Durable messages wait for the publisher confirm; transient ones go out fire-and-forget
+        channel_pool = self.channel_pool if durable else self.transient_channel_pool
+        async with channel_pool.acquire() as channel:
+            exchange = await channel.get_exchange(EXCHANGE_NAME, ensure=False)
+            await exchange.publish(message, routing_key=routing_key)
         logger.info(f"📤 Published message directly: {routing_key}")
         return True
     
     async def _publish_http(self, routing_key: str, message_data: Dict[str, Any], 
-                          priority: int, correlation_id: str) -> bool:
+                          priority: int, correlation_id: str, durable: bool = True) -> bool:
         """Publish message via HTTP to broker service"""
         if not self.http_client:
             await self._init_http_client()
@@ -108,21 +189,64 @@ class MessageBrokerClient:
             "routing_key": routing_key,
             "message_data": message_data,
             "priority": priority,
-            "correlation_id": correlation_id
+            "correlation_id": correlation_id,
+            "durable": durable
         }
         
-        response = await self.http_client.post(
-            f"{self.config.broker_service_url}/publish",
-            json=request_data
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            logger.info(f"📤 Published message via HTTP: {routing_key}")
-            return result.get("success", False)
-        else:
-            logger.error(f"❌ HTTP publish failed: {response.status_code}")
-            return False
+        # Durable messages wait for their batch's result; transient ones return once queued
+        result = asyncio.get_running_loop().create_future() if durable else None
+        await self._outbox.put((request_data, result))
+        return await result if result is not None else True
+    
+    async def _flusher(self):
+        """Drain the outbox into /publish/batch requests"""
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await self._outbox.get()]
+                deadline = loop.time() + BROKER_BATCH_LINGER
+                while len(batch) < BROKER_BATCH_MAX_SIZE:
+                    if not self._outbox.empty():
+                        batch.append(self._outbox.get_nowait())
+                        continue
+                    remaining = deadline - loop.time()
+                    if len(batch) == 1 or remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._outbox.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                
+                results = await self._post_batch([request_data for request_data, _ in batch])
+                self._resolve(batch, results)
+                batch = []
+        finally:
+            # Cancelled mid-batch: fail the in-flight publishes instead of leaving their callers waiting
+            self._resolve(batch, [False] * len(batch))
+    
+    def _resolve(self, batch: list, results: list):
+        """Hand each durable publish in the batch its result and mark the batch done"""
+        for (_, result), success in zip(batch, results):
+            if result is not None and not result.done():
+                result.set_result(success)
+            self._outbox.task_done()
+    
+    async def _post_batch(self, messages: list) -> list:
+        """POST one batch to the broker service, returning a success flag per message"""
+        try:
+            response = await self.http_client.post(
+                f"{self.config.broker_service_url}/publish/batch",
+                content=orjson.dumps({"messages": messages}),
+                headers=JSON_HEADERS
+            )
+            if response.status_code == 200:
+                logger.debug("📤 Published %d messages via HTTP batch", len(messages))
+                return orjson.loads(response.content)["results"]
+            logger.error(f"❌ HTTP batch publish failed: {response.status_code}")
+        except Exception as e:
+            logger.error(f"❌ HTTP batch publish failed: {e}")
+        return [False] * len(messages)
     
     async def subscribe_to_messages(self, queue_name: str, callback: Callable):
         """Subscribe to messages (only works with direct RabbitMQ)"""
@@ -131,6 +255,10 @@ class MessageBrokerClient:
             return False
         
         try:
+            if self.channel is None:
+                async with _connection_pool.acquire() as connection:
+                    self.channel = await connection.channel()
+            
             # Declare queue
             full_queue_name = f"pizza_store.{queue_name}"
             queue = await self.channel.declare_queue(full_queue_name, durable=True)
@@ -138,7 +266,7 @@ class MessageBrokerClient:
             async def message_handler(message: aio_pika.IncomingMessage):
                 async with message.process():
                     try:
-                        data = json.loads(message.body.decode())
+                        data = orjson.loads(message.body)
                         await callback(data)
                         logger.info(f"✅ Processed message from {queue_name}")
                     except Exception as e:
@@ -171,10 +299,22 @@ class MessageBrokerClient:
     
     async def close(self):
         """Close connections"""
-        if self.connection:
-            await self.connection.close()
-        if self.http_client:
-            await self.http_client.aclose()
+        if self._flusher_task:
+            # Let queued publishes go out before stopping the flusher
+            try:
+                await asyncio.wait_for(self._outbox.join(), timeout=5.0)
+            except asyncio.TimeoutError:
+                logger.warning(f"⚠️ Dropping {self._outbox.qsize()} unsent broker messages")
+            self._flusher_task.cancel()
+            await asyncio.gather(self._flusher_task, return_exceptions=True)
+            self._flusher_task = None
+            # Whatever never made it into a batch fails too, so no publisher waits forever
+            while not self._outbox.empty():
+                self._resolve([self._outbox.get_nowait()], [False])
+        if self.channel:
+            await self.channel.close()
+        # The HTTP client is shared process-wide; close_shared_connections() owns it
+        self.http_client = None
         logger.info(f"🔌 Broker client closed for {self.config.service_name}")
 
 # Convenience functions for common message types
@@ -5,16 +5,19 @@ Handles inter-service communication via Apache Kafka
 """
 
 import os
-import json
 import asyncio
 import logging
+import time
 from datetime import datetime
 from typing import Dict, Any, Optional, Callable, List
 from dataclasses import dataclass
 
+import orjson
+from functools import partial
+
 try:
-    from kafka import KafkaProducer, KafkaConsumer
-    from kafka.errors import KafkaError
+    from aiokafka import AIOKafkaProducer, AIOKafkaConsumer
+    from aiokafka.errors import KafkaError
     KAFKA_AVAILABLE = True
 except ImportError:
     KAFKA_AVAILABLE = False
@@ -51,28 +54,34 @@ class KafkaMessageBroker:
     
     def __init__(self, config: KafkaConfig):
         self.config = config
+        self._envelope_base = {"publisher": config.client_id}  # constant envelope keys
         self.producer = None
         self.consumers = {}
+        self.consumer_tasks = {}
         self.is_connected = False
         self.message_handlers = {}
         
-        if KAFKA_AVAILABLE:
-            self._initialize_producer()
-        else:
+        if not KAFKA_AVAILABLE:
             logger.warning("Kafka not available. Using mock implementation.")
     
-    def _initialize_producer(self):
+    async def initialize(self):
+        """Connect the producer; must run inside the service's event loop"""
+        if KAFKA_AVAILABLE:
+            await self._initialize_producer()
+    
+    async def _initialize_producer(self):
         """Initialize Kafka producer"""
         try:
-            self.producer = KafkaProducer(
+            self.producer = AIOKafkaProducer(
                 bootstrap_servers=self.config.bootstrap_servers,
                 client_id=self.config.client_id,
-                batch_size=self.config.producer_batch_size,
+                max_batch_size=self.config.producer_batch_size,
                 linger_ms=self.config.producer_linger_ms,
                 compression_type=self.config.producer_compression_type,
-                value_serializer=lambda v: json.dumps(v).encode('utf-8'),
+                value_serializer=orjson.dumps,
                 key_serializer=lambda k: k.encode('utf-8') if k else None
             )
+            await self.producer.start()
             self.is_connected = True
             logger.info("Kafka producer initialized successfully")
         except Exception as e:
@@ -95,23 +104,26 @@ class KafkaMessageBroker:
             value=detection_data
         )
     
-    async def publish_violation(self, violation_data: Dict[str, Any]) -> bool:
-        """Publish violation event to Kafka"""
+    async def publish_violation(self, violation_data: Dict[str, Any], sync: bool = False) -> bool:
+        """Publish violation event to Kafka (sync=True waits for the broker ack)"""
         return await self._publish_message(
             topic=self.config.violation_topic,
             key=violation_data.get("violation_id"),
-            value=violation_data
+            value=violation_data,
+            sync=sync
         )
     
-    async def publish_alert(self, alert_data: Dict[str, Any]) -> bool:
-        """Publish alert to Kafka"""
+    async def publish_alert(self, alert_data: Dict[str, Any], sync: bool = False) -> bool:
+        """Publish alert to Kafka (sync=True waits for the broker ack)"""
         return await self._publish_message(
             topic=self.config.alert_topic,
             key=alert_data.get("alert_id"),
-            value=alert_data
+            value=alert_data,
+            sync=sync
         )
     
-    async def _publish_message(self, topic: str, key: Optional[str], value: Dict[str, Any]) -> bool:
+    async def _publish_message(self, topic: str, key: Optional[str], value: Dict[str, Any],
+                               sync: bool = False) -> bool:
         """Generic message publishing"""
         if not KAFKA_AVAILABLE or not self.is_connected:
             logger.debug(f"Mock publish to {topic}: {key}")
@@ -119,16 +131,17 @@ class KafkaMessageBroker:
         
         try:
             # Add metadata
-            message = {
-                **value,
-                "published_at": datetime.now().isoformat(),
-                "publisher": self.config.client_id
-            }
+            message = {**value, **self._envelope_base, "published_at_ns": time.time_ns()}
             
-            future = self.producer.send(topic, key=key, value=message)
-            record_metadata = future.get(timeout=10)
+            # send() only appends to the batch; the returned future resolves on the broker ack
+            future = await self.producer.send(topic, key=key, value=message)
+            if sync:
+                record_metadata = await asyncio.wait_for(future, timeout=10)
+                logger.debug(f"Message published to {topic} partition {record_metadata.partition} offset {record_metadata.offset}")
+                return True
             
-            logger.debug(f"Message published to {topic} partition {record_metadata.partition} offset {record_metadata.offset}")
+            # Confirm asynchronously so linger_ms/batch_size can coalesce sends into one request
+            future.add_done_callback(partial(self._on_send_done, topic))
             return True
             
         except KafkaError as e:
@@ -138,44 +151,61 @@ class KafkaMessageBroker:
             logger.error(f"Unexpected error publishing to {topic}: {e}")
             return False
     
-    def subscribe_to_frames(self, handler: Callable[[Dict[str, Any]], None]):
+    @staticmethod
+    def _on_send_done(topic: str, future: asyncio.Future):
+        if future.cancelled():
+            return
+        if future.exception():
+            logger.error(f"Failed to publish message to {topic}: {future.exception()}")
+            return
+        record_metadata = future.result()
+        logger.debug("Message published to %s partition %s offset %s", topic, record_metadata.partition, record_metadata.offset)
+    
+    async def flush(self):
+        """Wait until every pending send has been acknowledged"""
+        if self.producer:
+            await self.producer.flush()
+    
+    async def subscribe_to_frames(self, handler: Callable[[Dict[str, Any]], None]):
         """Subscribe to video frames"""
-        self._subscribe_to_topic(self.config.frame_topic, handler)
+        await self._subscribe_to_topic(self.config.frame_topic, handler)
     
-    def subscribe_to_detections(self, handler: Callable[[Dict[str, Any]], None]):
+    async def subscribe_to_detections(self, handler: Callable[[Dict[str, Any]], None]):
         """Subscribe to detection results"""
-        self._subscribe_to_topic(self.config.detection_topic, handler)
+        await self._subscribe_to_topic(self.config.detection_topic, handler)
     
-    def subscribe_to_violations(self, handler: Callable[[Dict[str, Any]], None]):
+    async def subscribe_to_violations(self, handler: Callable[[Dict[str, Any]], None]):
         """Subscribe to violation events"""
-        self._subscribe_to_topic(self.config.violation_topic, handler)
+        await self._subscribe_to_topic(self.config.violation_topic, handler)
     
-    def subscribe_to_alerts(self, handler: Callable[[Dict[str, Any]], None]):
+    async def subscribe_to_alerts(self, handler: Callable[[Dict[str, Any]], None]):
         """Subscribe to alerts"""
-        self._subscribe_to_topic(self.config.alert_topic, handler)
+        await self._subscribe_to_topic(self.config.alert_topic, handler)
     
-    def _subscribe_to_topic(self, topic: str, handler: Callable[[Dict[str, Any]], None]):
+    async def _subscribe_to_topic(self, topic: str, handler: Callable[[Dict[str, Any]], None]):
         """Generic topic subscription"""
         if not KAFKA_AVAILABLE:
             logger.warning(f"Mock subscription to {topic}")
             return
         
         try:
-            consumer = KafkaConsumer(
+            consumer = AIOKafkaConsumer(
                 topic,
                 bootstrap_servers=self.config.bootstrap_servers,
                 group_id=self.config.consumer_group_id,
                 auto_offset_reset=self.config.consumer_auto_offset_reset,
                 enable_auto_commit=self.config.consumer_enable_auto_commit,
-                value_deserializer=lambda m: json.loads(m.decode('utf-8')),
+                value_deserializer=orjson.loads,
                 key_deserializer=lambda k: k.decode('utf-8') if k else None
             )
             
+            await consumer.start()
+            
             self.consumers[topic] = consumer
             self.message_handlers[topic] = handler
             
-            # Start consumer in background
-            asyncio.create_task(self._consume_messages(topic))
+            # Fetches await socket readiness, so the consume loop shares the event loop
+            self.consumer_tasks[topic] = asyncio.create_task(self._consume_messages(topic))
             
             logger.info(f"Subscribed to topic: {topic}")
             
@@ -188,7 +218,7 @@ class KafkaMessageBroker:
         handler = self.message_handlers[topic]
         
         try:
-            for message in consumer:
+            async for message in consumer:
                 try:
                     # Process message
                     await self._process_message(message.value, handler)
@@ -196,6 +226,8 @@ class KafkaMessageBroker:
                 except Exception as e:
                     logger.error(f"Error processing message from {topic}: {e}")
                     
+        except asyncio.CancelledError:
+            pass
         except Exception as e:
             logger.error(f"Error consuming from {topic}: {e}")
     
@@ -228,14 +260,18 @@ class KafkaMessageBroker:
             }
         }
     
-    def close(self):
+    async def close(self):
         """Close all connections"""
         try:
             if self.producer:
-                self.producer.close()
+                # stop() drains pending batches before disconnecting
+                await self.producer.stop()
+            
+            for task in self.consumer_tasks.values():
+                task.cancel()
             
             for consumer in self.consumers.values():
-                consumer.close()
+                await consumer.stop()
             
             logger.info("Kafka connections closed")
             
@@ -256,10 +292,10 @@ class MockMessageBroker:
     async def publish_detection(self, detection_data: Dict[str, Any]) -> bool:
         return await self._mock_publish("detections", detection_data)
     
-    async def publish_violation(self, violation_data: Dict[str, Any]) -> bool:
+    async def publish_violation(self, violation_data: Dict[str, Any], sync: bool = False) -> bool:
         return await self._mock_publish("violations", violation_data)
     
-    async def publish_alert(self, alert_data: Dict[str, Any]) -> bool:
+    async def publish_alert(self, alert_data: Dict[str, Any], sync: bool = False) -> bool:
         return await self._mock_publish("alerts", alert_data)
     
     async def _mock_publish(self, topic: str, data: Dict[str, Any]) -> bool:
@@ -284,16 +320,16 @@ class MockMessageBroker:
         logger.debug(f"Mock published to {topic}")
         return True
     
-    def subscribe_to_frames(self, handler: Callable):
+    async def subscribe_to_frames(self, handler: Callable):
         self._mock_subscribe("frames", handler)
     
-    def subscribe_to_detections(self, handler: Callable):
+    async def subscribe_to_detections(self, handler: Callable):
         self._mock_subscribe("detections", handler)
     
-    def subscribe_to_violations(self, handler: Callable):
+    async def subscribe_to_violations(self, handler: Callable):
         self._mock_subscribe("violations", handler)
     
-    def subscribe_to_alerts(self, handler: Callable):
+    async def subscribe_to_alerts(self, handler: Callable):
         self._mock_subscribe("alerts", handler)
     
     def _mock_subscribe(self, topic: str, handler: Callable):
@@ -311,7 +347,10 @@ class MockMessageBroker:
             "active_subscribers": {topic: len(handlers) for topic, handlers in self.subscribers.items()}
         }
     
-    def close(self):
+    async def initialize(self):
+        pass
+    
+    async def close(self):
         logger.info("Mock broker closed")
 
 # Factory function
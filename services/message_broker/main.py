@@ -5,14 +5,16 @@ Implements RabbitMQ-based messaging for service communication
 """
 
 import os
-import json
 import logging
 import asyncio
+import time
 from datetime import datetime
 from typing import Dict, Any, Optional, Callable, List
 from dataclasses import dataclass
 
 import aio_pika
+import orjson
+import httpx
 from aio_pika import Message, DeliveryMode
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
@@ -34,6 +36,19 @@ class MessageBrokerConfig:
     message_ttl: int = 300000  # 5 minutes in milliseconds
     max_retries: int = 3
 
+# Services whose health the broker aggregates for /status/all
+MONITORED_SERVICES = {
+    "frame_reader": os.getenv("FRAME_READER_URL", "http://localhost:8001"),
+    "detection": os.getenv("DETECTION_SERVICE_URL", "http://localhost:8002"),
+    "violation_detector": os.getenv("VIOLATION_DETECTOR_URL", "http://localhost:8003"),
+    "roi_manager": os.getenv("ROI_MANAGER_URL", "http://localhost:8004"),
+    "database": os.getenv("DATABASE_SERVICE_URL", "http://localhost:8005")
+}
+HEALTH_POLL_INTERVAL = float(os.getenv("HEALTH_POLL_INTERVAL", "5"))
+
+# Realtime per-frame traffic: stale as soon as the next frame arrives, so never fsync'd or confirmed
+TRANSIENT_ROUTING_PREFIXES = ("frame.", "worker.tracking")
+
 class MessageTypes:
     """Message type constants"""
     FRAME_DETECTION = "frame.detection"
@@ -52,6 +67,7 @@ class MessageBroker:
         self.connection = None
         self.channel = None
         self.exchange = None
+        self.transient_exchange = None  # same exchange over a channel without publisher confirms
         self.subscribers: Dict[str, List[Callable]] = {}
         self.queues: Dict[str, aio_pika.Queue] = {}
         
@@ -69,6 +85,9 @@ class MessageBroker:
                 durable=True
             )
 
+            transient_channel = await self.connection.channel(publisher_confirms=False)
+            self.transient_exchange = await transient_channel.get_exchange(self.config.exchange_name, ensure=False)
+
             # Setup default queues
             await self._setup_queues()
 
@@ -111,36 +130,42 @@ class MessageBroker:
             logger.info(f"📦 Queue '{full_queue_name}' setup with routing keys: {routing_keys}")
     
     async def publish_message(self, routing_key: str, message_data: Dict[str, Any],
-                            priority: int = 0, correlation_id: str = None) -> bool:
-        """Publish message to exchange"""
+                            priority: int = 0, correlation_id: str = None,
+                            durable: Optional[bool] = None) -> bool:
+        """Publish message to exchange (durable=None picks by routing key)"""
         try:
             # Add metadata
+            published_at_ns = time.time_ns()
             message_data.update({
                 "timestamp": datetime.now().isoformat(),
                 "routing_key": routing_key,
                 "broker_metadata": {
-                    "published_at": datetime.now().isoformat(),
+                    "published_at_ns": published_at_ns,
                     "priority": priority,
                     "correlation_id": correlation_id
                 }
             })
 
+            if durable is None:
+                durable = not routing_key.startswith(TRANSIENT_ROUTING_PREFIXES)
+
             # If RabbitMQ is available, publish to exchange
             if self.exchange:
                 message = Message(
-                    json.dumps(message_data).encode(),
-                    delivery_mode=DeliveryMode.PERSISTENT,
+                    orjson.dumps(message_data),
+                    delivery_mode=DeliveryMode.PERSISTENT if durable else DeliveryMode.NOT_PERSISTENT,
                     priority=priority,
                     correlation_id=correlation_id,
-                    timestamp=datetime.now()
+                    timestamp=published_at_ns // 1_000_000_000
                 )
 
-                await self.exchange.publish(message, routing_key=routing_key)
+                exchange = self.exchange if durable else self.transient_exchange
+                await exchange.publish(message, routing_key=routing_key)
                 logger.info(f"📤 Published message to RabbitMQ: {routing_key}")
             else:
                 # HTTP-only mode: just log the message
                 logger.info(f"📤 Message logged (HTTP-only mode): {routing_key}")
-                logger.debug(f"Message data: {json.dumps(message_data, indent=2)}")
+                logger.debug("Message data: %s", message_data)
 
             return True
 
@@ -160,7 +185,7 @@ class MessageBroker:
             async def message_handler(message: aio_pika.IncomingMessage):
                 async with message.process():
                     try:
-                        data = json.loads(message.body.decode())
+                        data = orjson.loads(message.body)
                         await callback(data)
                         logger.info(f"✅ Processed message from {queue_name}")
                     except Exception as e:
@@ -197,9 +222,63 @@ class MessageBroker:
             await self.connection.close()
             logger.info("🔌 Message broker connection closed")
 
+class ServiceHealthMonitor:
+    """Keeps a rolling health snapshot of all services so callers need one request, not N"""
+
+    def __init__(self, services: Dict[str, str], interval: float):
+        self.services = services
+        self.interval = interval
+        self.status: Dict[str, Dict[str, Any]] = {}
+        self.last_update: Optional[float] = None  # time.monotonic() of last refresh
+        self._client: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start polling service health in the background"""
+        self._client = httpx.AsyncClient(timeout=httpx.Timeout(4.0, connect=1.0))
+        self._task = asyncio.create_task(self._poll_loop())
+
+    async def _probe(self, service_url: str) -> Dict[str, Any]:
+        try:
+            response = await self._client.get(f"{service_url}/health")
+            return {
+                "status": "healthy" if response.status_code == 200 else "unhealthy",
+                "response_time": response.elapsed.total_seconds()
+            }
+        except Exception as e:
+            return {
+                "status": "unhealthy",
+                "error": str(e)
+            }
+
+    async def _poll_loop(self):
+        while True:
+            results = await asyncio.gather(*[self._probe(url) for url in self.services.values()])
+            self.status.update(zip(self.services.keys(), results))
+            self.last_update = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def record_heartbeat(self, service_name: str, status: str):
+        """Record a heartbeat pushed by a service between polls"""
+        self.status[service_name] = {"status": status, "response_time": 0.0}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current aggregated health with its age in seconds"""
+        return {
+            "age": time.monotonic() - self.last_update if self.last_update is not None else None,
+            "services": dict(self.status)
+        }
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+        if self._client:
+            await self._client.aclose()
+
 # Global instances
 config = MessageBrokerConfig()
 broker = MessageBroker(config)
+health_monitor = ServiceHealthMonitor(MONITORED_SERVICES, HEALTH_POLL_INTERVAL)
 
 # API Models
 class PublishMessageRequest(BaseModel):
@@ -207,6 +286,14 @@ class PublishMessageRequest(BaseModel):
     message_data: Dict[str, Any]
     priority: int = 0
     correlation_id: Optional[str] = None
+    durable: Optional[bool] = None  # None: transient for frame.*/worker.tracking, persistent otherwise
+
+class PublishBatchRequest(BaseModel):
+    messages: List[PublishMessageRequest]
+
+class HeartbeatRequest(BaseModel):
+    service: str
+    status: str = "healthy"
 
 class MessageResponse(BaseModel):
     success: bool
@@ -224,6 +311,17 @@ async def health_check():
         "rabbitmq_connected": broker.connection is not None and not broker.connection.is_closed
     }
 
+@app.get("/status/all")
+async def get_all_service_status():
+    """Aggregated health of all monitored services"""
+    return health_monitor.snapshot()
+
+@app.post("/heartbeat")
+async def heartbeat(request: HeartbeatRequest):
+    """Accept a health heartbeat pushed by a service"""
+    health_monitor.record_heartbeat(request.service, request.status)
+    return {"success": True}
+
 @app.post("/publish", response_model=MessageResponse)
 async def publish_message(request: PublishMessageRequest):
     """Publish message to exchange"""
@@ -231,7 +329,8 @@ async def publish_message(request: PublishMessageRequest):
         request.routing_key,
         request.message_data,
         request.priority,
-        request.correlation_id
+        request.correlation_id,
+        request.durable
     )
     
     return MessageResponse(
@@ -240,6 +339,27 @@ async def publish_message(request: PublishMessageRequest):
         timestamp=datetime.now().isoformat()
     )
 
+@app.post("/publish/batch")
+async def publish_batch(request: PublishBatchRequest):
+    """Publish a batch of messages in one request"""
+    results = await asyncio.gather(*(
+        broker.publish_message(
+            message.routing_key,
+            message.message_data,
+            message.priority,
+            message.correlation_id,
+            message.durable
+        )
+        for message in request.messages
+    ))
+
+    return {
+        "success": all(results),
+        "results": results,
+        "published": sum(results),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.get("/queues/stats")
 async def get_queue_statistics():
     """Get queue statistics"""
@@ -273,6 +393,7 @@ async def startup_event():
     """Initialize message broker on startup"""
     try:
         await broker.initialize()
+        await health_monitor.start()
         logger.info("🚀 Message Broker Service started")
     except Exception as e:
         logger.error(f"❌ Failed to start message broker: {e}")
@@ -281,6 +402,7 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close connections on shutdown"""
+    await health_monitor.close()
     await broker.close()
     logger.info("🛑 Message Broker Service stopped")
 
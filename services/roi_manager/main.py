@@ -187,11 +187,14 @@ def get_rois():
     """Get all ROIs"""
     try:
         rois = roi_manager.get_all_rois()
-        return jsonify({
+        response = jsonify({
             'success': True,
             'data': rois,
             'count': len(rois)
         })
+        # Content ETag so polling clients get a bodyless 304 while ROIs are unchanged
+        response.add_etag()
+        return response.make_conditional(request)
     except Exception as e:
         logger.error(f"Error getting ROIs: {e}")
         return jsonify({
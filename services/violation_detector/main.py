@@ -897,7 +897,7 @@ class ViolationDetector:
                         json=violation_data
                     )
 
-                    if response.status_code == 200:
+                    if response.is_success:
                         logger.info(f"✅ Violation saved to database: {violation.violation_id}")
                     else:
                         logger.error(f"❌ Failed to save violation to database: {response.status_code}")
@@ -951,7 +951,7 @@ class ViolationDetector:
                         json=violation_data
                     )
 
-                    if response.status_code == 200:
+                    if response.is_success:
                         logger.info(f"💾 Violation saved to database with frame: {violation.violation_id}")
                     else:
                         logger.error(f"❌ Failed to save violation: {response.status_code}")